@@ -0,0 +1,68 @@
+"""
+Per-message memory and construction cost of `Message`.
+
+Compares the current slotted `Message` (lazy ids) against the previous plain
+dataclass that generated a `uuid4` string for every instance.
+
+Usage:
+    python benchmarks/bench_message.py [--count 100000]
+"""
+import argparse
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from lmflux.core.components import Message
+
+
+@dataclass
+class LegacyMessage:
+    role: str
+    content: str
+
+    reasoning_content: str = field(default=None)
+    call_id: str = field(default=None)
+    tool_calls: list[dict] = field(default=None)
+    name: str = field(default=None)
+
+    message_id: str = field(default_factory=lambda: str(uuid4()))
+
+
+def measure_memory(factory, count: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    messages = [factory("tool", "result", call_id="call", name="tool_name") for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return (after - before) / count
+
+
+def measure_construction(factory, count: int) -> float:
+    timer = timeit.Timer(lambda: factory("tool", "result", call_id="call", name="tool_name"))
+    return min(timer.repeat(repeat=5, number=count)) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = [
+        ("LegacyMessage (uuid4)", LegacyMessage),
+        ("Message (slots, lazy id)", Message),
+    ]
+    print(f"{'variant':<28}{'bytes/message':>16}{'ns/construct':>16}")
+    for name, factory in rows:
+        memory = measure_memory(factory, args.count)
+        construction = measure_construction(factory, args.count)
+        print(f"{name:<28}{memory:>16.1f}{construction:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
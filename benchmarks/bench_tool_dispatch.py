@@ -0,0 +1,68 @@
+"""
+Per-call cost of dispatching a tool call from its JSON arguments.
+
+Compares the previous dispatch (stdlib `json.loads` straight into the function, no
+validation) against `Tool.get_call_response`, which decodes with the fastest JSON backend
+installed and checks the arguments with the validator compiled from the `ToolParam` tree.
+
+Usage:
+    python benchmarks/bench_tool_dispatch.py [--count 100000]
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from lmflux.core.components import Tool, ToolParam
+from lmflux.utils import fastjson
+
+
+def search(query, limit, exact, tags):
+    return query
+
+
+TOOL = Tool(
+    name="search",
+    description="Search the documents",
+    root_param=ToolParam(type="object", name="parameters", property=[
+        ToolParam("string", "query", is_required=True),
+        ToolParam("number", "limit", is_required=True),
+        ToolParam("boolean", "exact", is_required=True),
+        ToolParam("array[string]", "tags", is_required=True),
+    ]),
+    func=search,
+)
+ARGUMENTS = json.dumps({
+    "query": "quarterly revenue by region", "limit": 10, "exact": False,
+    "tags": ["finance", "reports", "2024"],
+})
+
+
+def legacy_dispatch(args_json):
+    return TOOL.func(**json.loads(args_json))
+
+
+def measure(dispatch, count: int) -> float:
+    timer = timeit.Timer(lambda: dispatch(ARGUMENTS))
+    return min(timer.repeat(repeat=5, number=count)) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = [
+        ("json.loads, no validation", legacy_dispatch),
+        (f"{fastjson.BACKEND} + compiled validator", TOOL.get_call_response),
+    ]
+    print(f"{'variant':<36}{'ns/call':>12}")
+    for name, dispatch in rows:
+        print(f"{name:<36}{measure(dispatch, args.count):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 # Core component
 from lmflux.core.components import (SystemPrompt, Message, Conversation, LLMOptions, TemplatedPrompt)
 from lmflux.core.templates import Templates
-from lmflux.core.llm_impl import OpenAICompatibleEndpoint
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint, AsyncOpenAICompatibleEndpoint
+from lmflux.core.clients import ClientRegistry
+from lmflux.core.policies import ExecutionPolicy, RetryPolicy, CircuitBreaker, CircuitOpenError
 
 # Agent components
 from lmflux.agents.sessions import Session
@@ -18,11 +20,12 @@ from lmflux.flow import (
 def openai_agent(
     agent_id:str, model_id:str, tools:list[callable]=None, 
     system_prompt="You are a helpful assistant.", 
-    options=LLMOptions()
+    options=LLMOptions(), policy:ExecutionPolicy=None
 ) -> Agent:
     """
     Creates a new OpenAI compatible agent.
     It will use the `OpenAICompatibleEndpoint` as its base LLM, so It will take the OPENAI_API_BASE and OPENAI_API_KEY enviroment variables to create a OAI client.
+    The client comes from the `ClientRegistry`, so every agent pointing at the same endpoint shares its connection pool.
     
     Args:
     - agent_id (str) : A unique identifier for the agent. It will be used to identify the agent in the conversation.
@@ -30,11 +33,15 @@ def openai_agent(
     - system_prompt (SystemPrompt, optional): The prompt to use as a starting point for the conversation. Defaults to "You are a helpful assistant.".
     - tools (list[callable], optional): A list of functions that will be used by the agent to perform tasks. Defaults to None.
     - options (LLMOptions, optional): Additional options to pass to the LLM. Defaults to LLMOptions().
+    - policy (ExecutionPolicy, optional): Timeout, retry, hedging and circuit breaking applied to every completion request. Defaults to None.
 
     Returns:
     - Agent
     """
-    llm = OpenAICompatibleEndpoint(model_id, SystemPrompt(content=system_prompt), options=options)
+    llm = OpenAICompatibleEndpoint(
+        model_id, SystemPrompt(content=system_prompt), options=options,
+        client=ClientRegistry().get_client(), policy=policy
+    )
     agent = create_agent(llm, agent_id=agent_id)
     if tools:
         agent.with_tools(*tools)
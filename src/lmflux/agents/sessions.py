@@ -1,40 +1,178 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from lmflux.agents import Agent
     
 from lmflux.logger import PipelinesLogger
-from copy import deepcopy
+from contextlib import contextmanager
 from uuid import uuid4
+import threading
+
+from lmflux.utils.layered_dict import LayeredDict
+
+_MISSING = object()
+
+@dataclass
+class ContextDelta:
+    """
+    What a forked context changed since it was forked.
+
+    - ``values``: keys set to a new value.
+    - ``removed``: keys removed.
+    - ``appended``: values appended to each cumulative key.
+    """
+    values: dict = field(default_factory=dict)
+    removed: list = field(default_factory=list)
+    appended: dict = field(default_factory=dict)
 
 class Context:
-    # The reason for the split here is that we might need the cumulative context to be thread safe.
+    """
+    Key/value state shared by the steps of a session.
+
+    Every operation is atomic, `compute` and `lock_key` cover read-modify-write sequences on a
+    single key, and `fork`/`merge` let parallel branches work on private copies that are folded
+    back deterministically.
+
+    Both maps are `LayeredDict`s: cloning or forking a context is O(1) and only the keys a
+    branch writes are copied. Values are shared between forks, so replace a value
+    (``set``) rather than mutating it in place when other forks must not see the change.
+    """
     def __init__(self):
-        self.context = {}
-        self.context_cumulative = {}
+        self.context = LayeredDict()
+        self.context_cumulative = LayeredDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        # Set on forks: views of what the branch started from, used by `merge`
+        self._fork_base = None
+        self._fork_cumulative_base = None
         
     def clone_context(self, context: 'Context'):
-        self.context = deepcopy(context.context)
-        self.context_cumulative = deepcopy(self.context_cumulative)
+        # Snapshotting forks (and so mutates) the source layers, hold the source lock too
+        with context._lock:
+            context_snapshot = LayeredDict.snapshot_of(context.context)
+            cumulative_snapshot = LayeredDict.snapshot_of(context.context_cumulative)
+        with self._lock:
+            self.context = context_snapshot
+            self.context_cumulative = cumulative_snapshot
     
     def set(self, key, value):
-        self.context[key] = value
+        with self._lock:
+            self.context[key] = value
     def remove(self, key):
-        del self.context[key]
+        with self._lock:
+            del self.context[key]
     def get(self, key, default=None):
         return self.context.get(key, default)
     def get_context(self):
         return self.context
     def set_cumulative(self, key, value):
-        if key not in self.context_cumulative:
-            self.context_cumulative[key] = []
-        self.context_cumulative[key].append(value)
+        self.set_cumulative_many(key, [value])
+    def set_cumulative_many(self, key, values: list):
+        with self._lock:
+            if not self.context_cumulative.owns(key):
+                # Copy-on-write: the list may be shared with the context this one was forked from
+                self.context_cumulative[key] = list(self.context_cumulative.get(key, ()))
+            self.context_cumulative[key].extend(values)
     def get_cumulative(self, key):
-        return self.context_cumulative.get(key)
+        with self._lock:
+            values = self.context_cumulative.get(key)
+            # A copy, so readers never iterate a list another thread is appending to
+            return list(values) if values is not None else None
+    
+    @contextmanager
+    def lock_key(self, key):
+        """
+        Holds a lock dedicated to ``key`` for the duration of the ``with`` block.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.RLock())
+        with key_lock:
+            yield self
+    
+    def compute(self, key, func: callable, default=None):
+        """
+        Atomically replaces the value of ``key`` with ``func(current_value)`` and returns it.
+        """
+        with self.lock_key(key):
+            value = func(self.context.get(key, default))
+            self.set(key, value)
+            return value
+    
+    def fork(self) -> 'Context':
+        """
+        Returns a private copy of this context that can be modified by a parallel branch
+        and later folded back with `merge`. Forking is O(1).
+        """
+        branch = Context()
+        with self._lock:
+            branch.context = self.context.fork()
+            branch.context_cumulative = self.context_cumulative.fork()
+            branch._fork_base = self.context.fork()
+            branch._fork_cumulative_base = self.context_cumulative.fork()
+        return branch
+    
+    def delta(self) -> ContextDelta:
+        """
+        Returns what this fork changed since it was created with `fork`.
+        """
+        if self._fork_base is None:
+            raise ValueError("Only contexts created with `fork` can be merged")
+        delta = ContextDelta()
+        with self._lock:
+            base = self._fork_base
+            for key in self.context.changed_keys(base):
+                value = self.context.get(key, _MISSING)
+                if value is base.get(key, _MISSING):
+                    continue
+                if value is _MISSING:
+                    delta.removed.append(key)
+                else:
+                    delta.values[key] = value
+            cumulative_base = self._fork_cumulative_base
+            for key in self.context_cumulative.changed_keys(cumulative_base):
+                values = self.context_cumulative.get(key, ())
+                appended = values[len(cumulative_base.get(key, ())):]
+                if appended:
+                    delta.appended[key] = appended
+        return delta
+    
+    def apply(self, delta: ContextDelta):
+        """
+        Applies a `ContextDelta`, taken from a fork of this context or loaded from a checkpoint.
+        """
+        with self._lock:
+            for key, value in delta.values.items():
+                self.context[key] = value
+            for key in delta.removed:
+                self.context.pop(key, None)
+            for key, values in delta.appended.items():
+                self.set_cumulative_many(key, values)
+    
+    def merge(self, *branches: 'Context'):
+        """
+        Folds forked branches back into this context.
+
+        Only what a branch changed since it was forked is applied: keys it set (or removed)
+        and values it appended to cumulative keys. Branches are applied in the order given,
+        so when two branches write the same key the later argument wins, independently of
+        which branch finished first.
+        """
+        with self._lock:
+            for branch in branches:
+                self.apply(branch.delta())
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        state["_key_locks"] = {}
+        return state
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
     
     def __str__(self):
-        return f"Context[{self.context}]"
+        return f"Context[{self.context.to_dict()}]"
     def __repr__(self):
         return self.__str__()
 
@@ -60,6 +198,19 @@ class Session:
         self.context.set_cumulative(key, value)
     def get_cumulative(self, key):
         return self.context.get_cumulative(key)
+    def compute(self, key, func: callable, default=None):
+        return self.context.compute(key, func, default=default)
+    
+    def fork(self) -> 'Session':
+        """
+        Returns a session with the same id working on a fork of this session's context.
+        """
+        session = Session.__new__(Session)
+        session.session_id = self.session_id
+        session.context = self.context.fork()
+        return session
+    def merge(self, *sessions: 'Session'):
+        self.context.merge(*[session.context for session in sessions])
             
     def context_as_dict(self) -> dict:
-        return self.context.get_context()
\ No newline at end of file
+        return self.context.get_context().to_dict()
\ No newline at end of file
@@ -5,6 +5,11 @@ from lmflux.core.components import Message, Tool, ToolRequest
 from lmflux.agents.components import AgentRef
 from lmflux.agents.sessions import Session
 from lmflux.utils.signature_checker import check_compatible
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Session the agents of the current call chain are conversing for
+_active_session: ContextVar[Session] = ContextVar("lmflux_active_session", default=None)
 
 
 class Agent(ABC):
@@ -52,12 +57,51 @@ class Agent(ABC):
     def reset_state(self,):
         self.llm.reset_state()
     
-    def conversate(self, message:Message, session: Session) -> Message:
+    def get_conversation(self, session: Session) -> Conversation:
+        """
+        The conversation this agent holds for ``session``: its own one when the session
+        conversed inside a `session_scope` (e.g. through `MeshGraph.query_agent`), the
+        shared conversation otherwise.
+        """
+        conversation = self.llm.conversations.find(session.session_id)
+        if conversation is None:
+            conversation = self.llm.conversations.get(None)
+        return conversation
+    
+    def __on_conversation_update__(self, conversation: Conversation):
+        self.conversation_update_callback(conversation, _active_session.get())
+    
+    def __prepare_llm__(self, session: Session) -> callable:
         tool_callback = lambda tool_call, result: self.tool_callback(tool_call, result, session)
-        conversation_update_callback = lambda conversation: self.conversation_update_callback(conversation, session)
-        self.llm.set_conversation_update_callback(conversation_update_callback)
+        # The LLM is shared by every session, the callback finds its session in the context
+        self.llm.set_conversation_update_callback(self.__on_conversation_update__)
         self.llm.tools = self.get_tools()
-        data = self.llm.chat(message, tool_use_callback=tool_callback)
+        return tool_callback
+    
+    @contextmanager
+    def __session__(self, session: Session):
+        """
+        Makes ``session`` the one the callbacks receive for the duration of the block.
+
+        The conversation is the LLM's shared one, unless the caller opted in to one
+        conversation per session with `session_scope` (as `MeshGraph.query_agent` does).
+        """
+        token = _active_session.set(session)
+        try:
+            yield
+        finally:
+            _active_session.reset(token)
+    
+    def conversate(self, message:Message, session: Session) -> Message:
+        tool_callback = self.__prepare_llm__(session)
+        with self.__session__(session):
+            data = self.llm.chat(message, tool_use_callback=tool_callback)
+        return data
+    
+    async def aconversate(self, message:Message, session: Session) -> Message:
+        tool_callback = self.__prepare_llm__(session)
+        with self.__session__(session):
+            data = await self.llm.achat(message, tool_use_callback=tool_callback)
         return data
     
     def log_agent_step(self, session:Session, step_message: str, messages:list[Message], print_full_message=False):
@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_MISSING = object()
+
+def make_request_fingerprint(model_id: str, messages: list[dict], tools: list[dict] | str, options: dict) -> str:
+    """
+    Stable hash of everything that determines a chat completion request.
+    ``tools`` is either the tool schemas or a hash of them (`ToolRegistry.fingerprint`).
+    """
+    payload = json.dumps(
+        {"model": model_id, "messages": messages, "tools": tools, "options": options},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with optional time-to-live.
+
+    Args:
+    - max_size (int, optional): Maximum number of entries, None means unbounded. Defaults to 1024.
+    - ttl (float, optional): Seconds an entry stays valid, None means forever. Defaults to None.
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None) -> Any:
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.__entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.__lock:
+            self.__entries[key] = (expires_at, value)
+            self.__entries.move_to_end(key)
+            if self.max_size is not None:
+                while len(self.__entries) > self.max_size:
+                    self.__entries.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def __len__(self):
+        return len(self.__entries)
+
+class ResponseCache(ABC):
+    """
+    Storage for chat completion responses keyed by `make_request_fingerprint`.
+    Values are dumped messages (`Message.dump_message()`).
+    """
+    @abstractmethod
+    def get(self, key: str) -> dict: ...
+
+    @abstractmethod
+    def put(self, key: str, value: dict): ...
+
+    @abstractmethod
+    def clear(self): ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    Process local response cache with LRU eviction and optional TTL (seconds).
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = None):
+        self.entries = LRUCache(max_size=max_size, ttl=ttl)
+
+    def get(self, key: str) -> dict:
+        return self.entries.get(key)
+
+    def put(self, key: str, value: dict):
+        self.entries.put(key, value)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    On-disk response cache, it survives between runs of the same pipeline.
+
+    Args:
+    - path (str): Location of the sqlite database file.
+    - ttl (float, optional): Seconds an entry stays valid, None means forever. Defaults to None.
+    - max_size (int, optional): Maximum number of entries, least recently used are evicted first. Defaults to None.
+    """
+    def __init__(self, path: str, ttl: float = None, max_size: int = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> dict:
+        now = time.time()
+        with self.__lock, self.__connection:
+            row = self.__connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and (self.ttl is None or row[1] + self.ttl > now):
+                self.__connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+            if row:
+                self.__connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: dict):
+        now = time.time()
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            if self.ttl is not None:
+                self.__connection.execute("DELETE FROM responses WHERE created_at + ? <= ?", (self.ttl, now))
+            if self.max_size is not None:
+                self.__connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_size,)
+                )
+
+    def clear(self):
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM responses")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            size = self.__connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self):
+        self.__connection.close()
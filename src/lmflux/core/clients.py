@@ -0,0 +1,95 @@
+from lmflux.metaclasses.singleton import Singleton
+from lmflux.logger import PipelinesLogger
+import importlib.util
+import threading
+import openai
+import os
+
+class ClientRegistry(metaclass=Singleton):
+    """
+    Process wide pool of OpenAI clients keyed by base_url and api_key.
+
+    Endpoints that point at the same server share one client, and with it one
+    httpx connection pool (keep-alive sockets, TLS sessions and, optionally, HTTP/2).
+    """
+    def __init__(self,):
+        self.max_connections = 100
+        self.max_keepalive_connections = 20
+        self.keepalive_expiry = 30.0
+        self.http2 = False
+        self.__clients = {}
+        self.__lock = threading.Lock()
+
+    def configure(
+        self, max_connections: int = None, max_keepalive_connections: int = None,
+        keepalive_expiry: float = None, http2: bool = None
+    ):
+        """
+        Sets the connection pool limits used for clients created from now on.
+
+        Args:
+            max_connections (int, optional): Maximum number of concurrent connections per client.
+            max_keepalive_connections (int, optional): Maximum number of idle connections kept alive.
+            keepalive_expiry (float, optional): Seconds an idle connection is kept open.
+            http2 (bool, optional): Negotiate HTTP/2 (requires the `h2` package).
+        """
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            self.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            self.keepalive_expiry = keepalive_expiry
+        if http2 is not None:
+            self.http2 = http2
+
+    def __make_http_client__(self, asynchronous: bool):
+        import httpx
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            PipelinesLogger.get_instance().warn("HTTP/2 requested but the `h2` package is not installed, using HTTP/1.1")
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        if asynchronous:
+            return openai.DefaultAsyncHttpxClient(limits=limits, http2=http2)
+        return openai.DefaultHttpxClient(limits=limits, http2=http2)
+
+    def get_client(self, base_url: str = None, api_key: str = None, asynchronous: bool = False):
+        """
+        Returns the shared client for the given endpoint, creating it on first use.
+
+        Args:
+            base_url (str, optional): Defaults to the OPENAI_API_BASE environment variable.
+            api_key (str, optional): Defaults to the OPENAI_API_KEY environment variable.
+            asynchronous (bool): Return an `openai.AsyncOpenAI` client instead of `openai.OpenAI`.
+        """
+        base_url = base_url or os.environ.get('OPENAI_API_BASE')
+        api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        key = (base_url, api_key, asynchronous)
+        with self.__lock:
+            client = self.__clients.get(key)
+            if client is None:
+                client_class = openai.AsyncOpenAI if asynchronous else openai.OpenAI
+                client = client_class(
+                    base_url=base_url,
+                    api_key=api_key,
+                    http_client=self.__make_http_client__(asynchronous)
+                )
+                self.__clients[key] = client
+            return client
+
+    def clear(self,):
+        """
+        Closes the synchronous clients and forgets every registered client.
+        """
+        with self.__lock:
+            for (_, _, asynchronous), client in self.__clients.items():
+                if not asynchronous:
+                    client.close()
+            self.__clients = {}
+
+    def __len__(self):
+        return len(self.__clients)
@@ -1,8 +1,14 @@
 from lmflux.core.templates import Templates
-import json
+from lmflux.core.tool_validation import compile_validator
+from lmflux.utils import fastjson
+from lmflux.utils.executors import check_executor, run_in_process, arun_in_process
 from dataclasses import dataclass, field
 from typing import Any
 from uuid import uuid4
+import asyncio
+import copy
+import inspect
+import itertools
 import os
 
 ## BASE LLM ##
@@ -13,17 +19,78 @@ class LLMOptions():
     def dict(self):
         return self.__options
 
-@dataclass
+_MESSAGE_ID_PREFIX = uuid4().hex[:12]
+_message_sequence = itertools.count(1)
+
+def _reset_message_ids():
+    global _MESSAGE_ID_PREFIX, _message_sequence
+    _MESSAGE_ID_PREFIX = uuid4().hex[:12]
+    _message_sequence = itertools.count(1)
+
+# Forked workers must not hand out the same ids as their parent
+os.register_at_fork(after_in_child=_reset_message_ids)
+
+def _next_message_id() -> str:
+    return f"{_MESSAGE_ID_PREFIX}-{next(_message_sequence)}"
+
+@dataclass(slots=True, init=False, eq=False)
 class Message:
+    """
+    A single chat message.
+
+    Messages are slotted to keep long conversations compact, and `message_id` is only
+    generated (from a per-process random prefix plus a counter) the first time it is read.
+    """
     role: str
     content: str
-    
-    reasoning_content: str = field(default=None)
-    call_id: str = field(default=None)    
-    tool_calls: list[dict] = field(default=None)
-    name: str = field(default=None)
+    reasoning_content: str
+    call_id: str
+    tool_calls: list[dict]
+    name: str
+    _message_id: str
+
+    def __init__(
+        self, role: str, content: str, reasoning_content: str = None, call_id: str = None,
+        tool_calls: list[dict] = None, name: str = None, message_id: str = None
+    ):
+        self.role = role
+        self.content = content
+        self.reasoning_content = reasoning_content
+        self.call_id = call_id
+        self.tool_calls = tool_calls
+        self.name = name
+        self._message_id = message_id
 
-    message_id: str = field(default_factory=lambda: str(uuid4()))
+    @property
+    def message_id(self) -> str:
+        if self._message_id is None:
+            self._message_id = _next_message_id()
+        return self._message_id
+
+    @message_id.setter
+    def message_id(self, message_id: str):
+        self._message_id = message_id
+
+    def __eq__(self, other):
+        if not isinstance(other, Message):
+            return NotImplemented
+        return self is other or self.message_id == other.message_id
+
+    # Copies keep the identity of the original: the lazy id is generated before copying
+    def __init_args__(self) -> tuple:
+        return (
+            self.role, self.content, self.reasoning_content, self.call_id,
+            self.tool_calls, self.name, self.message_id
+        )
+
+    def __reduce__(self):
+        return (Message, self.__init_args__())
+
+    def __copy__(self):
+        return Message(*self.__init_args__())
+
+    def __deepcopy__(self, memo: dict):
+        return Message(*copy.deepcopy(self.__init_args__(), memo))
 
     def dump_message(self):
         base_data = {"role": self.role, "content": self.content if self.content else ""}
@@ -54,6 +121,20 @@ class Message:
     def __repr__(self):
         return self.__str__()
 
+@dataclass
+class StreamDelta:
+    """
+    A fragment of a streamed completion.
+
+    `kind` is one of `content`, `reasoning` or `tool_call`; tool call fragments carry the
+    index of the call they belong to and, once known, its id and function name.
+    """
+    kind: str
+    content: str
+    tool_call_index: int = None
+    tool_call_id: str = None
+    name: str = None
+
 ## PROMPTS ##
 @dataclass
 class SystemPrompt:
@@ -79,6 +160,8 @@ class TemplatedPrompt:
         return message
     
 ## TOOLS ##
+_NOT_CACHED = object()
+
 @dataclass
 class ToolParam:
     type: str
@@ -126,6 +209,17 @@ class Tool:
     description: str
     root_param: ToolParam
     func: callable
+    # Memoizes results by arguments when set, any object with `get(key, default)` and
+    # `put(key, value)` such as `LRUCache`. Tools may share one cache, keys include the name.
+    cache: Any = None
+    # "process" runs the function in the shared process pool (`lmflux.utils.executors`),
+    # the function and its results must then be picklable.
+    executor: str = None
+
+    def __post_init__(self):
+        check_executor(self.executor)
+        if self.executor == "process" and inspect.iscoroutinefunction(self.func):
+            raise ValueError(f"Tool '{self.name}' is a coroutine and cannot run in a process")
 
     def build_tool_call(self,) -> dict:
         # Auto-caching
@@ -145,22 +239,149 @@ class Tool:
         }
         return self.definition
 
+    def build_validator(self,) -> callable:
+        # Auto-caching, compiled once per tool like the definition
+        if hasattr(self, 'validator'):
+            return self.validator
+        try:
+            parameters = inspect.signature(self.func).parameters.values()
+        except (TypeError, ValueError):
+            parameters = ()
+        allow_extra = any(param.kind == param.VAR_KEYWORD for param in parameters)
+        self.validator = compile_validator(self.root_param, allow_extra=allow_extra)
+        return self.validator
+
+    def invalidate_cache(self):
+        """
+        Drops the cached definition and validator, call it after changing the tool in place.
+        """
+        self.__dict__.pop('definition', None)
+        self.__dict__.pop('validator', None)
+
+    def parse_arguments(self, args_json) -> tuple[dict, str]:
+        """
+        Decodes and validates the arguments sent by the model.
+
+        Returns:
+            tuple[dict, str]: The coerced arguments and None, or None and the error to
+            send back to the model so it can correct the call.
+        """
+        try:
+            args = fastjson.loads(args_json) if args_json else {}
+        except (ValueError, TypeError) as error:
+            return None, fastjson.dumps({
+                "error": "invalid_json", "tool": self.name, "message": str(error)
+            })
+        args, errors = self.build_validator()(args)
+        if errors:
+            return None, fastjson.dumps({
+                "error": "invalid_arguments", "tool": self.name, "details": errors
+            })
+        return args, None
+
+    def cache_key(self, args: dict) -> str:
+        """
+        The tool name plus the canonical JSON of the (validated) arguments.
+        """
+        return f"{self.name}:{fastjson.dumps(args, sort_keys=True)}"
+
     def get_call_response(self, args_json) -> dict[str, str]:
-        args = json.loads(args_json)
-        return self.func(**args)
+        args, error = self.parse_arguments(args_json)
+        if error is not None:
+            return error
+        if self.cache is not None:
+            key = self.cache_key(args)
+            result = self.cache.get(key, _NOT_CACHED)
+            if result is not _NOT_CACHED:
+                return result
+        if self.executor == "process":
+            result = run_in_process(self.func, **args)
+        else:
+            result = self.func(**args)
+        if inspect.iscoroutine(result):
+            # Coroutine tools called from a synchronous endpoint
+            result = asyncio.run(result)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    async def aget_call_response(self, args_json) -> dict[str, str]:
+        args, error = self.parse_arguments(args_json)
+        if error is not None:
+            return error
+        if self.cache is not None:
+            key = self.cache_key(args)
+            result = self.cache.get(key, _NOT_CACHED)
+            if result is not _NOT_CACHED:
+                return result
+        if self.executor == "process":
+            result = await arun_in_process(self.func, **args)
+        elif inspect.iscoroutinefunction(self.func):
+            result = await self.func(**args)
+        else:
+            # Blocking tools must not stall the event loop
+            result = await asyncio.to_thread(self.func, **args)
+            if inspect.isawaitable(result):
+                result = await result
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
     
 @dataclass
 class Conversation:
     messages: list[Message]
+    # Append-only cache of `dump_message()` results, one entry per leading message.
+    _dump_cache: list[dict] = field(default_factory=list, init=False, repr=False, compare=False)
+    _last_dumped: Message = field(default=None, init=False, repr=False, compare=False)
     
     def add_message(self, message: Message):
         self.messages.append(message)        
     
+    def invalidate_cache(self):
+        """
+        Drops the serialization cache. Call it after mutating `messages` (or a message) in place.
+        """
+        self._dump_cache = []
+        self._last_dumped = None
+    
+    def __cache_is_valid__(self) -> bool:
+        cached = len(self._dump_cache)
+        # Cheap staleness check: the cached prefix must still end with the last dumped message.
+        return not cached or (cached <= len(self.messages) and self.messages[cached-1] is self._last_dumped)
+    
     def dump_conversation(self):
-        return [
-            message.dump_message()
-            for message in self.messages
-        ]
+        if not self.__cache_is_valid__():
+            self.invalidate_cache()
+        cache = self._dump_cache
+        for index in range(len(cache), len(self.messages)):
+            cache.append(self.messages[index].dump_message())
+        if cache:
+            self._last_dumped = self.messages[len(cache)-1]
+        return list(cache)
+    
+    def replace_messages(self, messages: list[Message]):
+        """
+        Swaps the message list, reusing the cached dumps of the messages that are kept.
+        """
+        dumped = {}
+        if self.__cache_is_valid__():
+            dumped = {id(message): dump for message, dump in zip(self.messages, self._dump_cache)}
+        self.messages = list(messages)
+        self.invalidate_cache()
+        for message in self.messages:
+            dump = dumped.get(id(message))
+            if dump is None:
+                break
+            self._dump_cache.append(dump)
+            self._last_dumped = message
+    
+    def __setitem__(self, index: int | slice, value):
+        self.messages[index] = value
+        self.invalidate_cache()
+    
+    def __delitem__(self, index: int | slice):
+        del self.messages[index]
+        self.invalidate_cache()
     
     def __len__(self):
         return len(self.messages)
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+import json
+import math
+
+from lmflux.core.components import Message, Conversation
+
+if TYPE_CHECKING:
+    from lmflux.core.llms import LLMModel
+
+SUMMARY_MESSAGE_NAME = "conversation_summary"
+DEFAULT_SUMMARY_PROMPT = (
+    "Summarize the conversation below. Keep every fact, decision, open question and "
+    "tool result that later turns could depend on. Answer with the summary only.\n\n"
+)
+
+def estimate_tokens(message: Message) -> int:
+    """
+    Cheap token estimate for a message: roughly 4 characters per token plus a fixed
+    per-message overhead for the role and formatting.
+
+    Pass your own estimator (e.g. built on a real tokenizer) to the strategies for exact counts.
+    """
+    chars = len(message.content or "") + len(message.reasoning_content or "")
+    if message.tool_calls:
+        chars += len(json.dumps(message.tool_calls))
+    return math.ceil(chars / 4) + 4
+
+def group_turns(messages: list[Message]) -> list[list[Message]]:
+    """
+    Groups messages so that tool results always stay with the message that requested them.
+    Providers reject a tool result whose tool call is no longer in the context.
+    """
+    groups = []
+    for message in messages:
+        if message.call_id and groups:
+            groups[-1].append(message)
+        else:
+            groups.append([message])
+    return groups
+
+def split_system(messages: list[Message]) -> tuple[list[Message], list[Message]]:
+    """
+    Splits the leading system messages (system prompt and summaries) from the rest of the conversation.
+    """
+    index = 0
+    while index < len(messages) and messages[index].role == "system":
+        index += 1
+    return list(messages[:index]), list(messages[index:])
+
+class ContextWindowStrategy(ABC):
+    """
+    Decides which messages of a conversation are kept before each `LLMModel.chat` call.
+
+    Args:
+    - max_tokens (int, optional): Token budget for the whole conversation.
+    - estimator (callable, optional): Function `Message -> int` used to count tokens.
+    """
+    def __init__(self, max_tokens: int = None, estimator: callable = estimate_tokens):
+        self.max_tokens = max_tokens
+        self.estimator = estimator
+
+    def count_tokens(self, messages: list[Message]) -> int:
+        return sum(self.estimator(message) for message in messages)
+
+    def fit_newest(self, groups: list[list[Message]], budget: int) -> list[list[Message]]:
+        """
+        Keeps the newest groups that fit in `budget`; the latest group is always kept.
+        """
+        kept = []
+        used = 0
+        for group in reversed(groups):
+            tokens = self.count_tokens(group)
+            if kept and used + tokens > budget:
+                break
+            kept.append(group)
+            used += tokens
+        kept.reverse()
+        return kept
+
+    @abstractmethod
+    def select(self, messages: list[Message]) -> list[Message]:
+        """
+        Returns the messages to keep, in order.
+        """
+        ...
+
+    def apply(self, conversation: Conversation):
+        kept = self.select(conversation.messages)
+        if len(kept) != len(conversation) or any(a is not b for a, b in zip(kept, conversation)):
+            conversation.replace_messages(kept)
+
+class SlidingWindowStrategy(ContextWindowStrategy):
+    """
+    Keeps the most recent turns that fit in `max_tokens`.
+
+    Args:
+    - max_tokens (int): Token budget for the whole conversation.
+    - estimator (callable, optional): Function `Message -> int` used to count tokens.
+    - keep_system (bool, optional): Pin the leading system messages. Defaults to True.
+    """
+    def __init__(self, max_tokens: int, estimator: callable = estimate_tokens, keep_system: bool = True):
+        super().__init__(max_tokens=max_tokens, estimator=estimator)
+        self.keep_system = keep_system
+
+    def select(self, messages: list[Message]) -> list[Message]:
+        if self.count_tokens(messages) <= self.max_tokens:
+            return list(messages)
+        pinned, rest = split_system(messages) if self.keep_system else ([], list(messages))
+        budget = self.max_tokens - self.count_tokens(pinned)
+        kept = self.fit_newest(group_turns(rest), budget)
+        return pinned + [message for group in kept for message in group]
+
+class KeepSystemAndLastNStrategy(ContextWindowStrategy):
+    """
+    Keeps the leading system messages plus (about) the last `last_n` messages.
+
+    The cut is moved forward when it would separate tool results from their tool call,
+    and `max_tokens`, when given, is applied on top of the message count.
+    """
+    def __init__(self, last_n: int, max_tokens: int = None, estimator: callable = estimate_tokens):
+        super().__init__(max_tokens=max_tokens, estimator=estimator)
+        self.last_n = last_n
+
+    def select(self, messages: list[Message]) -> list[Message]:
+        pinned, rest = split_system(messages)
+        kept_groups = []
+        kept = 0
+        for group in reversed(group_turns(rest)):
+            if kept + len(group) > self.last_n and kept_groups:
+                break
+            kept_groups.append(group)
+            kept += len(group)
+        kept_groups.reverse()
+        if self.max_tokens is not None:
+            kept_groups = self.fit_newest(kept_groups, self.max_tokens - self.count_tokens(pinned))
+        return pinned + [message for group in kept_groups for message in group]
+
+class SummarizingStrategy(ContextWindowStrategy):
+    """
+    Replaces older turns with a summary written by a secondary model once `max_tokens` is exceeded.
+
+    Args:
+    - summarizer (LLMModel): Model used to write the summary, its state is reset before each summary.
+    - max_tokens (int): Token budget for the whole conversation.
+    - keep_recent_tokens (int, optional): Budget of recent turns kept verbatim. Defaults to half of `max_tokens`.
+    - estimator (callable, optional): Function `Message -> int` used to count tokens.
+    - prompt (str, optional): Instruction prepended to the transcript sent to the summarizer.
+    """
+    def __init__(
+        self, summarizer: 'LLMModel', max_tokens: int, keep_recent_tokens: int = None,
+        estimator: callable = estimate_tokens, prompt: str = DEFAULT_SUMMARY_PROMPT
+    ):
+        super().__init__(max_tokens=max_tokens, estimator=estimator)
+        self.summarizer = summarizer
+        self.keep_recent_tokens = keep_recent_tokens if keep_recent_tokens is not None else max_tokens // 2
+        self.prompt = prompt
+
+    def __format_transcript__(self, messages: list[Message]) -> str:
+        lines = []
+        for message in messages:
+            if message.name == SUMMARY_MESSAGE_NAME:
+                lines.append(f"(summary of earlier turns): {message.content}")
+            elif message.tool_calls:
+                lines.append(f"{message.role}: {message.content or ''} [tool calls: {json.dumps(message.tool_calls)}]")
+            else:
+                lines.append(f"{message.role}: {message.content or ''}")
+        return "\n".join(lines)
+
+    def summarize(self, messages: list[Message]) -> Message:
+        self.summarizer.reset_state()
+        response = self.summarizer.chat(
+            Message("user", self.prompt + self.__format_transcript__(messages))
+        )
+        return Message(
+            "system", f"Summary of the earlier conversation:\n{response.content}",
+            name=SUMMARY_MESSAGE_NAME
+        )
+
+    def select(self, messages: list[Message]) -> list[Message]:
+        if self.count_tokens(messages) <= self.max_tokens:
+            return list(messages)
+        leading, rest = split_system(messages)
+        pinned = [message for message in leading if message.name != SUMMARY_MESSAGE_NAME]
+        previous_summaries = [message for message in leading if message.name == SUMMARY_MESSAGE_NAME]
+        groups = group_turns(rest)
+        recent = self.fit_newest(groups, self.keep_recent_tokens)
+        older = [message for group in groups[:len(groups)-len(recent)] for message in group]
+        if not older:
+            return list(messages)
+        summary = self.summarize(previous_summaries + older)
+        return pinned + [summary] + [message for group in recent for message in group]
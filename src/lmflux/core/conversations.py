@@ -0,0 +1,86 @@
+from lmflux.core.components import Conversation
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+
+_current_session_id: ContextVar[str] = ContextVar("lmflux_session_id", default=None)
+
+def current_session_id() -> str:
+    """
+    Id of the session the running code works for, None outside of any session.
+    """
+    return _current_session_id.get()
+
+@contextmanager
+def session_scope(session_id: str):
+    """
+    Makes ``session_id`` the current session for the duration of the ``with`` block.
+
+    The value is a context variable: it follows asyncio tasks, ``asyncio.to_thread`` and
+    work submitted with ``contextvars.copy_context().run``.
+    """
+    token = _current_session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _current_session_id.reset(token)
+
+class ConversationStore:
+    """
+    The conversations of one `LLMModel`, one per session id.
+
+    A single model instance (and its client) can serve many sessions at once, each
+    session sees its own conversation. The ``None`` key holds the conversation used
+    outside of any `session_scope`, which is where agents converse unless a caller opts
+    in to per-session conversations. Scoped conversations are kept until `drop`.
+
+    Args:
+    - factory (callable): Builds the starting conversation of a new session.
+    """
+    def __init__(self, factory: callable):
+        self.factory = factory
+        self.__conversations = {}
+        self.__lock = threading.Lock()
+
+    def get(self, session_id: str = None) -> Conversation:
+        conversation = self.__conversations.get(session_id)
+        if conversation is None:
+            with self.__lock:
+                conversation = self.__conversations.get(session_id)
+                if conversation is None:
+                    conversation = self.__conversations[session_id] = self.factory()
+        return conversation
+
+    def find(self, session_id: str = None) -> Conversation:
+        """
+        The conversation of ``session_id``, None when the session has none yet.
+        """
+        return self.__conversations.get(session_id)
+
+    def set(self, conversation: Conversation, session_id: str = None):
+        with self.__lock:
+            self.__conversations[session_id] = conversation
+
+    def reset(self, session_id: str = None):
+        """
+        Starts the conversation of ``session_id`` over.
+        """
+        self.set(self.factory(), session_id)
+
+    def drop(self, session_id: str):
+        """
+        Forgets the conversation of a finished session.
+        """
+        with self.__lock:
+            self.__conversations.pop(session_id, None)
+
+    def session_ids(self) -> list[str]:
+        with self.__lock:
+            return list(self.__conversations)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.__conversations
+
+    def __len__(self):
+        return len(self.__conversations)
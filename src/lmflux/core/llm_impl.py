@@ -1,5 +1,11 @@
 from lmflux.core.llms import LLMModel
-from lmflux.core.components import (SystemPrompt, LLMOptions, Message, Conversation, ToolRequest)
+from lmflux.core.components import (SystemPrompt, LLMOptions, Message, Conversation, ToolRequest, Tool, StreamDelta)
+from lmflux.core.cache import ResponseCache, make_request_fingerprint
+from lmflux.core.policies import ExecutionPolicy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import asyncio
+import contextvars
 import openai
 import os
 
@@ -10,44 +16,109 @@ class EchoLLM(LLMModel):
     def __chat_endpoint__(self, tool_use_callback:callable) -> list[Message]:
         return [self.conversation[-1]]
 
+@dataclass
+class _FunctionCall:
+    name: str = ""
+    arguments: str = ""
+
+@dataclass
+class _ToolCall:
+    # Mirrors the attributes of the OpenAI tool call objects used by `__call_function__`
+    id: str = None
+    function: _FunctionCall = field(default_factory=_FunctionCall)
+    type: str = "function"
+
+class _StreamAccumulator:
+    """
+    Rebuilds a full assistant message out of streamed chunks.
+    """
+    def __init__(self):
+        self.role = "assistant"
+        self.content = []
+        self.reasoning_content = []
+        self.tool_calls: dict[int, _ToolCall] = {}
+
+    def add_chunk(self, chunk) -> list[StreamDelta]:
+        deltas = []
+        if not chunk.choices:
+            return deltas
+        delta = chunk.choices[0].delta
+        if getattr(delta, 'role', None):
+            self.role = delta.role
+        reasoning = getattr(delta, 'reasoning_content', None)
+        if reasoning:
+            self.reasoning_content.append(reasoning)
+            deltas.append(StreamDelta("reasoning", reasoning))
+        if delta.content:
+            self.content.append(delta.content)
+            deltas.append(StreamDelta("content", delta.content))
+        for fragment in (getattr(delta, 'tool_calls', None) or []):
+            tool_call = self.tool_calls.setdefault(fragment.index, _ToolCall())
+            if fragment.id:
+                tool_call.id = fragment.id
+            function = fragment.function
+            if function is not None:
+                if function.name:
+                    tool_call.function.name += function.name
+                if function.arguments:
+                    tool_call.function.arguments += function.arguments
+            deltas.append(StreamDelta(
+                "tool_call", 
+                (function.arguments if function is not None else None) or "",
+                tool_call_index=fragment.index,
+                tool_call_id=tool_call.id,
+                name=tool_call.function.name
+            ))
+        return deltas
+
+    def get_tool_calls(self) -> list[_ToolCall]:
+        return [self.tool_calls[index] for index in sorted(self.tool_calls)]
+
 class OpenAICompatibleEndpoint(LLMModel):
-    def __init__(self, model_id:str, system_prompt:SystemPrompt, options:LLMOptions=None, include_tool_name:bool=True, tool_response_role="tool"):
+    def __init__(
+        self, model_id:str, system_prompt:SystemPrompt, options:LLMOptions=None, 
+        include_tool_name:bool=True, tool_response_role="tool",
+        parallel_tool_calls:bool=False, max_tool_workers:int=4, stream:bool=False,
+        response_cache:ResponseCache=None, client:openai.OpenAI=None,
+        policy:ExecutionPolicy=None
+    ):
         super().__init__(model_id=model_id, system_prompt=system_prompt, options=options)
+        self.stream = stream
+        self.response_cache = response_cache
+        # Timeout / retry / hedging / circuit breaking around each completion request
+        self.policy = policy
 
-        self.client = openai.OpenAI(
+        # A shared client (see `ClientRegistry`) lets endpoints reuse the same connection pool
+        self.client = client if client is not None else openai.OpenAI(
             base_url=os.environ.get('OPENAI_API_BASE'),
             api_key=os.environ.get('OPENAI_API_KEY'),
         )
         self.include_tool_name = include_tool_name
         self.tool_response_role = tool_response_role
-        self.last_len_tools = 0
         self.compiled_tools = None
+        self.set_parallel_tool_calls(parallel_tool_calls, max_tool_workers)
+
+    def set_parallel_tool_calls(self, enabled:bool=True, max_workers:int=4):
+        """
+        Toggle concurrent dispatch of the tool calls returned in a single turn.
+
+        Args:
+        - enabled (bool): When True, tool calls of the same turn run on a bounded thread pool.
+        - max_workers (int): Upper bound of threads used per turn.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.parallel_tool_calls = enabled
+        self.max_tool_workers = max_workers
 
     def __compile_tools__(self,):
-        if self.last_len_tools == len(self.tools):
-            return
-        if len(self.tools) == 0:
-            self.compiled_tools = None
-        self.compiled_tools = [
-            tool.build_tool_call()
-            for tool in self.tools
-        ]
-        self.last_len_tools = len(self.tools)
+        # Cached by the registry, only rebuilt after the tools change
+        self.compiled_tools = self.tools.compile()
     
-    def __call_function__(self, tool_request:ToolRequest, tool_use_callback:callable) -> Message:
-        tool_call = tool_request.raw_tool_call
-        tool_call_id = tool_call.id
-        function_name = tool_call.function.name
-        args = tool_call.function.arguments
-        result = None
-        for tool in self.tools:
-            if tool.name == function_name:
-                result = tool.get_call_response(args)
-                break
-        if not result:
-            result = "[ERROR] - Tool not found"
-        if tool_use_callback:
-            tool_use_callback(tool_request, result)
+    def __find_tool__(self, function_name:str) -> Tool:
+        return self.tools.get(function_name)
+
+    def __make_tool_message__(self, tool_call_id:str, function_name:str, result) -> Message:
         if self.include_tool_name:
             return Message(
                 role=self.tool_response_role, 
@@ -61,7 +132,42 @@ class OpenAICompatibleEndpoint(LLMModel):
                 content=str(result),
                 call_id=tool_call_id
             )
+
+    def __call_function__(self, tool_request:ToolRequest, tool_use_callback:callable) -> Message:
+        tool_call = tool_request.raw_tool_call
+        tool_call_id = tool_call.id
+        function_name = tool_call.function.name
+        args = tool_call.function.arguments
+        tool = self.__find_tool__(function_name)
+        if tool is None:
+            result = "[ERROR] - Tool not found"
+        else:
+            result = tool.get_call_response(args)
+        if tool_use_callback:
+            tool_use_callback(tool_request, result)
+        return self.__make_tool_message__(tool_call_id, function_name, result)
     
+    def __call_functions__(self, tool_requests:list[ToolRequest], tool_use_callback:callable) -> list[Message]:
+        # Results always come back in the order the model emitted the calls,
+        # no matter which one finishes first.
+        if not self.parallel_tool_calls or len(tool_requests) < 2:
+            return [
+                self.__call_function__(tool_request, tool_use_callback)
+                for tool_request in tool_requests
+            ]
+        max_workers = min(self.max_tool_workers, len(tool_requests))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each call runs in a copy of the caller's context, so context variables
+            # (e.g. the mesh delegation chain) follow the call onto the worker thread
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self.__call_function__, tool_request, tool_use_callback
+                )
+                for tool_request in tool_requests
+            ]
+            return [future.result() for future in futures]
+
     def __parse_tool_call__(self, tool_calls):
         if tool_calls:
             return [{
@@ -73,6 +179,102 @@ class OpenAICompatibleEndpoint(LLMModel):
                 }
             } for tool_call in tool_calls]
         return None
+    
+    def __parse_completion__(self, chat_completion) -> tuple[Message, list]:
+        """
+        Turns a chat completion into a `Message` plus the raw tool calls (if any) the model requested.
+        """
+        raw_message = chat_completion.choices[0].message
+        reasoning_content = raw_message.reasoning_content if hasattr(raw_message, 'reasoning_content') else None
+        message = Message(
+            raw_message.role, 
+            content=raw_message.content,
+            reasoning_content=reasoning_content,
+            tool_calls = self.__parse_tool_call__(raw_message.tool_calls)   
+        )
+        return message, raw_message.tool_calls
+    
+    def __emit_deltas__(self, deltas:list[StreamDelta]):
+        if self.stream_callback:
+            for delta in deltas:
+                self.stream_callback(delta)
+    
+    def __parse_stream__(self, accumulator:_StreamAccumulator) -> tuple[Message, list]:
+        tool_calls = accumulator.get_tool_calls()
+        message = Message(
+            accumulator.role,
+            content="".join(accumulator.content) or None,
+            reasoning_content="".join(accumulator.reasoning_content) or None,
+            tool_calls=self.__parse_tool_call__(tool_calls)
+        )
+        return message, tool_calls
+    
+    def __request_fingerprint__(self, messages:list[dict]) -> str:
+        # The registry content hash stands for the tool schemas, they are not serialized again
+        return make_request_fingerprint(self.model_id, messages, self.tools.fingerprint, self.options.dict())
+    
+    def __load_cached_completion__(self, data:dict) -> tuple[Message, list]:
+        tool_calls = [
+            _ToolCall(id=tool_call["id"], function=_FunctionCall(**tool_call["function"]))
+            for tool_call in data.get("tool_calls") or []
+        ]
+        message = Message(
+            data["role"],
+            content=data.get("content") or None,
+            reasoning_content=data.get("reasoning_content"),
+            tool_calls=self.__parse_tool_call__(tool_calls)
+        )
+        if self.stream:
+            # Keep streaming consumers fed even when the network is skipped
+            if message.reasoning_content:
+                self.__emit_deltas__([StreamDelta("reasoning", message.reasoning_content)])
+            if message.content:
+                self.__emit_deltas__([StreamDelta("content", message.content)])
+        return message, tool_calls
+    
+    def __buffers_stream__(self) -> bool:
+        # Timeouts and hedging can leave several attempts streaming at once, their deltas are
+        # held back per attempt and only the winning attempt's are emitted
+        return self.stream and (self.policy.timeout is not None or self.policy.hedge_after is not None)
+
+    def __guarded_completion__(self, messages:list[dict]) -> tuple[Message, list]:
+        if self.policy is None:
+            return self.__create_completion__(messages)
+        if not self.__buffers_stream__():
+            return self.policy.execute(self.__create_completion__, messages)
+        def attempt(messages:list[dict]):
+            deltas = []
+            return self.__create_completion__(messages, deltas.extend), deltas
+        completion, deltas = self.policy.execute(attempt, messages)
+        self.__emit_deltas__(deltas)
+        return completion
+    
+    def __request_completion__(self, messages:list[dict]) -> tuple[Message, list]:
+        if self.response_cache is None:
+            return self.__guarded_completion__(messages)
+        key = self.__request_fingerprint__(messages)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return self.__load_cached_completion__(cached)
+        message, tool_calls = self.__guarded_completion__(messages)
+        self.response_cache.put(key, message.dump_message())
+        return message, tool_calls
+    
+    def __create_completion__(self, messages:list[dict], emit:callable=None) -> tuple[Message, list]:
+        chat_completion = self.client.chat.completions.create(
+            model=self.model_id,
+            messages=messages,
+            tools=self.compiled_tools,
+            stream=self.stream,
+            **self.options.dict()
+        )
+        if not self.stream:
+            return self.__parse_completion__(chat_completion)
+        emit = emit or self.__emit_deltas__
+        accumulator = _StreamAccumulator()
+        for chunk in chat_completion:
+            emit(accumulator.add_chunk(chunk))
+        return self.__parse_stream__(accumulator)
         
     def __chat_endpoint__(self, tool_use_callback:callable, max_turns=3) -> list[Message]:
         accum_messages = Conversation([])
@@ -83,40 +285,138 @@ class OpenAICompatibleEndpoint(LLMModel):
             num_turns += 1
             tool_called = False
             accum_dump = accum_messages.dump_conversation()
-            chat_completion = self.client.chat.completions.create(
-                model=self.model_id,
-                messages=conversation_dump+accum_dump,
-                tools=self.compiled_tools,
-                **self.options.dict()
-            )
-            message = chat_completion.choices[0].message
-            reasoning_content = message.reasoning_content if hasattr(message, 'reasoning_content') else None
-            message = Message(
-                message.role, 
-                content=message.content,
-                reasoning_content=reasoning_content,
-                tool_calls = self.__parse_tool_call__(message.tool_calls)   
-            )
+            message, tool_calls = self.__request_completion__(conversation_dump+accum_dump)
             accum_messages.add_message(
                 message
             )
-            if chat_completion.choices[0].message.tool_calls:
-                for tool_call in chat_completion.choices[0].message.tool_calls:
-                    accum_messages.add_message(
-                        self.__call_function__(
-                            ToolRequest(
-                                message,
-                                raw_tool_call=tool_call
-                            ), 
-                            tool_use_callback
-                        )
-                    )
-                    tool_called = True
+            if tool_calls:
+                tool_requests = [
+                    ToolRequest(message, raw_tool_call=tool_call)
+                    for tool_call in tool_calls
+                ]
+                for tool_message in self.__call_functions__(tool_requests, tool_use_callback):
+                    accum_messages.add_message(tool_message)
+                tool_called = True
             if not tool_called:
                 break
             if (num_turns > max_turns):
                 raise ValueError("Max turns exceeded when calling tools")
         return accum_messages.messages
+
+class AsyncOpenAICompatibleEndpoint(OpenAICompatibleEndpoint):
+    """
+    OpenAI compatible endpoint with a native asyncio path built on `openai.AsyncOpenAI`.
+
+    `achat` (and `Agent.aconversate`) await the completion and run the tool calls of a turn
+    concurrently on the event loop, so many sessions can share a single loop.
+    The blocking `chat` path keeps working through the inherited synchronous client.
+    """
+    def __init__(
+        self, model_id:str, system_prompt:SystemPrompt, options:LLMOptions=None, 
+        include_tool_name:bool=True, tool_response_role="tool",
+        parallel_tool_calls:bool=True, max_tool_workers:int=4, stream:bool=False,
+        response_cache:ResponseCache=None, client:openai.OpenAI=None,
+        async_client:openai.AsyncOpenAI=None, policy:ExecutionPolicy=None
+    ):
+        super().__init__(
+            model_id=model_id, system_prompt=system_prompt, options=options,
+            include_tool_name=include_tool_name, tool_response_role=tool_response_role,
+            parallel_tool_calls=parallel_tool_calls, max_tool_workers=max_tool_workers,
+            stream=stream, response_cache=response_cache, client=client, policy=policy
+        )
+        self.async_client = async_client if async_client is not None else openai.AsyncOpenAI(
+            base_url=os.environ.get('OPENAI_API_BASE'),
+            api_key=os.environ.get('OPENAI_API_KEY'),
+        )
+
+    async def __acall_function__(self, tool_request:ToolRequest, tool_use_callback:callable) -> Message:
+        tool_call = tool_request.raw_tool_call
+        function_name = tool_call.function.name
+        tool = self.__find_tool__(function_name)
+        if tool is None:
+            result = "[ERROR] - Tool not found"
+        else:
+            result = await tool.aget_call_response(tool_call.function.arguments)
+        if tool_use_callback:
+            tool_use_callback(tool_request, result)
+        return self.__make_tool_message__(tool_call.id, function_name, result)
+
+    async def __acall_functions__(self, tool_requests:list[ToolRequest], tool_use_callback:callable) -> list[Message]:
+        if not self.parallel_tool_calls or len(tool_requests) < 2:
+            return [
+                await self.__acall_function__(tool_request, tool_use_callback)
+                for tool_request in tool_requests
+            ]
+        semaphore = asyncio.Semaphore(self.max_tool_workers)
+        async def bounded_call(tool_request:ToolRequest) -> Message:
+            async with semaphore:
+                return await self.__acall_function__(tool_request, tool_use_callback)
+        # gather keeps the order of the requests
+        return await asyncio.gather(*[
+            bounded_call(tool_request)
+            for tool_request in tool_requests
+        ])
+
+    async def __aguarded_completion__(self, messages:list[dict]) -> tuple[Message, list]:
+        if self.policy is None:
+            return await self.__acreate_completion__(messages)
+        if not self.__buffers_stream__():
+            return await self.policy.aexecute(self.__acreate_completion__, messages)
+        async def attempt(messages:list[dict]):
+            deltas = []
+            return await self.__acreate_completion__(messages, deltas.extend), deltas
+        completion, deltas = await self.policy.aexecute(attempt, messages)
+        self.__emit_deltas__(deltas)
+        return completion
+
+    async def __arequest_completion__(self, messages:list[dict]) -> tuple[Message, list]:
+        if self.response_cache is None:
+            return await self.__aguarded_completion__(messages)
+        key = self.__request_fingerprint__(messages)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return self.__load_cached_completion__(cached)
+        message, tool_calls = await self.__aguarded_completion__(messages)
+        self.response_cache.put(key, message.dump_message())
+        return message, tool_calls
+
+    async def __acreate_completion__(self, messages:list[dict], emit:callable=None) -> tuple[Message, list]:
+        chat_completion = await self.async_client.chat.completions.create(
+            model=self.model_id,
+            messages=messages,
+            tools=self.compiled_tools,
+            stream=self.stream,
+            **self.options.dict()
+        )
+        if not self.stream:
+            return self.__parse_completion__(chat_completion)
+        emit = emit or self.__emit_deltas__
+        accumulator = _StreamAccumulator()
+        async for chunk in chat_completion:
+            emit(accumulator.add_chunk(chunk))
+        return self.__parse_stream__(accumulator)
+
+    async def __achat_endpoint__(self, tool_use_callback:callable, max_turns=3) -> list[Message]:
+        accum_messages = Conversation([])
+        conversation_dump = self.conversation.dump_conversation()
+        num_turns = 0
+        self.__compile_tools__()
+        while(True):
+            num_turns += 1
+            accum_dump = accum_messages.dump_conversation()
+            message, tool_calls = await self.__arequest_completion__(conversation_dump+accum_dump)
+            accum_messages.add_message(message)
+            if not tool_calls:
+                break
+            tool_requests = [
+                ToolRequest(message, raw_tool_call=tool_call)
+                for tool_call in tool_calls
+            ]
+            for tool_message in await self.__acall_functions__(tool_requests, tool_use_callback):
+                accum_messages.add_message(tool_message)
+            if (num_turns > max_turns):
+                raise ValueError("Max turns exceeded when calling tools")
+        return accum_messages.messages
     
 class NamedOAICompatible(OpenAICompatibleEndpoint):
     def __init__(self, model_id, system_prompt:SystemPrompt, options:LLMOptions=None):
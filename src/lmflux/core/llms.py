@@ -1,38 +1,103 @@
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
+import asyncio
 from lmflux.core.components import (Message, LLMOptions, SystemPrompt, Conversation, Tool)
+from lmflux.core.context_window import ContextWindowStrategy
+from lmflux.core.conversations import ConversationStore, current_session_id
+from lmflux.core.tool_registry import ToolRegistry
 
 class LLMModel(ABC):
     def __init__(self, system_prompt:SystemPrompt, model_id:str, options:LLMOptions):
         self.model_id = model_id
         self.options = options
         self.system_prompt = system_prompt
-        self.tools = []
-        self.reset_state()
+        self.tool_registry = ToolRegistry()
+        # One conversation per session id, see `lmflux.core.conversations.session_scope`
+        self.conversations = ConversationStore(self.__new_conversation__)
         self.conversation_update_callback = None
+        self.stream_callback = None
+        self.context_window = None
         if self.options is None:
             self.options = LLMOptions()
     
     def set_conversation_update_callback(self, callback: callable):
         self.conversation_update_callback = callback
     
+    def set_stream_callback(self, callback: callable):
+        """
+        Registers a callable that receives every `StreamDelta` of streaming endpoints.
+        """
+        self.stream_callback = callback
+    
+    def set_context_window(self, strategy: ContextWindowStrategy):
+        """
+        Caps the conversation sent on every `chat` call using the given strategy (None disables it).
+        """
+        self.context_window = strategy
+    
+    def __new_conversation__(self,) -> Conversation:
+        return Conversation(messages=[self.system_prompt.get_message()])
+    
+    @property
+    def conversation(self) -> Conversation:
+        """
+        The conversation of the current session.
+        """
+        return self.conversations.get(current_session_id())
+    
+    @conversation.setter
+    def conversation(self, conversation: Conversation):
+        self.conversations.set(conversation, current_session_id())
+    
     def reset_state(self,):
-        self.conversation = Conversation(messages=[self.system_prompt.get_message()])
+        self.conversations.reset(current_session_id())
+    
+    @property
+    def tools(self) -> ToolRegistry:
+        return self.tool_registry
+    
+    @tools.setter
+    def tools(self, tools: list[Tool]):
+        # Re-assigning the same tools is a no-op, nothing gets recompiled
+        self.tool_registry.replace(tools)
     
     def add_tool(self, tool:Tool):
-        self.tools.append(tool)
+        self.tool_registry.add(tool)
         
     def add_tools(self, tools: list[Tool]):
-        self.tools += tools
+        self.tool_registry.add_many(tools)
     
     @abstractmethod
     def __chat_endpoint__(self, tool_use_callback:callable) -> Message: pass
     
-    def chat(self, msg: Message, tool_use_callback:callable=None):
-        self.conversation.add_message(msg)
-        response = self.__chat_endpoint__(tool_use_callback)
+    async def __achat_endpoint__(self, tool_use_callback:callable) -> list[Message]:
+        # Models without a native async backend run the blocking endpoint off the event loop.
+        return await asyncio.to_thread(self.__chat_endpoint__, tool_use_callback)
+    
+    def __add_response__(self, response: list[Message]) -> Message:
+        conversation = self.conversation
         for message in response:
-            self.conversation.add_message(message)
+            conversation.add_message(message)
         if self.conversation_update_callback:
-            self.conversation_update_callback(self.conversation)
+            self.conversation_update_callback(conversation)
         return response[-1]
+    
+    def chat(self, msg: Message, tool_use_callback:callable=None):
+        conversation = self.conversation
+        conversation.add_message(msg)
+        if self.context_window:
+            self.context_window.apply(conversation)
+        response = self.__chat_endpoint__(tool_use_callback)
+        return self.__add_response__(response)
+    
+    async def achat(self, msg: Message, tool_use_callback:callable=None):
+        """
+        Async counterpart of `chat`, it awaits `__achat_endpoint__` instead of blocking the calling thread.
+        """
+        conversation = self.conversation
+        conversation.add_message(msg)
+        if self.context_window:
+            # Strategies may call a summarizer model, keep that off the event loop
+            await asyncio.to_thread(self.context_window.apply, conversation)
+        response = await self.__achat_endpoint__(tool_use_callback)
+        return self.__add_response__(response)
@@ -0,0 +1,222 @@
+from dataclasses import dataclass
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open.
+    """
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with jitter.
+
+    Args:
+    - max_attempts (int): Total number of attempts, including the first one.
+    - initial_delay (float): Seconds to wait before the second attempt.
+    - max_delay (float): Upper bound of the wait between two attempts.
+    - multiplier (float): Growth factor of the wait after each failed attempt.
+    - jitter (float): Fraction of the wait that is randomized, 1.0 is "full jitter".
+    - retry_on (tuple): Exception types worth retrying, anything else is raised right away.
+    """
+    max_attempts: int = 3
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 1.0
+    retry_on: tuple = (Exception,)
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+    def delay(self, attempt: int) -> float:
+        """
+        Seconds to wait after the failed attempt number ``attempt`` (starting at 1).
+        """
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.max_attempts and isinstance(error, self.retry_on)
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream after ``failure_threshold`` consecutive failures.
+
+    While open every call fails fast with `CircuitOpenError`. After ``reset_timeout``
+    seconds a single trial call is let through: its success closes the circuit,
+    its failure opens it again. A breaker can be shared by several policies.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.__lock = threading.Lock()
+
+    def before_call(self):
+        with self.__lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError("Circuit breaker is open, the call was not attempted")
+
+    def record_success(self):
+        with self.__lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.__lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class ExecutionPolicy:
+    """
+    Declarative timeout, retry, hedging and circuit breaking around a call.
+
+    Args:
+    - timeout (float, optional): Seconds an attempt may take before it fails with `TimeoutError`.
+    - retry (RetryPolicy, optional): Backoff used to retry failed attempts.
+    - hedge_after (float, optional): Seconds after which a duplicate of a slow attempt is started,
+      the first one to succeed wins. Only use it for calls that are safe to run twice.
+    - max_hedges (int): Maximum number of duplicates started per attempt.
+    - circuit_breaker (CircuitBreaker, optional): Breaker consulted before every attempt.
+
+    A synchronous call that times out cannot be interrupted, it keeps running on its
+    worker thread and its result is discarded.
+    """
+    def __init__(
+        self, timeout: float = None, retry: RetryPolicy = None, hedge_after: float = None,
+        max_hedges: int = 1, circuit_breaker: CircuitBreaker = None
+    ):
+        self.timeout = timeout
+        self.retry = retry
+        self.hedge_after = hedge_after
+        self.max_hedges = max_hedges
+        self.circuit_breaker = circuit_breaker
+
+    def __start__(self, func: callable, args, kwargs) -> Future:
+        future = Future()
+        context = contextvars.copy_context()
+        def target():
+            try:
+                future.set_result(context.run(func, *args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+        # Daemon threads, an abandoned attempt never blocks the interpreter from exiting
+        threading.Thread(target=target, daemon=True).start()
+        return future
+
+    def __attempt__(self, func: callable, args, kwargs):
+        if self.timeout is None and self.hedge_after is None:
+            return func(*args, **kwargs)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        running = {self.__start__(func, args, kwargs)}
+        hedges = 0
+        error = None
+        while running:
+            wait_for = None if deadline is None else max(0.0, deadline - time.monotonic())
+            hedging = self.hedge_after is not None and hedges < self.max_hedges
+            if hedging and (wait_for is None or self.hedge_after < wait_for):
+                wait_for = self.hedge_after
+            done, running = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if not done and hedging:
+                hedges += 1
+                running.add(self.__start__(func, args, kwargs))
+        if error is not None and not running:
+            raise error
+        raise TimeoutError(f"Call did not complete within {self.timeout} seconds")
+
+    def execute(self, func: callable, *args, **kwargs):
+        """
+        Calls ``func(*args, **kwargs)`` under the policy and returns its result.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker:
+                self.circuit_breaker.before_call()
+            try:
+                result = self.__attempt__(func, args, kwargs)
+            except Exception as error:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                if self.retry is None or not self.retry.should_retry(error, attempt):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                continue
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success()
+            return result
+
+    async def __aattempt__(self, func: callable, args, kwargs):
+        if self.hedge_after is None:
+            return await func(*args, **kwargs)
+        running = {asyncio.ensure_future(func(*args, **kwargs))}
+        hedges = 0
+        error = None
+        try:
+            while running:
+                hedging = hedges < self.max_hedges
+                done, running = await asyncio.wait(
+                    running, timeout=self.hedge_after if hedging else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not done and hedging:
+                    hedges += 1
+                    running.add(asyncio.ensure_future(func(*args, **kwargs)))
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def aexecute(self, func: callable, *args, **kwargs):
+        """
+        Awaits ``func(*args, **kwargs)`` under the policy, ``func`` must return an awaitable.
+        Attempts that time out or lose a hedge are cancelled.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker:
+                self.circuit_breaker.before_call()
+            try:
+                result = await asyncio.wait_for(self.__aattempt__(func, args, kwargs), self.timeout)
+            except Exception as error:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                if self.retry is None or not self.retry.should_retry(error, attempt):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success()
+            return result
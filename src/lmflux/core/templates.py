@@ -1,6 +1,63 @@
 from lmflux.metaclasses.singleton import Singleton
 from lmflux import variables
+import html
+import json
 import os
+import re
+
+PLACEHOLDER = re.compile(r"\{\{(.+?)\}\}")
+_MISSING = object()
+
+ESCAPES = {
+    None: str,
+    "html": lambda value: html.escape(str(value)),
+    # The contents of a JSON string literal, without the surrounding quotes
+    "json": lambda value: json.dumps(str(value), ensure_ascii=False)[1:-1],
+}
+
+class CompiledTemplate:
+    """
+    A template parsed once into its literal text and ``{{key}}`` placeholders.
+
+    ``segments`` alternates literal text (even indexes) and placeholder keys (odd indexes),
+    rendering fills the placeholders and joins the segments in a single pass.
+
+    Args:
+    - source (str): The template source.
+    """
+    __slots__ = ("source", "segments")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.segments = PLACEHOLDER.split(source)
+
+    def render(self, context: dict, on_missing: str = "keep", escape: str = None) -> str:
+        """
+        Args:
+        - context (dict): Values of the placeholders.
+        - on_missing (str, optional): What to do with placeholders missing from ``context``:
+          "keep" leaves ``{{key}}`` untouched, "empty" removes it and "error" raises a
+          KeyError. Defaults to "keep".
+        - escape (str, optional): None, "html" or "json", applied to the context values.
+        """
+        if on_missing not in ("keep", "empty", "error"):
+            raise ValueError(f"Unknown on_missing '{on_missing}'")
+        if escape not in ESCAPES:
+            raise ValueError(f"Unknown escape '{escape}'")
+        convert = ESCAPES[escape]
+        parts = self.segments.copy()
+        for index in range(1, len(parts), 2):
+            key = parts[index]
+            value = context.get(key, _MISSING)
+            if value is not _MISSING:
+                parts[index] = convert(value)
+            elif on_missing == "keep":
+                parts[index] = "{{" + key + "}}"
+            elif on_missing == "empty":
+                parts[index] = ""
+            else:
+                raise KeyError(f"Template placeholder '{key}' is missing from the context")
+        return "".join(parts)
 
 class Templates(metaclass=Singleton):
     """
@@ -20,6 +77,8 @@ class Templates(metaclass=Singleton):
         self.__ignore_template_id = []
         self.__external_location = variables.PROMPT_LOCATION
         self.__allow_external_deletion = False
+        # template_id -> CompiledTemplate
+        self.__compiled = {}
     
     def __get_template_external_path__(self, template_id:str):
         template_path = template_id.split('.')
@@ -52,6 +111,7 @@ class Templates(metaclass=Singleton):
         self.__ignore_template_id = []
         self.__external_location = variables.PROMPT_LOCATION
         self.__allow_external_deletion = False
+        self.__compiled = {}
     
     def set_allow_external_deletion(self, allow: bool = True):
         """Toggle permission to delete templates that live on disk."""
@@ -65,6 +125,7 @@ class Templates(metaclass=Singleton):
             location (str): The new external location path.
         """
         self.__external_location = location
+        self.__compiled = {}
     
     def put_template(self, template_id: str, template_src: str, persistent:bool = False):
         """
@@ -78,6 +139,7 @@ class Templates(metaclass=Singleton):
         Raises:
             AttributeError: If persistent is True but the external location is not defined.
         """
+        self.__compiled.pop(template_id, None)
         if persistent:
             self.__create_in_external_location__(template_id, content=template_src)
         else:
@@ -105,6 +167,7 @@ class Templates(metaclass=Singleton):
             corresponding file from ``__external_location``.
           - Otherwise, record the id in ``__ignore_template_id``.
         """
+        self.__compiled.pop(template_id, None)
         if template_id in self.__inmem_templates:
             del self.__inmem_templates[template_id]
             return
@@ -128,21 +191,33 @@ class Templates(metaclass=Singleton):
         # Either deletion not allowed or file missing → ignore
         self.__ignore_template_id.append(template_id)
 
-    def get_with_context(self, template_id: str, context:dict)->str:
+    def compile_template(self, template_id: str) -> CompiledTemplate:
+        """
+        Returns the parsed template. It is cached per template id and parsed again only
+        when the source changed (e.g. a template file edited on disk).
+        """
+        source = self.get_template(template_id)
+        compiled = self.__compiled.get(template_id)
+        if compiled is None or compiled.source != source:
+            compiled = self.__compiled[template_id] = CompiledTemplate(source)
+        return compiled
+
+    def get_with_context(
+        self, template_id: str, context:dict, on_missing:str = "keep", escape:str = None
+    )->str:
         """
         Retrieves a template with context replacement.
         
         Args:
             template_id (str): The ID of the template to retrieve.
             context (dict): A dictionary of key-value pairs to replace in the template.
+            on_missing (str): "keep" (default), "empty" or "error", see `CompiledTemplate.render`.
+            escape (str): None (default), "html" or "json" escaping of the values.
         
         Returns:
             str: The template content with replacements made.
         """
-        content = self.get_template(template_id)
-        for key, value in context.items():
-            content = content.replace('{{'+key+'}}', str(value))
-        return content
+        return self.compile_template(template_id).render(context, on_missing, escape)
     
     def set_hard_external_delete(self,):
         """
@@ -0,0 +1,113 @@
+from lmflux.core.components import Tool
+
+from typing import Iterable
+import hashlib
+import json
+import threading
+
+class ToolRegistry:
+    """
+    The tools of an `LLMModel`, indexed by name.
+
+    - Lookups by name are O(1), tools keep the order they were added in.
+    - ``version`` changes whenever the set of tools changes.
+    - `compile` returns the JSON schemas sent to the model. They are rebuilt only after
+      a change, and the previous list is reused when the new schemas hash to the same
+      content, so swapping in equivalent tools costs nothing downstream.
+
+    Call `invalidate` after mutating a registered `Tool` in place.
+    """
+    def __init__(self, tools: Iterable[Tool] = ()):
+        self.__tools: dict[str, Tool] = {}
+        self.__lock = threading.Lock()
+        self.version = 0
+        self.__compiled = None
+        self.__compiled_version = None
+        self.fingerprint = None
+        for tool in tools:
+            self.__tools[tool.name] = tool
+
+    def add(self, tool: Tool):
+        """
+        Registers ``tool``, replacing a tool with the same name.
+        """
+        with self.__lock:
+            if self.__tools.get(tool.name) is not tool:
+                self.__tools[tool.name] = tool
+                self.version += 1
+
+    def add_many(self, tools: Iterable[Tool]):
+        for tool in tools:
+            self.add(tool)
+
+    def remove(self, name: str):
+        with self.__lock:
+            if self.__tools.pop(name, None) is not None:
+                self.version += 1
+
+    def replace(self, tools: Iterable[Tool]) -> bool:
+        """
+        Makes ``tools`` the registered tools. Nothing changes (and nothing is recompiled)
+        when they are the tools already registered, in the same order.
+
+        Returns:
+            bool: True when the registry changed.
+        """
+        tools = list(tools)
+        with self.__lock:
+            current = self.__tools.values()
+            if len(tools) == len(current) and all(a is b for a, b in zip(tools, current)):
+                return False
+            self.__tools = {tool.name: tool for tool in tools}
+            self.version += 1
+            return True
+
+    def invalidate(self):
+        """
+        Forces the next `compile` to rebuild the schemas and the name index.
+        """
+        with self.__lock:
+            for tool in self.__tools.values():
+                tool.invalidate_cache()
+            self.__tools = {tool.name: tool for tool in self.__tools.values()}
+            self.version += 1
+
+    def get(self, name: str) -> Tool:
+        return self.__tools.get(name)
+
+    def compile(self) -> list[dict]:
+        """
+        The tool schemas in the format of the chat completions API, None without tools.
+        """
+        with self.__lock:
+            if self.__compiled_version == self.version:
+                return self.__compiled
+            version = self.version
+            tools = list(self.__tools.values())
+        compiled = [tool.build_tool_call() for tool in tools] or None
+        fingerprint = None
+        if compiled:
+            fingerprint = hashlib.sha256(
+                json.dumps(compiled, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+        with self.__lock:
+            if fingerprint != self.fingerprint:
+                self.__compiled = compiled
+                self.fingerprint = fingerprint
+            self.__compiled_version = version
+            return self.__compiled
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__tools
+
+    def __iter__(self):
+        return iter(list(self.__tools.values()))
+
+    def __len__(self):
+        return len(self.__tools)
+
+    def __getitem__(self, index: int) -> Tool:
+        return list(self.__tools.values())[index]
+
+    def __repr__(self):
+        return f"ToolRegistry({list(self.__tools)})"
@@ -0,0 +1,142 @@
+from typing import TYPE_CHECKING, Callable, Any
+
+if TYPE_CHECKING:  # executed only by type checkers, not at runtime
+    from lmflux.core.components import ToolParam
+
+# A checker takes the value and the error list, and returns the (possibly coerced) value.
+# Problems are appended to the error list instead of being raised. Paths are known when
+# compiling, so nothing is formatted on the happy path.
+Checker = Callable[[Any, list], Any]
+
+_INVALID = object()
+
+def _error(errors: list, path: str, message: str):
+    errors.append({"path": path, "message": message})
+    return _INVALID
+
+def _number(path: str) -> Checker:
+    def check_number(value, errors):
+        if value.__class__ in (int, float):
+            return value
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+        return _error(errors, path, f"expected a number, got {value!r}")
+    return check_number
+
+def _string(path: str) -> Checker:
+    def check_string(value, errors):
+        if isinstance(value, str):
+            return value
+        if value.__class__ in (int, float):
+            return str(value)
+        return _error(errors, path, f"expected a string, got {type(value).__name__}")
+    return check_string
+
+def _boolean(path: str) -> Checker:
+    def check_boolean(value, errors):
+        if value is True or value is False:
+            return value
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        return _error(errors, path, f"expected a boolean, got {value!r}")
+    return check_boolean
+
+def _any(path: str) -> Checker:
+    def check_any(value, errors):
+        return value
+    return check_any
+
+_SCALARS = {
+    "number": _number,
+    "string": _string,
+    "boolean": _boolean,
+}
+
+def _compile_array(type_: str, path: str) -> Checker:
+    sub_types = type_[len("array["):-1].split("|")
+    checkers = [_SCALARS.get(sub_type, _any)(path) for sub_type in sub_types]
+    expected = " or ".join(sub_types)
+
+    def check_array(value, errors):
+        if not isinstance(value, list):
+            return _error(errors, path, f"expected an array, got {type(value).__name__}")
+        items = []
+        for index, item in enumerate(value):
+            for checker in checkers:
+                attempt = []
+                coerced = checker(item, attempt)
+                if not attempt:
+                    items.append(coerced)
+                    break
+            else:
+                _error(errors, f"{path}[{index}]", f"expected {expected}, got {item!r}")
+        return items
+    return check_array
+
+def _compile_object(param: 'ToolParam', path: str, allow_extra: bool = False) -> Checker:
+    properties = {
+        prop.name: compile_checker(prop, f"{path}.{prop.name}") for prop in param.property or []
+    }
+    required = [prop.name for prop in param.property or [] if prop.is_required]
+    closed = param.property is not None and not param.additional_properties and not allow_extra
+
+    def check_object(value, errors):
+        if not isinstance(value, dict):
+            return _error(errors, path, f"expected an object, got {type(value).__name__}")
+        result = {}
+        for name in required:
+            if name not in value:
+                _error(errors, f"{path}.{name}", "missing required argument")
+        for name, item in value.items():
+            checker = properties.get(name)
+            if checker is not None:
+                result[name] = checker(item, errors)
+            elif closed:
+                _error(errors, f"{path}.{name}", "unexpected argument")
+            else:
+                result[name] = item
+        return result
+    return check_object
+
+def compile_checker(param: 'ToolParam', path: str = "$") -> Checker:
+    """
+    Builds the checker of one `ToolParam` and, recursively, of its properties.
+    Unknown types are accepted as they are.
+    """
+    if param.type == "object":
+        return _compile_object(param, path)
+    if param.type.startswith("array[") and param.type.endswith("]"):
+        return _compile_array(param.type, path)
+    return _SCALARS.get(param.type, _any)(path)
+
+def compile_validator(
+    root_param: 'ToolParam', allow_extra: bool = False
+) -> Callable[[Any], tuple[dict, list[dict]]]:
+    """
+    Compiles the `ToolParam` tree of a tool into a single validator, once.
+
+    The validator takes the decoded arguments and returns ``(arguments, errors)``: the
+    arguments with lenient coercions applied (e.g. ``"3"`` for a number, ``"true"`` for a
+    boolean) and a list of ``{"path", "message"}`` dicts, empty when the arguments are valid.
+
+    Args:
+    - root_param (ToolParam): The root parameter of the tool, of type object.
+    - allow_extra (bool): Let undeclared top level arguments through, for functions
+      taking ``**kwargs``.
+    """
+    if root_param.type == "object":
+        checker = _compile_object(root_param, "$", allow_extra)
+    else:
+        checker = compile_checker(root_param)
+
+    def validate(args) -> tuple[dict, list[dict]]:
+        errors = []
+        coerced = checker(args, errors)
+        return coerced, errors
+    return validate
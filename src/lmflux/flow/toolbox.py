@@ -1,4 +1,6 @@
 from lmflux.core.components import Tool, ToolParam
+from lmflux.core.cache import LRUCache
+from lmflux.utils.executors import check_executor
 from typing import Callable, Any, Union
 
 import inspect
@@ -6,6 +8,7 @@ from typing import get_args, get_origin
 from types import GenericAlias
 
 from enum import Enum
+from functools import update_wrapper
 
 def parse_llm_type(py_type, allow_generic=True) -> str:
     if type(py_type) == GenericAlias and allow_generic:
@@ -33,7 +36,37 @@ def parse_llm_type(py_type, allow_generic=True) -> str:
     else:
         raise AttributeError(f"Cannot define tool of type {py_type}")
 
-def tool(func:callable):
+def tool(
+    func:callable=None, *, memoize:bool=False, ttl:float=None, max_size:int=1024, cache=None,
+    executor:str=None
+):
+    """
+    Turns a typed, documented function into a tool. Works bare (``@tool``) or with options.
+
+    Args:
+    - memoize (bool, optional): Return the cached result when the tool is called again with
+      the same arguments. Only for deterministic tools. Defaults to False.
+    - ttl (float, optional): Seconds a memoized result stays valid, None means forever.
+    - max_size (int, optional): Maximum number of memoized results, least recently used
+      ones are evicted first. Defaults to 1024.
+    - cache (LRUCache, optional): Cache to memoize into instead of a new one, share it
+      between tools to bound them together. Implies ``memoize``.
+    - executor (str, optional): "process" runs the tool in the shared process pool, for
+      CPU-bound tools that would hold the GIL. The function must be defined at module level
+      and its arguments and result must be picklable. Defaults to None (inline).
+    """
+    if func is None:
+        return lambda func: tool(
+            func, memoize=memoize, ttl=ttl, max_size=max_size, cache=cache, executor=executor
+        )
+    check_executor(executor)
+    if executor == "process":
+        if inspect.iscoroutinefunction(func):
+            raise AttributeError("Coroutine tools cannot run in a process")
+        if "<locals>" in func.__qualname__:
+            raise AttributeError("Tools running in a process must be defined at module level")
+    if cache is None and memoize:
+        cache = LRUCache(max_size=max_size, ttl=ttl)
     signature = inspect.signature(func)
     tool_params = []
     description = func.__doc__
@@ -60,16 +93,21 @@ def tool(func:callable):
         name="parameters",
         property=tool_params
     )
+    def wraps(*args, **kword_args):
+        return func(*args, **kword_args)
+    # Takes the name of ``func``: the module attribute is this wrapper, so it pickles by reference
+    update_wrapper(wraps, func)
     tool_def = (
         Tool(
             name=func.__name__,
             description=description,
             root_param=root_param,
-            func=func
+            # The original function is shadowed by the wrapper and cannot be pickled
+            func=wraps if executor == "process" else func,
+            cache=cache,
+            executor=executor
         )
     )
-    def wraps(*args, **kword_args):
-        return func(*args, **kword_args)
     wraps.__setattr__('__is_tool_definition__', True)
     wraps.__setattr__('__tool_definition__', tool_def)
     return wraps
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 from abc import abstractmethod
-from typing import List
+from typing import Iterable, List
 
 import networkx as nx
 
@@ -32,9 +32,12 @@ class Graph:
     def __init__(self, draw_labels_around=False) -> None:
         self.G = nx.DiGraph()  # holds the actual objects
         self.draw_labels_around = draw_labels_around
+        self.version = 0  # bumped on every structural change
+        self.__nodes_by_name: dict[str, NodeDefinition] = {}
 
     def __add_node__(self, obj: NodeDefinition, _metadata={}) -> None:
         """Add a ``NodeDefinition`` or a ``NodeGroupDefinition`` to the graph."""
+        self.__check_name_available__(obj)
         self.G.add_node(
             obj.id,
             label=obj.name,
@@ -42,15 +45,46 @@ class Graph:
             shape="box" if isinstance(obj, NodeGroupDefinition) else "ellipse",
             _metadata=_metadata
         )
+        self.__nodes_by_name[obj.name] = obj
+        self.version += 1
+
+    def __check_name_available__(self, obj: NodeDefinition) -> None:
+        """Node names identify nodes, a different object cannot reuse a registered name."""
+        registered = self.__nodes_by_name.get(obj.name)
+        if registered is not None and registered is not obj:
+            raise ValueError(
+                f"A different node is already registered under the name '{obj.name}', "
+                "give each node a unique name"
+            )
 
     def __find_object_in_graph_by_name__(self, name:str) -> NodeDefinition:
-        for node in self.G.nodes:
-            if node.label == name:
-                return self.G.nodes[node]["obj"]
+        return self.__nodes_by_name.get(name)
+
+    def __resolve_node__(self, obj: NodeDefinition) -> NodeDefinition:
+        """Return ``obj``, adding it to the graph the first time it is seen."""
+        if self.__find_object_in_graph_by_name__(obj.name) is None:
+            self.__add_node__(obj)
+        else:
+            self.__check_name_available__(obj)
+        return obj
     
     def __add_edge__(self, src: NodeDefinition, dst: NodeDefinition, _metadata={}) -> None:
         """Create a directed edge ``src → dst``."""
         self.G.add_edge(src.id, dst.id, _metadata=_metadata)
+        self.version += 1
+
+    def add_edges_from(self, edges: Iterable[tuple]) -> None:
+        """
+        Bulk construction: add every ``(src, dst)`` or ``(src, dst, metadata)`` edge in one pass.
+        Nodes are matched by name and added when missing.
+        """
+        batch = []
+        for src, dst, *metadata in edges:
+            src = self.__resolve_node__(src)
+            dst = self.__resolve_node__(dst)
+            batch.append((src.id, dst.id, {"_metadata": metadata[0] if metadata else {}}))
+        self.G.add_edges_from(batch)
+        self.version += 1
 
     # ------------------------------------------------------------------
     #  Mermaid rendering – a **single** recursive implementation
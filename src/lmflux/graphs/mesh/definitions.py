@@ -3,15 +3,24 @@ from lmflux.agents.structure import Agent
 from lmflux.agents.components import Context
 
 from lmflux.core.components import Tool, ToolParam, Message, Conversation, ToolRequest
+from lmflux.core.conversations import current_session_id, session_scope
 from lmflux.utils.signature_checker import check_compatible
 
 from lmflux.graphs.base.graph import NodeDefinition, Graph, NodeGroupDefinition
+from lmflux.graphs.mesh.interactions import InteractionStore
 from lmflux.graphs.mesh.markdown_renderer import MarkdownRenderer
 from lmflux.graphs.mesh.mermaid_renderer import MermaidRender
 from lmflux.graphs.mesh.result_renderer import MeshResultRenderer
+from lmflux.graphs.mesh.throttled_renderer import ThrottledRenderer
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable
 from uuid import uuid4
 import networkx as nx
+import threading
+import time
 
 EXPECTED_TRANSFORMER_CALLBACK = [
     {'name': 'session', 'type': Session, 'position': 0}
@@ -38,12 +47,49 @@ class AgenticNode(NodeDefinition):
     def defines_sub_graph(self) -> bool:
         return False
 
+class DelegationError(RuntimeError):
+    """
+    A delegation that cannot be served: waiting for the agent would deadlock, or took
+    longer than `MeshGraph.delegation_timeout`.
+    """
+
+class SessionClosedError(LookupError):
+    """
+    The code runs in the `session_scope` of a session the mesh no longer holds: it was
+    closed with `MeshGraph.close_session` or evicted by `MeshGraph.max_sessions`.
+    """
+
+class _DelegationFrame:
+    """
+    A delegation in progress, linked to the delegation it was issued from.
+    """
+    __slots__ = ("agent_id", "parent")
+
+    def __init__(self, agent_id: str, parent: '_DelegationFrame'):
+        self.agent_id = agent_id
+        self.parent = parent
+
+    def lineage(self):
+        """This frame, then the frames that issued it up to the user query."""
+        frame = self
+        while frame is not None:
+            yield frame
+            frame = frame.parent
+
+# Delegation the current call runs under, None for the agent answering the user
+_delegation_frame: ContextVar[_DelegationFrame] = ContextVar("mesh_delegation_frame", default=None)
+
 def ask_agent(query, agent_a:Agent, agent_b:Agent, graph_class:'MeshGraph'):
     trace_id = str(uuid4())
     query_message = Message(
         "user", query
     )
-    response = agent_b.conversate(query_message, graph_class.session)
+    try:
+        with graph_class.__delegation__(agent_b):
+            response = agent_b.conversate(query_message, graph_class.session)
+    except DelegationError as error:
+        # Reported to the calling agent as the tool result, it can answer without the delegation
+        return {"error": str(error)}
     # Call the callback
     graph_class.__attach_agent_response_on_trace_id__(agent_a, agent_b, query, query_message, response, trace_id)
     return {"response": response.content, "__trace_id": trace_id}
@@ -64,70 +110,234 @@ def agent_tool_callback(agent: Agent, tool_call:ToolRequest, result, session:Ses
 def _indent_prefix(depth: int) -> str:
     return ("\t" * (depth-1)) + "- "
 
+@dataclass
+class MeshSessionState:
+    """
+    What a `MeshGraph` tracks for one user session.
+    """
+    session: Session
+    agent_interactions: InteractionStore = field(default_factory=InteractionStore)
+    user_interactions: list = field(default_factory=list)
+
 
 class MeshGraph(Graph):
     # -------------
     #  Private methods 
     # -------------
     
-    def __init__(self):
+    def __init__(self, max_sessions: int = None):
+        """
+        Args:
+        - max_sessions (int, optional): Sessions kept at most, the least recently queried
+          one is closed (state and agent conversations) when a new session would exceed it.
+          None keeps every session until `close_session`.
+        """
         super().__init__()
+        self.max_sessions = max_sessions
         self.conversation_graph = nx.DiGraph()
         self.built = False
         self.mesh_hash = None
-        self.agent_interactions = {}
-        self.user_interactions = []
         self.renderer = MarkdownRenderer(self)
         self.is_markdown = True
         self.is_mermaid = True
+        # Guards the interaction bookkeeping and rendering, delegations may run on several threads
+        self.__state_lock = threading.RLock()
+        # (session id, agent id) -> frame of the delegation the agent is answering, and
+        # frame -> (session id, agent id) it waits for
+        self.__delegations = threading.Condition()
+        self.__agent_owners = {}
+        self.__waiting = {}
+        self.delegation_timeout = None  # seconds a delegation may wait for a busy agent
+        self.parallel_delegation = None  # (enabled, max_workers) once configured
+        # Conversations live on the agents' LLMs keyed by session id, the rest of the
+        # per-session state lives here, so one mesh can serve many sessions at once
+        self.__sessions: dict[str, MeshSessionState] = {}
+        self.__default_session_id = None
 
     def __make_hash__(self,) -> str:
         pass
     
     def __create_agentic_node__(self, agent:Agent):
         agent.add_conversation_update_callback(agent_conversation_update_callback)
+        if self.parallel_delegation and hasattr(agent.llm, "set_parallel_tool_calls"):
+            agent.llm.set_parallel_tool_calls(*self.parallel_delegation)
         return AgenticNode(
             agent.agent_id,
             agent
         )
     
+    @contextmanager
+    def __delegation__(self, agent: Agent):
+        """
+        Serializes the delegations sent to ``agent``: a sub-agent answers one query at a time,
+        so concurrent delegations never interleave its conversation. An agent called back
+        from its own delegation chain is re-entered without waiting.
+
+        Raises `DelegationError` instead of waiting when the wait would deadlock (e.g. two
+        agents delegating to each other from parallel branches), or when the wait exceeds
+        ``delegation_timeout``.
+        """
+        parent = _delegation_frame.get()
+        if parent is not None and any(f.agent_id == agent.agent_id for f in parent.lineage()):
+            yield
+            return
+        frame = _DelegationFrame(agent.agent_id, parent)
+        # Sessions have their own conversations, only delegations of the same session wait
+        key = (current_session_id(), agent.agent_id)
+        self.__acquire_agent__(key, frame)
+        token = _delegation_frame.set(frame)
+        try:
+            yield
+        finally:
+            _delegation_frame.reset(token)
+            with self.__delegations:
+                del self.__agent_owners[key]
+                self.__delegations.notify_all()
+    
+    def __acquire_agent__(self, key: tuple, frame: _DelegationFrame):
+        deadline = None
+        if self.delegation_timeout is not None:
+            deadline = time.monotonic() + self.delegation_timeout
+        with self.__delegations:
+            while key in self.__agent_owners:
+                if self.__would_deadlock__(frame, self.__agent_owners[key]):
+                    raise DelegationError(
+                        f"Agent '{frame.agent_id}' is answering a delegation that waits for this "
+                        "one, asking it now would deadlock"
+                    )
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DelegationError(
+                        f"Agent '{frame.agent_id}' stayed busy for more than "
+                        f"{self.delegation_timeout} seconds"
+                    )
+                self.__waiting[frame] = key
+                try:
+                    self.__delegations.wait(remaining)
+                finally:
+                    del self.__waiting[frame]
+            self.__agent_owners[key] = frame
+    
+    def __would_deadlock__(self, frame: _DelegationFrame, owner: _DelegationFrame) -> bool:
+        # ``owner`` is done once every delegation issued under it is done. Follow what those
+        # delegations wait for, reaching ``frame`` or a frame it was issued from is a cycle.
+        lineage = set(frame.lineage())
+        pending, seen = [owner], set()
+        while pending:
+            current = pending.pop()
+            if current in lineage:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            for waiter, key in self.__waiting.items():
+                blocker = self.__agent_owners.get(key)
+                if blocker is not None and current in waiter.lineage():
+                    pending.append(blocker)
+        return False
+    
     def __attach_agent_request_on_trace_id__(
         self, agent_a: Agent, 
         tool_call:ToolRequest, result:str, 
         trace_id: str
     ):
-        self.agent_interactions[trace_id].update(
-            {
-                "agent_a_metadata": {
-                    "request_message_id": tool_call.message.message_id
+        with self.__state_lock:
+            self.agent_interactions.attach(
+                trace_id,
+                {
+                    "agent_a_metadata": {
+                        "request_message_id": tool_call.message.message_id
+                    }
                 }
-            }
-        )
+            )
     
     def __attach_agent_response_on_trace_id__(
         self, agent_a: Agent, agent_b: Agent, query:str, 
         starting_message:Message, response_message:Message,
         trace_id: str
     ):
-        self.agent_interactions[trace_id] = {
-            "interaction_id": trace_id,
-            "agent_a_id": agent_a.agent_id,
-            "agent_b_id": agent_b.agent_id,
-            "query": query,
-            "agent_b_metadata":{
-                "request_message_id": starting_message.message_id,
-                "response_message_id":response_message.message_id
-            }
-        }
+        with self.__state_lock:
+            self.agent_interactions.add({
+                "interaction_id": trace_id,
+                "agent_a_id": agent_a.agent_id,
+                "agent_b_id": agent_b.agent_id,
+                "query": query,
+                "agent_b_metadata":{
+                    "request_message_id": starting_message.message_id,
+                    "response_message_id":response_message.message_id
+                }
+            })
+    
+    def __current_state__(self,) -> MeshSessionState:
+        session_id = current_session_id()
+        if session_id is not None:
+            # Never the default session, the work of one user must not land in another's
+            state = self.__sessions.get(session_id)
+            if state is None:
+                raise SessionClosedError(f"Mesh session '{session_id}' was closed or evicted")
+            return state
+        state = self.__sessions.get(self.__default_session_id)
+        if state is None:
+            state = self.__clear_state__()
+        return state
+    
+    def __drop_session_state__(self, session_id: str):
+        self.__sessions.pop(session_id, None)
+        self.renderer.forget_session(session_id)
+        for _, data in self.G.nodes(data=True):
+            data["obj"].agent.llm.conversations.drop(session_id)
+    
+    def __clear_state__(self, session_id: str = None) -> MeshSessionState:
+        """
+        Starts the given session (the default one when None) over: new `Session`,
+        no interactions and fresh agent conversations.
+        """
+        with self.__state_lock:
+            previous_id = session_id if session_id is not None else self.__default_session_id
+            if previous_id is not None:
+                self.__drop_session_state__(previous_id)
+            session = Session()
+            if session_id is not None:
+                session.session_id = session_id
+            else:
+                self.__default_session_id = session.session_id
+            session.set("__mesh_graph", self)
+            state = MeshSessionState(session)
+            self.__sessions[session.session_id] = state
+            self.__evict_sessions__()
+            return state
+    
+    def __evict_sessions__(self):
+        # Sessions are ordered from the least to the most recently queried
+        if self.max_sessions is None:
+            return
+        while len(self.__sessions) > max(self.max_sessions, 1):
+            oldest = next(iter(self.__sessions))
+            self.close_session(oldest)
+    
+    def __open_session__(self, session_id: str, clear: bool) -> MeshSessionState:
+        with self.__state_lock:
+            key = session_id if session_id is not None else self.__default_session_id
+            state = self.__sessions.get(key)
+            if clear or state is None:
+                return self.__clear_state__(session_id)
+            # Most recently used last
+            self.__sessions[key] = self.__sessions.pop(key)
+            return state
     
-    def __clear_state__(self,):
-        self.session = Session()
-        self.session.set("__mesh_graph", self)
-        self.agent_interactions = {}
-        self.user_interactions = []
-        for node in self.G.nodes(data=True):
-            node_definition: AgenticNode = node[-1].get("obj")
-            node_definition.agent.reset_state()
+    # Views of the current session, the default one outside of any `session_scope`.
+    # A scoped session that was closed raises `SessionClosedError`.
+    @property
+    def session(self) -> Session:
+        return self.__current_state__().session
+    
+    @property
+    def agent_interactions(self) -> InteractionStore:
+        return self.__current_state__().agent_interactions
+    
+    @property
+    def user_interactions(self) -> list:
+        return self.__current_state__().user_interactions
     
     # -------------
     #  Public API 
@@ -163,48 +373,144 @@ class MeshGraph(Graph):
         _metadata = {"relationship_description": relationship_description, "label":"Can call"}
         self.__add_edge__(definition_a, definition_b, _metadata=_metadata)
     
-    def query_agent(self, agent: Agent, query: str, clear=True, show_progress=False):
-        if clear:
-            self.__clear_state__()
-        
+    def __start_user_interaction__(self, agent: Agent, query: str, show_progress: bool) -> Message:
         self.session.set("show_progress", show_progress)
         
         message = Message(
             "user", query
         )
-        self.user_interactions.append({
-            "interaction_id": str(uuid4()),
-            "agent_id": agent.agent_id,
-            "response_message_id": None,
-            "response_content": None,
-            "request_message_id": message.message_id,
-            "request_content": message.content
-        })
-
-        response = agent.conversate(message, self.session)
-        self.user_interactions[-1] = {
-            "interaction_id": str(uuid4()),
-            "agent_id": agent.agent_id,
-            "response_message_id": response.message_id,
-            "response_content": response.content,
-            "request_message_id": message.message_id,
-            "request_content": message.content
-        }
+        with self.__state_lock:
+            self.user_interactions.append({
+                "interaction_id": str(uuid4()),
+                "agent_id": agent.agent_id,
+                "response_message_id": None,
+                "response_content": None,
+                "request_message_id": message.message_id,
+                "request_content": message.content
+            })
+        return message
+    
+    def __finish_user_interaction__(self, agent: Agent, message: Message, response: Message):
+        with self.__state_lock:
+            self.user_interactions[-1] = {
+                "interaction_id": str(uuid4()),
+                "agent_id": agent.agent_id,
+                "response_message_id": response.message_id,
+                "response_content": response.content,
+                "request_message_id": message.message_id,
+                "request_content": message.content
+            }
         if self.session.get("show_progress_as_graph"):
             self.__show_meramaid__()
         elif self.session.get("show_progress_as_text"):
             self.__log_progress__()
+    
+    def enable_parallel_delegation(self, enabled:bool=True, max_workers:int=4):
+        """
+        Lets an agent that emits several ``talk_to_<agent>`` calls in one turn run those
+        delegations concurrently. Each sub-agent still answers one query at a time.
+        Applies to agents added later as well, agents whose LLM has no parallel tool
+        support are left untouched.
 
+        Args:
+        - enabled (bool): Turn concurrent delegation on or off.
+        - max_workers (int): Upper bound of delegations running at once per turn.
+        """
+        self.parallel_delegation = (enabled, max_workers)
+        for _, data in self.G.nodes(data=True):
+            llm = data["obj"].agent.llm
+            if hasattr(llm, "set_parallel_tool_calls"):
+                llm.set_parallel_tool_calls(enabled, max_workers)
+    
+    def connect_agents_from(self, connections: Iterable[tuple[Agent, Agent, str]]):
+        """
+        Bulk version of ``connect_agents`` taking ``(agent_a, agent_b, relationship_description)`` tuples.
+        """
+        for agent_a, agent_b, relationship_description in connections:
+            self.connect_agents(agent_a, agent_b, relationship_description)
+    
+    def query_agent(self, agent: Agent, query: str, clear=True, show_progress=False, session_id: str = None):
+        """
+        Sends a user query to ``agent`` and returns its answer.
+
+        Queries with different ``session_id`` have their own session, interactions and agent
+        conversations, so they can run at the same time on the same mesh. Without a
+        ``session_id`` the mesh default session is used. ``clear`` only starts the queried
+        session over.
+        """
+        state = self.__open_session__(session_id, clear)
+        with session_scope(state.session.session_id):
+            message = self.__start_user_interaction__(agent, query, show_progress)
+            response = agent.conversate(message, state.session)
+            self.__finish_user_interaction__(agent, message, response)
         return response
+    
+    async def aquery_agent(self, agent: Agent, query: str, clear=True, show_progress=False, session_id: str = None):
+        """
+        Async counterpart of `query_agent`, the entry agent is driven through `Agent.aconversate`.
+        """
+        state = self.__open_session__(session_id, clear)
+        with session_scope(state.session.session_id):
+            message = self.__start_user_interaction__(agent, query, show_progress)
+            response = await agent.aconversate(message, state.session)
+            self.__finish_user_interaction__(agent, message, response)
+        return response
+    
+    def close_session(self, session_id: str):
+        """
+        Forgets everything the mesh and its agents hold for ``session_id``.
+        """
+        with self.__state_lock:
+            self.__drop_session_state__(session_id)
+            if session_id == self.__default_session_id:
+                self.__default_session_id = None
+    
+    def session_ids(self) -> list[str]:
+        with self.__state_lock:
+            return list(self.__sessions)
 
+    def __use_renderer__(self, renderer: MeshResultRenderer):
+        if isinstance(self.renderer, ThrottledRenderer):
+            # Keep the rate limit, only the document format changes
+            self.renderer.flush()
+            self.renderer.renderer = renderer
+        else:
+            self.renderer = renderer
+    
     def set_markdown_render(self):
-        self.renderer = MarkdownRenderer(self)
+        self.__use_renderer__(MarkdownRenderer(self))
     
     def set_mermaid_render(self):
-        self.renderer = MermaidRender(self)
+        self.__use_renderer__(MermaidRender(self))
+    
+    def set_throttled_render(self, min_interval: float = 0.5):
+        """
+        Renders progress at most once every ``min_interval`` seconds on a background thread,
+        conversation updates arriving in between are coalesced. See `ThrottledRenderer`.
+        """
+        if isinstance(self.renderer, ThrottledRenderer):
+            self.renderer.min_interval = min_interval
+        else:
+            self.renderer = ThrottledRenderer(self.renderer, min_interval)
+    
+    def __render__(self, renderer: MeshResultRenderer, session_id: str = None):
+        with self.__state_lock:
+            if session_id is None:
+                session_id = current_session_id()
+            if session_id is None:
+                state = self.__current_state__()
+            else:
+                state = self.__sessions.get(session_id)
+                if state is None:  # closed in the meantime
+                    return
+            with session_scope(state.session.session_id):
+                renderer.render()
 
-    def show_result(self,):
-        self.renderer.render()
+    def show_result(self, session_id: str = None):
+        """
+        Renders the given session, by default the current one (or the mesh default session).
+        """
+        self.__render__(self.renderer, session_id)
     
 def transformer_node(func:callable):
     """
@@ -0,0 +1,62 @@
+from collections.abc import Mapping
+import threading
+
+class InteractionStore(Mapping):
+    """
+    The cross agent interactions of a mesh session, keyed by trace id.
+
+    Besides the trace id map it keeps, per agent, the interactions it received
+    (``agent_b_id``) and the ones it sent (``agent_a_id``) in arrival order. Both indices
+    are updated as interactions are attached, so readers never scan the whole map and
+    can ask only for what arrived since their last read.
+
+    Interactions are plain dicts, `attach` updates them in place.
+    """
+    def __init__(self):
+        self.__interactions = {}
+        self.__incoming = {}
+        self.__outgoing = {}
+        self.__lock = threading.Lock()
+
+    def add(self, interaction: dict):
+        """
+        Registers a new interaction, it must carry ``interaction_id``, ``agent_a_id`` and ``agent_b_id``.
+        """
+        with self.__lock:
+            self.__interactions[interaction["interaction_id"]] = interaction
+            self.__incoming.setdefault(interaction["agent_b_id"], []).append(interaction)
+            self.__outgoing.setdefault(interaction["agent_a_id"], []).append(interaction)
+
+    def attach(self, trace_id: str, fields: dict):
+        """
+        Adds ``fields`` to an existing interaction.
+        """
+        with self.__lock:
+            self.__interactions[trace_id].update(fields)
+
+    def incoming(self, agent_id: str, start: int = 0) -> list[dict]:
+        """
+        Interactions received by ``agent_id``, skipping the first ``start`` ones.
+        """
+        with self.__lock:
+            return self.__incoming.get(agent_id, [])[start:]
+
+    def outgoing(self, agent_id: str, start: int = 0) -> list[dict]:
+        """
+        Interactions sent by ``agent_id``, skipping the first ``start`` ones.
+        """
+        with self.__lock:
+            return self.__outgoing.get(agent_id, [])[start:]
+
+    def __getitem__(self, trace_id: str) -> dict:
+        return self.__interactions[trace_id]
+
+    def __iter__(self):
+        with self.__lock:
+            return iter(list(self.__interactions))
+
+    def __len__(self):
+        return len(self.__interactions)
+
+    def __repr__(self):
+        return f"InteractionStore({self.__interactions})"
@@ -11,44 +11,57 @@ if TYPE_CHECKING:  # executed only by type checkers, not at runtime
 def indent_prefix(depth: int) -> str:
     return ("\t" * (depth-1)) + "- "
 
+class _CallGraph:
+    """
+    Who calls whom, extended with the interactions that arrived since the last render.
+    """
+    __slots__ = ("calls", "consumed_outgoing", "consumed_incoming")
+
+    def __init__(self):
+        # caller -> callees, a dict keeps the first-seen order without duplicates
+        self.calls: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self.consumed_outgoing: Dict[str, int] = defaultdict(int)
+        self.consumed_incoming: Dict[str, int] = defaultdict(int)
+
+    def update(self, actor_map: dict):
+        agent = actor_map.get("actor")
+        # Outgoing → the *target* agent
+        outgoing = actor_map.get("outgoing_interactions_cross_agent", [])
+        for out_int in outgoing[self.consumed_outgoing[agent]:]:
+            tgt = out_int.get("agent_b_id")
+            if tgt:
+                self.calls[agent][tgt] = None
+        self.consumed_outgoing[agent] = len(outgoing)
+        # Incoming is the opposite direction of someone else’s outgoing
+        incoming = actor_map.get("incoming_interactions_cross_agent", [])
+        for inc_int in incoming[self.consumed_incoming[agent]:]:
+            src_of_inc = inc_int.get("agent_a_id")
+            if src_of_inc:
+                self.calls[src_of_inc][agent] = None
+        self.consumed_incoming[agent] = len(incoming)
+
 class MarkdownRenderer(MeshResultRenderer):
-    def build_markdown_log(self) -> str:
-        messages, user_interactions = self.__make_interactions_map__()
-        # --------------------------------------------------------------
-        # Build quick look‑ups: message_id → agent  &  agent → #messages
-        # --------------------------------------------------------------
-        msg_to_agent: Dict[str, str] = {}
-        agent_msg_counts: Dict[str, int] = defaultdict(int)
+    def __init__(self, G:'MeshGraph'):
+        super().__init__(G)
+        # session id -> _CallGraph
+        self.__call_graphs = {}
 
-        for actor_map in messages:
-            agent_name = actor_map.get("actor")
-            for msg in actor_map.get("messages", []):
-                # every message object is expected to have a ``message_id`` attribute
-                msg_id = getattr(msg, "message_id", None)
-                if not msg_id:
-                    continue          # skip malformed entries
-                msg_to_agent[msg_id] = agent_name
-                agent_msg_counts[agent_name] += 1
+    def forget_session(self, session_id: str):
+        super().forget_session(session_id)
+        self.__call_graphs.pop(session_id, None)
 
+    def build_markdown_log(self) -> str:
+        messages, user_interactions = self.__make_interactions_map__()
         # --------------------------------------------------------------
-        # Build the *call graph*: who calls whom?
+        # agent → #messages, and the *call graph*: who calls whom?
+        # Both only read what changed since the previous render.
         # --------------------------------------------------------------
-        calls: Dict[str, List[str]] = defaultdict(list)
-
+        agent_msg_counts: Dict[str, int] = {}
+        call_graph = self.__call_graphs.setdefault(self.G.session.session_id, _CallGraph())
         for actor_map in messages:
-            src_agent = actor_map.get("actor")
-
-            # Outgoing → the *target* agent
-            for out_int in actor_map.get("outgoing_interactions_cross_agent", []):
-                tgt = out_int.get("agent_b_id")
-                if tgt:
-                    calls[src_agent].append(tgt)
-
-            # Incoming is the opposite direction of someone else’s outgoing
-            for inc_int in actor_map.get("incoming_interactions_cross_agent", []):
-                src_of_inc = inc_int.get("agent_a_id")
-                if src_of_inc:
-                    calls[src_of_inc].append(src_agent)
+            agent_msg_counts[actor_map.get("actor")] = len(actor_map.get("messages", []))
+            call_graph.update(actor_map)
+        calls = call_graph.calls
 
         # --------------------------------------------------------------
         # Render the hierarchy
@@ -86,7 +99,7 @@ class MarkdownRenderer(MeshResultRenderer):
             visited_global.add(agent)
 
             # ---- recurse to children ------------------------------------
-            for child in calls.get(agent, []):
+            for child in list(calls.get(agent, ())):
                 if child in visited_local:          # local cycle -> skip
                     continue
                 visited_local.add(child)
@@ -98,11 +111,9 @@ class MarkdownRenderer(MeshResultRenderer):
         lines.append("**Agent Calls**")
         lines.append("")
         for ui in user_interactions:
-            req_msg_id = ui.get("request_message_id")
-            if not req_msg_id:
-                continue
-            root_agent = msg_to_agent.get(req_msg_id)
-            if not root_agent:
+            # The request message lives in the conversation of the queried agent
+            root_agent = ui.get("agent_id")
+            if not ui.get("request_message_id") or not agent_msg_counts.get(root_agent):
                 continue
             # Start the walk only if we have never printed this root already.
             if root_agent not in visited_global:
@@ -1,4 +1,3 @@
-import itertools
 from typing import TYPE_CHECKING
 
 from lmflux.graphs.mesh.result_renderer import MeshResultRenderer
@@ -6,17 +5,113 @@ from lmflux.graphs.utils import show_markdown, IPYTHON_AVAILABLE
 
 if TYPE_CHECKING:  # executed only by type checkers, not at runtime
     from lmflux.graphs.mesh.definitions import MeshGraph
-    
+
 def short_id(prefix, counter):
     return f"{prefix}{counter}"
 
+class _AgentBlock:
+    """
+    The Mermaid lines of one agent sub-graph, extended with the new messages and interactions.
+    """
+    __slots__ = ("prefix", "messages", "lines", "message_ids", "consumed_messages",
+                 "consumed_incoming", "consumed_outgoing", "interaction_ids", "edges")
+
+    def __init__(self, prefix: str, messages: list):
+        self.prefix = prefix
+        self.messages = messages          # the actor map list the block was built from
+        self.lines = []
+        self.message_ids = {}             # message_id -> short id
+        self.consumed_messages = 0
+        self.consumed_incoming = 0
+        self.consumed_outgoing = 0
+        self.interaction_ids = []
+        self.edges = []                   # cross-agent edges, drawn after every sub-graph
+
+class _SessionDiagram:
+    __slots__ = ("blocks", "human_lines", "human_edges", "consumed_users")
+
+    def __init__(self):
+        self.blocks = {}
+        self.human_lines = []
+        self.human_edges = []
+        self.consumed_users = 0
+
 class MermaidRender(MeshResultRenderer):
+    def __init__(self, G:'MeshGraph'):
+        super().__init__(G)
+        # session id -> _SessionDiagram
+        self.__diagrams = {}
+
+    def forget_session(self, session_id: str):
+        super().forget_session(session_id)
+        self.__diagrams.pop(session_id, None)
+
+    def __update_block__(self, block: _AgentBlock, actor_map: dict):
+        messages = actor_map.get("messages", [])
+        for msg in messages[block.consumed_messages:]:
+            short_msg_id = short_id(block.prefix, block.consumed_messages)
+            block.message_ids[msg.message_id] = short_msg_id
+            block.lines.append(f'            {short_msg_id}["{msg.role}"]')
+            # connect sequential messages within the same agent
+            if block.consumed_messages:
+                block.lines.append(f'            {short_id(block.prefix, block.consumed_messages-1)} --> {short_msg_id}')
+            block.consumed_messages += 1
+
+        # Incoming - other agents talk *to* this one
+        incoming = actor_map.get("incoming_interactions_cross_agent", [])
+        for intc in incoming[block.consumed_incoming:]:
+            int_id = intc['interaction_id']
+            block.interaction_ids.append(f'{int_id}__in')
+            int_node_id = f'{int_id}__in'
+            int_label = f'talk to {intc["agent_a_id"]}'
+            block.lines.append(f'            {int_node_id}((\"{int_label}\"))')
+            req_msg = intc.get('agent_b_metadata', {}).get('request_message_id')
+            res_msg = intc.get('agent_b_metadata', {}).get('response_message_id')
+            if req_msg:
+                # If not found, use the original id - Mermaid will still render it.
+                req_msg_short_id = block.message_ids.get(req_msg, req_msg)
+                res_msg_short_id = block.message_ids.get(res_msg, res_msg)
+                block.lines.append(f'            {int_node_id} --> {req_msg_short_id}')
+                block.lines.append(f'            {res_msg_short_id} --> {int_node_id}')
+            block.consumed_incoming += 1
+
+        # Outgoing - this agent talks *to* another one. The request message only joins the
+        # conversation once the turn is over, an interaction waits for it to be drawn once.
+        outgoing = actor_map.get("outgoing_interactions_cross_agent", [])
+        for intc in outgoing[block.consumed_outgoing:]:
+            req_msg = intc.get('agent_a_metadata', {}).get('request_message_id')
+            if req_msg is None or req_msg not in block.message_ids:
+                break
+            int_id = intc['interaction_id']
+            block.interaction_ids.append(f'{int_id}__out')
+            int_node_id = f'{int_id}__out'
+            int_label = f'talk to {intc["agent_b_id"]}'
+            block.lines.append(f'            {int_node_id}((\"{int_label}\"))')
+            block.lines.append(f'            {block.message_ids[req_msg]} --> {int_node_id}')
+            block.edges.append(f'{int_id}__out <-.-> {int_id}__in')
+            block.consumed_outgoing += 1
+
+    def __update_humans__(self, diagram: _SessionDiagram, user_interactions: list):
+        # Finished interactions are drawn once, the one still running is left for a later render
+        for ui in user_interactions[diagram.consumed_users:]:
+            block = diagram.blocks.get(ui['agent_id'])
+            if block is None or ui['response_message_id'] is None:
+                break
+            req_agent_id = block.message_ids.get(ui['request_message_id'])
+            res_agent_id = block.message_ids.get(ui['response_message_id'])
+            if req_agent_id is None or res_agent_id is None:
+                break
+            human_req_id = short_id('hmsg', 2 * diagram.consumed_users)
+            human_res_id = short_id('hmsg', 2 * diagram.consumed_users + 1)
+            diagram.human_lines.append(f'        {human_req_id}["User Query"]')
+            diagram.human_lines.append(f'        {human_res_id}["User Response"]')
+            diagram.human_edges.append(f'        {human_req_id} -.-> {req_agent_id}')
+            diagram.human_edges.append(f'        {res_agent_id} -.-> {human_res_id}')
+            diagram.consumed_users += 1
+
     def build_mesh_response_meramid(self,):
         messages, user_interactions = self.__make_interactions_map__()
-        msg_counter = itertools.count()
-        interaction_ids = set()
-        global_interaction_edges = []                # edges drawn after all sub-graphs
-        actor_agent_message_id_map = {}
+        diagram = self.__diagrams.setdefault(self.G.session.session_id, _SessionDiagram())
         graph_lines = ["flowchart TB"]                # top-to-bottom layout
 
         graph_lines.append('    %% Global wrapper for all agents')
@@ -25,119 +120,39 @@ class MermaidRender(MeshResultRenderer):
 
         for actor_map in messages:
             agent_name = actor_map.get("actor")
-            subgraph_name = f'subgraph_{agent_name}'
-            graph_lines.append(f'        subgraph {subgraph_name}["{agent_name}"]')
-            #graph_lines.append('            style {} fill:#eef,stroke:#333'.format(subgraph_name))
-            
-            actor_agent_message_id_map[agent_name] = {}
-
-            previous_msg_id = None
-            # ------------------------------------------------------------------
-            # Agent's own messages
-            # ------------------------------------------------------------------
-            for msg in actor_map.get("messages", []):
-                short_msg_id = short_id('msg', next(msg_counter))
-                actor_agent_message_id_map[agent_name][msg.message_id] = short_msg_id
-                # Store the mapping if you later need the original IDs for debugging
-                # (optional, not printed in the diagram)
-                # original_to_short[msg.message_id] = short_msg_id
-
-                graph_lines.append(f'            {short_msg_id}["{msg.role}"]')
-                # connect sequential messages within the same agent
-                if previous_msg_id:
-                    graph_lines.append(f'            {previous_msg_id} --> {short_msg_id}')
-                previous_msg_id = short_msg_id
-
-            # ------------------------------------------------------------------
-            # Cross-agent interactions (both incoming & outgoing)
-            # ------------------------------------------------------------------
-            # Incoming - other agents talk *to* this one
-            for intc in actor_map.get("incoming_interactions_cross_agent", []):
-                int_id = intc['interaction_id']
-                interaction_ids.add(int_id)
-
-                # Draw a small rounded-box node for the interaction
-                int_node_id = f'{int_id}__in'
-                int_label = f'talk to {intc["agent_a_id"]}'
-                graph_lines.append(f'            {int_node_id}((\"{int_label}\"))')
-                # Edge from request message (inside this agent) to the interaction node
-                req_msg = intc.get('agent_b_metadata', {}).get('request_message_id')
-                res_msg = intc.get('agent_b_metadata', {}).get('response_message_id')
-                if req_msg:
-                    req_msg_short_id = actor_agent_message_id_map[agent_name].get(req_msg, req_msg)
-                    res_msg_short_id = actor_agent_message_id_map[agent_name].get(res_msg, res_msg)
-                    # Find the short id we generated for this request message
-                    # (simple lookup: assumes request_message_id is present in this actor’s messages)
-                    # If not found, use the original id - Mermaid will still render it.
-                    graph_lines.append(f'            {int_node_id} --> {req_msg_short_id}')
-                    graph_lines.append(f'            {res_msg_short_id} --> {int_node_id}')
-
-            # Outgoing - this agent talks *to* another one
-            for intc in actor_map.get("outgoing_interactions_cross_agent", []):
-                int_id = intc['interaction_id']
-                interaction_ids.add(int_id)
-
-                int_node_id = f'{int_id}__out'
-                int_label = f'talk to {intc["agent_b_id"]}'
-                graph_lines.append(f'            {int_node_id}((\"{int_label}\"))')
-                req_msg = intc.get('agent_a_metadata', {}).get('request_message_id')
-                if req_msg:
-                    req_msg_short_id = actor_agent_message_id_map[agent_name].get(req_msg, req_msg)
-                    graph_lines.append(f'            {req_msg_short_id} --> {int_node_id}')
-
-                global_interaction_edges.append(
-                    f'{int_id}__out <-.-> {int_id}__in'
-                )
+            block = diagram.blocks.get(agent_name)
+            if block is None or block.messages is not actor_map["messages"]:
+                # New agent, or its conversation was rewritten (e.g. by a context window)
+                prefix = block.prefix if block else f'a{len(diagram.blocks)}m'
+                block = diagram.blocks[agent_name] = _AgentBlock(prefix, actor_map["messages"])
+            self.__update_block__(block, actor_map)
+            graph_lines.append(f'        subgraph subgraph_{agent_name}["{agent_name}"]')
+            graph_lines.extend(block.lines)
             graph_lines.append('        end')          # close agent sub-graph
         graph_lines.append('    end')                # close ALL_AGENTS wrapper
 
         # ------------------------------------------------------------------
-        # Add a wrapper for the human (user) - place it before the ALL_AGENTS sub-graph
+        # Add a wrapper for the human (user)
         # ------------------------------------------------------------------
+        self.__update_humans__(diagram, user_interactions)
         graph_lines.append('    %% Global wrapper for humans')
-        human_subgraph = 'subgraph_human["Human"]'
-        graph_lines.append( f'    subgraph {human_subgraph}')
-        #graph_lines.append( '        style subgraph_human fill:#ffe,stroke:#333')
-        # We'll store short ids for the human messages in a temporary dict
-        human_msg_map = {}
-        for ui in user_interactions:
-            # human request node
-            human_req_id = short_id('hmsg', next(msg_counter))
-            human_res_id = short_id('hmsg', next(msg_counter))
-            
-            human_msg_map[ui['response_message_id']] = human_res_id
-            human_msg_map[ui['request_message_id']] = human_req_id
-            graph_lines.append(f'        {human_req_id}["User Query"]')
-            graph_lines.append(f'        {human_res_id}["User Response"]')
-            
-            req_agent_id = actor_agent_message_id_map[ui['agent_id']][ui['request_message_id']]
-            res_agent_id = actor_agent_message_id_map[ui['agent_id']][ui['response_message_id']]
-            
-            global_interaction_edges.append(f'        {human_req_id} -.-> {req_agent_id}')
-            global_interaction_edges.append(f'        {res_agent_id} -.-> {human_res_id}')
-            
-        # close the human sub-graph (after all agents are processed)
+        graph_lines.append('    subgraph subgraph_human["Human"]')
+        graph_lines.extend(diagram.human_lines)
         graph_lines.append('    end')   # close Human wrapper
 
         # ----------------------------------------------------------------------
-        # Optional styling for interaction nodes
+        # Styling for interaction nodes and global cross-agent edges (drawn only once)
         # ----------------------------------------------------------------------
-        #graph_lines.append('    classDef interaction fill:#f9f9f9,stroke:#555')
+        blocks = [diagram.blocks[actor_map.get("actor")] for actor_map in messages]
+        interaction_ids = [iid for block in blocks for iid in block.interaction_ids]
         graph_lines.append('    class ' + ', '.join(
-            f'{iid}__in' for iid in interaction_ids) + ' interaction')
+            iid for iid in interaction_ids if iid.endswith('__in')) + ' interaction')
         graph_lines.append('    class ' + ', '.join(
-            f'{iid}__out' for iid in interaction_ids) + ' interaction')
-
+            iid for iid in interaction_ids if iid.endswith('__out')) + ' interaction')
+        for block in blocks:
+            graph_lines.extend(block.edges)
+        graph_lines.extend(diagram.human_edges)
+        return "\n".join(graph_lines)
 
-        # ----------------------------------------------------------------------
-        # Global cross-agent interaction edges (drawn only once)
-        # ----------------------------------------------------------------------
-        graph_lines.extend(global_interaction_edges)
-        # ----------------------------------------------------------------------
-        # Produce final Mermaid source
-        # ----------------------------------------------------------------------
-        mermaid_chart = "\n".join(graph_lines)
-        return mermaid_chart
-    
     def render(self):
-        show_markdown(f"```mermaid\n{self.build_mesh_response_meramid()}\n```")
\ No newline at end of file
+        show_markdown(f"```mermaid\n{self.build_mesh_response_meramid()}\n```")
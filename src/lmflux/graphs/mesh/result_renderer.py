@@ -3,32 +3,72 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:  # executed only by type checkers, not at runtime
     from lmflux.graphs.mesh.definitions import MeshGraph
 
+class _ActorEntry:
+    """
+    The interactions map of one agent, kept between renders and extended with what is new.
+    """
+    __slots__ = ("actor_map", "messages_list")
+
+    def __init__(self, agent_id: str):
+        self.actor_map = {
+            "actor": agent_id,
+            "messages": [],
+            "incoming_interactions_cross_agent": [],
+            "outgoing_interactions_cross_agent": [],
+        }
+        self.messages_list = None  # the `Conversation.messages` list last read
+
+    def sync_messages(self, conversation):
+        messages = self.actor_map["messages"]
+        known = len(messages)
+        source = conversation.messages
+        # Append-only growth of the same list: only read the new messages
+        if (
+            source is self.messages_list and known <= len(source)
+            and (not known or source[known-1] is messages[-1])
+        ):
+            messages.extend(source[known:])
+        else:
+            self.actor_map["messages"] = list(source)
+            self.messages_list = source
+
 class MeshResultRenderer():
     def __init__(self, G:'MeshGraph'):
         self.G = G
-    
+        # session id -> agent id -> _ActorEntry
+        self.__entries = {}
+
+    def forget_session(self, session_id: str):
+        """
+        Drops the cached interaction maps of a session.
+        """
+        self.__entries.pop(session_id, None)
+
     def  __make_interactions_map__(self):
+        """
+        Per agent messages and incoming / outgoing interactions of the current session.
+
+        The maps are cached per session and agent, each call only reads the messages and
+        interactions that arrived since the previous one.
+        """
         G = self.G
-        messages = [
-            {
-                "actor": node[-1].get("obj").agent.agent_id,
-                "messages":[
-                    message
-                    for message in node[-1].get("obj").agent.llm.conversation
-                ],
-                "incoming_interactions_cross_agent":[
-                    x
-                    for _, x in G.agent_interactions.items() if x.get("agent_b_id") == node[-1].get("obj").agent.agent_id
-                ],
-                "outgoing_interactions_cross_agent":[
-                    x
-                    for _, x in G.agent_interactions.items() if x.get("agent_a_id") == node[-1].get("obj").agent.agent_id
-                ]
-            }
-            for node in G.G.nodes(data=True)
-        ]
+        session_id = G.session.session_id
+        interactions = G.agent_interactions
+        entries = self.__entries.setdefault(session_id, {})
+        messages = []
+        for _, data in G.G.nodes(data=True):
+            agent = data.get("obj").agent
+            entry = entries.get(agent.agent_id)
+            if entry is None:
+                entry = entries[agent.agent_id] = _ActorEntry(agent.agent_id)
+            entry.sync_messages(agent.llm.conversations.get(session_id))
+            incoming = entry.actor_map["incoming_interactions_cross_agent"]
+            incoming.extend(interactions.incoming(agent.agent_id, len(incoming)))
+            outgoing = entry.actor_map["outgoing_interactions_cross_agent"]
+            outgoing.extend(interactions.outgoing(agent.agent_id, len(outgoing)))
+            messages.append(entry.actor_map)
         user_interactions = G.user_interactions
         return (messages, user_interactions)
-    
+
     @abstractmethod
-    def render(self,): ...
\ No newline at end of file
+    def render(self,): ...
@@ -0,0 +1,107 @@
+from typing import TYPE_CHECKING
+import threading
+import time
+
+from lmflux.graphs.mesh.result_renderer import MeshResultRenderer
+from lmflux.logger import PipelinesLogger
+
+if TYPE_CHECKING:  # executed only by type checkers, not at runtime
+    from lmflux.graphs.mesh.definitions import MeshGraph
+
+class ThrottledRenderer(MeshResultRenderer):
+    """
+    Rate limited wrapper around another renderer.
+
+    `render` only records which session changed and returns, a background thread renders
+    at most once every ``min_interval`` seconds. Updates that arrive in between are
+    coalesced, so a burst of conversation updates costs a single render of the latest state.
+
+    Args:
+    - renderer (MeshResultRenderer): The renderer doing the actual work.
+    - min_interval (float): Minimum number of seconds between two renders.
+    """
+    def __init__(self, renderer: MeshResultRenderer, min_interval: float = 0.5):
+        super().__init__(renderer.G)
+        self.renderer = renderer
+        self.min_interval = min_interval
+        self.requested = 0
+        self.rendered = 0
+        self.__pending = {}  # session ids waiting for a render, in request order
+        self.__condition = threading.Condition()
+        self.__rendering = False
+        self.__closed = False
+        self.__last_render = 0.0
+        self.__thread = None
+
+    def forget_session(self, session_id: str):
+        with self.__condition:
+            self.__pending.pop(session_id, None)
+        self.renderer.forget_session(session_id)
+
+    def render(self):
+        session_id = self.G.session.session_id
+        with self.__condition:
+            self.requested += 1
+            self.__pending[session_id] = None
+            if self.__thread is None and not self.__closed:
+                self.__thread = threading.Thread(target=self.__worker__, daemon=True)
+                self.__thread.start()
+            self.__condition.notify_all()
+
+    def __take_pending__(self) -> list[str]:
+        session_ids = list(self.__pending)
+        self.__pending.clear()
+        self.__rendering = True
+        return session_ids
+
+    def __render_sessions__(self, session_ids: list[str]):
+        try:
+            for session_id in session_ids:
+                try:
+                    self.G.__render__(self.renderer, session_id)
+                except Exception as error:
+                    PipelinesLogger.get_instance().warn(f"Rendering the mesh result failed: {error}")
+        finally:
+            with self.__condition:
+                self.rendered += len(session_ids)
+                self.__rendering = False
+                self.__last_render = time.monotonic()
+                self.__condition.notify_all()
+
+    def __worker__(self):
+        while True:
+            with self.__condition:
+                while (not self.__pending or self.__rendering) and not self.__closed:
+                    self.__condition.wait()
+                if self.__closed:
+                    return
+                delay = self.__last_render + self.min_interval - time.monotonic()
+                if delay > 0:
+                    # Whatever arrives meanwhile is rendered together
+                    self.__condition.wait(delay)
+                    continue
+                session_ids = self.__take_pending__()
+            self.__render_sessions__(session_ids)
+
+    def flush(self):
+        """
+        Renders the pending updates right away, on the calling thread.
+        Do not call it from a conversation callback.
+        """
+        with self.__condition:
+            while self.__rendering:
+                self.__condition.wait()
+            session_ids = self.__take_pending__()
+        self.__render_sessions__(session_ids)
+
+    def close(self):
+        """
+        Renders what is pending and stops the background thread.
+        """
+        self.flush()
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+            thread = self.__thread
+        if thread is not None:
+            thread.join()
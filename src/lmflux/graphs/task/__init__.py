@@ -1 +1,2 @@
 from lmflux.graphs.task.definitions import transformer_task, agentic_task, TaskGraph
+from lmflux.graphs.task.checkpoints import CheckpointStore, DirectoryCheckpointStore, SQLiteCheckpointStore
@@ -0,0 +1,117 @@
+from lmflux.agents.sessions import ContextDelta
+
+from abc import ABC, abstractmethod
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+
+class CheckpointStore(ABC):
+    """
+    Records the `ContextDelta` of every node a `TaskGraph` run completes, so the run can be
+    resumed after a failure without executing those nodes again.
+
+    Deltas are pickled, only load checkpoints from a location you trust.
+    """
+    @abstractmethod
+    def save(self, run_id: str, node_name: str, delta: ContextDelta): ...
+
+    @abstractmethod
+    def load(self, run_id: str) -> list[tuple[str, ContextDelta]]:
+        """
+        Returns the ``(node_name, delta)`` records of a run in the order they were saved.
+        """
+
+    @abstractmethod
+    def delete(self, run_id: str): ...
+
+class DirectoryCheckpointStore(CheckpointStore):
+    """
+    Keeps one directory per run and one pickle file per completed node.
+
+    Args:
+    - path (str): Root directory of the checkpoints, created if missing.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__next_sequence = {}
+
+    def __run_directory__(self, run_id: str) -> str:
+        return os.path.join(self.path, run_id)
+
+    def save(self, run_id: str, node_name: str, delta: ContextDelta):
+        directory = self.__run_directory__(run_id)
+        with self.__lock:
+            if run_id not in self.__next_sequence:
+                os.makedirs(directory, exist_ok=True)
+                self.__next_sequence[run_id] = len(os.listdir(directory))
+            sequence = self.__next_sequence[run_id]
+            self.__next_sequence[run_id] += 1
+            file_path = os.path.join(directory, f"{sequence:08d}.pkl")
+            # Write then rename, a crash never leaves a truncated checkpoint behind
+            with open(f"{file_path}.tmp", "wb") as file:
+                pickle.dump((node_name, delta), file)
+            os.replace(f"{file_path}.tmp", file_path)
+
+    def load(self, run_id: str) -> list[tuple[str, ContextDelta]]:
+        directory = self.__run_directory__(run_id)
+        if not os.path.isdir(directory):
+            return []
+        records = []
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".pkl"):
+                continue
+            with open(os.path.join(directory, file_name), "rb") as file:
+                records.append(pickle.load(file))
+        return records
+
+    def delete(self, run_id: str):
+        with self.__lock:
+            self.__next_sequence.pop(run_id, None)
+            shutil.rmtree(self.__run_directory__(run_id), ignore_errors=True)
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Keeps the checkpoints of every run in a single sqlite database.
+
+    Args:
+    - path (str): Location of the sqlite database file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "sequence INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, node TEXT NOT NULL, delta BLOB NOT NULL)"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS checkpoints_run_id ON checkpoints (run_id)"
+            )
+
+    def save(self, run_id: str, node_name: str, delta: ContextDelta):
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT INTO checkpoints (run_id, node, delta) VALUES (?, ?, ?)",
+                (run_id, node_name, pickle.dumps(delta))
+            )
+
+    def load(self, run_id: str) -> list[tuple[str, ContextDelta]]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT node, delta FROM checkpoints WHERE run_id = ? ORDER BY sequence", (run_id,)
+            ).fetchall()
+        return [(node, pickle.loads(delta)) for node, delta in rows]
+
+    def delete(self, run_id: str):
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+
+    def close(self):
+        self.__connection.close()
@@ -1,11 +1,21 @@
-from lmflux.agents.sessions import Session
+from lmflux.agents.sessions import Session, Context, ContextDelta
 from lmflux.agents.structure import Agent
-from lmflux.agents.components import Context
+from lmflux.core.policies import ExecutionPolicy
 
 from lmflux.graphs.base.graph import NodeDefinition, Graph, NodeGroupDefinition
+from lmflux.graphs.task.plan import ExecutionPlan, compile_plan
+from lmflux.graphs.task.checkpoints import CheckpointStore
 from lmflux.utils.signature_checker import check_compatible
+from lmflux.utils.executors import check_executor, run_in_process
+from lmflux.core.conversations import session_scope
 
-import networkx as nx
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections.abc import Iterable, Iterator, Mapping
+from uuid import uuid4
+import contextvars
+import heapq
+import importlib
+import threading
 from abc import abstractmethod
 
 EXPECTED_TRANSFORMER_CALLBACK = [
@@ -17,10 +27,24 @@ EXPECTED_AGENTIC_CALLBACK = [
 ]
 
 class RunnableNodeDefinition(NodeDefinition):
-    def __execute__(self, session: Session):
+    policy: ExecutionPolicy = None
+
+    def __run_steps__(self, session: Session):
         self.pre_run(session)
         self.run(session)
         self.post_run(session)
+    def __execute__(self, session: Session):
+        if self.policy is None:
+            self.__run_steps__(session)
+            return
+        # Every attempt works on its own fork of the session context, so failed or losing
+        # attempts leave no trace in the context. Side effects outside of it are not undone:
+        # the attempts of an AgenticTask all append to the same agent conversation.
+        def attempt() -> Session:
+            branch = session.fork()
+            self.__run_steps__(branch)
+            return branch
+        session.merge(self.policy.execute(attempt))
     @abstractmethod
     def pre_run(self, session: Session) -> None:
         ...
@@ -31,10 +55,39 @@ class RunnableNodeDefinition(NodeDefinition):
     def run(self, session: Session) -> None:
         ...
     
+def _load_transformer_task(name: str, module: str, qualname: str) -> 'TransformerTask':
+    target = importlib.import_module(module)
+    for attribute in qualname.split("."):
+        target = getattr(target, attribute)
+    if isinstance(target, TransformerTask):
+        return target
+    return TransformerTask(name, target)
+
+def _run_transformer_in_process(
+    name: str, module: str, qualname: str, session: Session
+) -> ContextDelta:
+    # The task travels by reference, the worker imports it (or its callback) from its module
+    task = _load_transformer_task(name, module, qualname)
+    # Unpickled forks lose their link to the base they were taken from, fork again here
+    branch = session.fork()
+    task.run_callback(branch)
+    return branch.context.delta()
+
 class TransformerTask(RunnableNodeDefinition):
-    def __init__(self, name: str, run_callback:callable):
+    """
+    Node running ``run_callback(session)``.
+
+    With ``executor="process"`` the callback runs in the shared process pool on a copy of
+    the session, and what it changed in the context is applied back to the session. The
+    callback must be defined at module level and the context values must be picklable.
+    """
+    def __init__(self, name: str, run_callback:callable, policy:ExecutionPolicy=None, executor:str=None):
         super().__init__(name)
+        self.policy = policy
+        self.executor = check_executor(executor)
         self.run_callback = check_compatible(run_callback, "run", EXPECTED_TRANSFORMER_CALLBACK)
+        if executor == "process" and "<locals>" in run_callback.__qualname__:
+            raise ValueError("Tasks running in a process must be defined at module level")
     def defines_sub_graph(self) -> bool:
         return False
     def pre_run(self, session: Session) -> None:
@@ -42,12 +95,20 @@ class TransformerTask(RunnableNodeDefinition):
     def post_run(self, session: Session) -> None:
         pass
     def run(self, session: Session) -> None:
+        if self.executor == "process":
+            delta = run_in_process(
+                _run_transformer_in_process, self.name,
+                self.run_callback.__module__, self.run_callback.__qualname__, session.fork()
+            )
+            session.context.apply(delta)
+            return
         self.run_callback(session)
 
 class AgenticTask(RunnableNodeDefinition):
-    def __init__(self, name: str, agent: Agent, run_callback:callable):
+    def __init__(self, name: str, agent: Agent, run_callback:callable, policy:ExecutionPolicy=None):
         super().__init__(name)
         self.agent = agent
+        self.policy = policy
         self.run_callback = check_compatible(run_callback, "run", EXPECTED_AGENTIC_CALLBACK)
     def defines_sub_graph(self) -> bool:
         return False
@@ -64,66 +125,280 @@ class TaskGraph(Graph):
     # -------------
     def __init__(self):
         super().__init__(draw_labels_around=True)
+        self.__plan = None
+        self.__plan_version = None
     
     # -------------
     #  Public API 
     # -------------
     
-    def run(self, with_context:Context=None) -> Session:
+    def compile(self) -> ExecutionPlan:
         """
-        Execute every node of the graph respecting the directed edges.
-        Cycles raise a ``RuntimeError``.
+        Returns the execution plan of the graph. It is computed once and reused until
+        the graph is modified (``connect_tasks`` / ``__add_node__``).
+        """
+        if self.__plan is None or self.__plan_version != self.version:
+            self.__plan = compile_plan(self.G, RunnableNodeDefinition)
+            self.__plan_version = self.version
+        return self.__plan
+    
+    def __execute_node__(self, node: RunnableNodeDefinition, session: Session, checkpoint: callable = None):
+        """
+        Runs a node on ``session``. With a checkpoint callback the node runs on a fork of the
+        session and ``checkpoint(node, branch)`` folds the fork back and records its delta.
         """
+        if checkpoint is None:
+            node.__execute__(session)
+            return
+        branch = session.fork()
+        node.__execute__(branch)
+        checkpoint(node, branch)
+    
+    def __make_checkpoint__(self, session: Session, checkpoint_store: CheckpointStore) -> callable:
+        lock = threading.Lock()
+        def checkpoint(node: RunnableNodeDefinition, branch: Session):
+            delta = branch.context.delta()
+            # Applied and saved together, so replaying the checkpoints follows the same order
+            with lock:
+                session.context.apply(delta)
+                checkpoint_store.save(session.session_id, node.name, delta)
+        return checkpoint
+    
+    def __run_parallel__(
+        self, plan: ExecutionPlan, session: Session, max_concurrency: int,
+        completed: set = frozenset(), checkpoint: callable = None
+    ):
+        """
+        Runs each node as soon as all of its predecessors finished, at most
+        ``max_concurrency`` at a time. Ready nodes start in topological order,
+        nodes whose name is in ``completed`` are skipped.
+        """
+        pending_predecessors = list(plan.predecessor_counts)
+        ready = [index for index, count in enumerate(pending_predecessors) if count == 0]
+        heapq.heapify(ready)
+        running = {}
+        # Agentic nodes of one agent all converse in its conversation, they take turns so
+        # their messages do not interleave
+        agent_locks = {
+            node.agent: threading.Lock() for node in plan.nodes if isinstance(node, AgenticTask)
+        }
+
+        def execute(node: RunnableNodeDefinition):
+            if not isinstance(node, AgenticTask):
+                self.__execute_node__(node, session, checkpoint)
+                return
+            with agent_locks[node.agent]:
+                self.__execute_node__(node, session, checkpoint)
+
+        def finish(index: int):
+            for successor in plan.successors[index]:
+                pending_predecessors[successor] -= 1
+                if pending_predecessors[successor] == 0:
+                    heapq.heappush(ready, successor)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            while ready or running:
+                while ready and len(running) < max_concurrency:
+                    index = heapq.heappop(ready)
+                    if plan.nodes[index].name in completed:
+                        finish(index)
+                        continue
+                    # Nodes see the session scope of the caller, e.g. the record of `run_many`
+                    future = executor.submit(contextvars.copy_context().run, execute, plan.nodes[index])
+                    running[future] = index
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    # Re-raises the node failure, nodes already running are allowed to finish
+                    future.result()
+                    finish(index)
+    
+    def __run_plan__(
+        self, plan: ExecutionPlan, with_context:Context, max_concurrency:int,
+        checkpoint_store: CheckpointStore = None, resume_from: str = None, run_id: str = None
+    ) -> Session:
         if with_context:
             session=Session(with_context)
         else:
             session = Session()
-        try:
-            order = list(nx.topological_sort(self.G))
-        except nx.NetworkXUnfeasible as exc:  # pragma: no cover
-            raise RuntimeError(
-                "The task graph contains a cycle and cannot be executed."
-            ) from exc
-
-        for nid in order:
-            obj: RunnableNodeDefinition = self.G.nodes[nid]["obj"]
-            if not isinstance(obj, RunnableNodeDefinition):
-                raise RuntimeError(
-                    f"Node {nid} is not of type RunnableNodeDefinition."
-                )
-            obj.__execute__(session)
+        if run_id:
+            session.session_id = run_id
+        completed = set()
+        checkpoint = None
+        if checkpoint_store is not None:
+            if resume_from:
+                session.session_id = resume_from
+                for node_name, delta in checkpoint_store.load(resume_from):
+                    session.context.apply(delta)
+                    completed.add(node_name)
+            else:
+                # A fresh run starts over, records left by an earlier run with this id would
+                # otherwise be replayed twice on resume
+                checkpoint_store.delete(session.session_id)
+            checkpoint = self.__make_checkpoint__(session, checkpoint_store)
+        if max_concurrency > 1:
+            self.__run_parallel__(plan, session, max_concurrency, completed, checkpoint)
+            return session
+        for node in plan.nodes:
+            if node.name not in completed:
+                self.__execute_node__(node, session, checkpoint)
         return session
+    
+    def run(
+        self, with_context:Context=None, max_concurrency:int=1,
+        checkpoint_store: CheckpointStore = None, resume_from: str = None, run_id: str = None
+    ) -> Session:
+        """
+        Execute every node of the graph respecting the directed edges.
+        Cycles raise a ``RuntimeError``.
+
+        With ``max_concurrency`` > 1 independent branches run in parallel on a thread pool,
+        every node starts as soon as its predecessors are done. Agentic nodes sharing an
+        agent still run one at a time, since they append to the same conversation.
+
+        With a ``checkpoint_store`` the changes each node makes to the session are saved as
+        soon as the node completes, under the run id: ``run_id`` when given, a new
+        ``session.session_id`` otherwise. Pass your own ``run_id`` to be able to resume a run
+        that raised. A run that does not resume discards the checkpoints already stored
+        under its id. Calling ``run`` again with ``resume_from=<run id>`` (and the same
+        ``with_context``) restores those changes and skips the nodes that already completed.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if resume_from and checkpoint_store is None:
+            raise ValueError("resume_from requires a checkpoint_store")
+        if resume_from and run_id and resume_from != run_id:
+            raise ValueError("A resumed run keeps its run id, run_id must match resume_from")
+        return self.__run_plan__(
+            self.compile(), with_context, max_concurrency, checkpoint_store, resume_from, run_id
+        )
+    
+    def __run_record__(
+        self, plan: ExecutionPlan, context: Context, max_concurrency: int, agents: set[Agent]
+    ) -> Session:
+        """
+        Runs one record of `run_many` in its own conversation scope, the record id doubles
+        as the session id. The conversations the agents held for it are dropped afterwards.
+        """
+        record_id = str(uuid4())
+        try:
+            with session_scope(record_id):
+                return self.__run_plan__(plan, context, max_concurrency, run_id=record_id)
+        finally:
+            for agent in agents:
+                agent.llm.conversations.drop(record_id)
+    
+    def run_many(
+        self, contexts: Iterable[Context | Mapping], max_workers:int=4, max_concurrency:int=1
+    ) -> Iterator[Session]:
+        """
+        Runs the graph once per input context and yields the result sessions as they complete.
+
+        The execution plan is compiled once for the whole batch. Inputs are pulled lazily
+        from ``contexts`` and at most ``max_workers`` records are in flight: when a record
+        finishes the next input is submitted, then the finished session is yielded.
+
+        Every record converses in a conversation of its own (see `session_scope`), records
+        running side by side never see each other's messages. Those conversations are
+        dropped when the record completes, the agents' shared conversation is left untouched.
+
+        Args:
+            contexts (Iterable[Context | Mapping]): Starting context of each run, plain mappings are accepted.
+            max_workers (int): Records processed at the same time.
+            max_concurrency (int): Nodes of a single record allowed to run in parallel.
+        """
+        if max_workers < 1 or max_concurrency < 1:
+            raise ValueError("max_workers and max_concurrency must be at least 1")
+        plan = self.compile()
+        agents = {node.agent for node in plan.nodes if isinstance(node, AgenticTask)}
+        inputs = iter(contexts)
+
+        def submit_next(executor: ThreadPoolExecutor, running: set) -> bool:
+            for context in inputs:
+                if isinstance(context, Mapping):
+                    mapping, context = context, Context()
+                    for key, value in mapping.items():
+                        context.set(key, value)
+                running.add(executor.submit(self.__run_record__, plan, context, max_concurrency, agents))
+                return True
+            return False
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while len(running) < max_workers and submit_next(executor, running):
+                pass
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    session = future.result()
+                    submit_next(executor, running)
+                    yield session
 
     def connect_tasks(self, task_a:RunnableNodeDefinition, task_b:RunnableNodeDefinition):
-        definition_a = self.__find_object_in_graph_by_name__(task_a.name)
-        definition_b = self.__find_object_in_graph_by_name__(task_b.name)
-        
-        if not definition_a:
-            self.__add_node__(task_a)
-        if not definition_b:
-            self.__add_node__(task_b)
+        definition_a = self.__resolve_node__(task_a)
+        definition_b = self.__resolve_node__(task_b)
 
         _metadata = {}
-        self.__add_edge__(task_a, task_b, _metadata=_metadata)
+        self.__add_edge__(definition_a, definition_b, _metadata=_metadata)
+    
+    def connect_tasks_from(self, edges: Iterable[tuple[RunnableNodeDefinition, RunnableNodeDefinition]]):
+        """
+        Bulk version of ``connect_tasks``, builds graphs with thousands of nodes in linear time.
+        """
+        self.add_edges_from(edges)
+    
+    @classmethod
+    def from_adjacency(cls, adjacency: Mapping[RunnableNodeDefinition, Iterable[RunnableNodeDefinition]]) -> 'TaskGraph':
+        """
+        Builds a graph from ``{task: [tasks that run after it]}``.
+        Tasks without successors can be listed with an empty iterable.
+        """
+        graph = cls()
+        for task in adjacency:
+            graph.__resolve_node__(task)
+        graph.add_edges_from(
+            (task, successor)
+            for task, successors in adjacency.items()
+            for successor in successors
+        )
+        return graph
 
 # -------------
 #  Decorators
 # -------------
-def transformer_task(func:callable):
+def transformer_task(func:callable=None, *, policy:ExecutionPolicy=None, executor:str=None):
     """
     Decorator for creating an TransformerTask.
+    ``executor="process"`` runs CPU-bound tasks in the shared process pool.
 
     Usage:
         @transformer_task
         def my_task(session: Session):
             ...
+
+        @transformer_task(policy=ExecutionPolicy(timeout=30, retry=RetryPolicy()))
+        def my_guarded_task(session: Session):
+            ...
+
+        @transformer_task(executor="process")
+        def my_cpu_bound_task(session: Session):
+            ...
     """
-    check_compatible(func, "run", EXPECTED_TRANSFORMER_CALLBACK)
-    return TransformerTask(func.__name__, func)
+    def decorator(func: callable):
+        check_compatible(func, "run", EXPECTED_TRANSFORMER_CALLBACK)
+        return TransformerTask(func.__name__, func, policy=policy, executor=executor)
+    if func is None:
+        return decorator
+    return decorator(func)
 
-def agentic_task(agent: Agent):
+def agentic_task(agent: Agent, policy:ExecutionPolicy=None):
     """
     Decorator for creating an AgenticTask with a specific agent.
+    The optional ``policy`` bounds the node with timeouts, retries, hedging or a circuit breaker.
+    Retried and hedged attempts all append to the same agent conversation, so prefer
+    timeouts and retries over hedging for agentic tasks.
 
     Usage:
         @agentic_task(my_agent)
@@ -132,5 +407,5 @@ def agentic_task(agent: Agent):
     """
     def decorator(func: callable):
         check_compatible(func, "run", EXPECTED_AGENTIC_CALLBACK)
-        return AgenticTask(func.__name__, agent, func)
-    return decorator
\ No newline at end of file
+        return AgenticTask(func.__name__, agent, func, policy=policy)
+    return decorator
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # executed only by type checkers, not at runtime
+    import networkx as nx
+    from lmflux.graphs.task.definitions import RunnableNodeDefinition
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    A task graph frozen into flat, index based structures.
+
+    - ``nodes``: runnable nodes in topological order, every other field refers to their index.
+    - ``predecessor_counts``: number of incoming edges of each node.
+    - ``successors``: indices of the nodes that depend on each node.
+    - ``levels``: groups of nodes whose predecessors all live in earlier levels.
+    """
+    nodes: tuple[RunnableNodeDefinition, ...]
+    predecessor_counts: tuple[int, ...]
+    successors: tuple[tuple[int, ...], ...]
+    levels: tuple[tuple[int, ...], ...]
+
+    def __len__(self):
+        return len(self.nodes)
+
+def compile_plan(G: nx.DiGraph, runnable_type: type) -> ExecutionPlan:
+    """
+    Kahn's algorithm over the adjacency of ``G``, nodes of the same level keep insertion order.
+
+    Raises:
+        RuntimeError: If the graph has a cycle or a node is not a ``runnable_type``.
+    """
+    in_degree = {nid: len(G.pred[nid]) for nid in G.nodes}
+    level_of = {}
+    queue = deque(nid for nid, degree in in_degree.items() if degree == 0)
+    for nid in queue:
+        level_of[nid] = 0
+    order = []
+    remaining = dict(in_degree)
+    while queue:
+        nid = queue.popleft()
+        order.append(nid)
+        for successor in G.succ[nid]:
+            level_of[successor] = max(level_of.get(successor, 0), level_of[nid] + 1)
+            remaining[successor] -= 1
+            if remaining[successor] == 0:
+                queue.append(successor)
+    if len(order) != len(in_degree):
+        raise RuntimeError(
+            "The task graph contains a cycle and cannot be executed."
+        )
+
+    index = {nid: position for position, nid in enumerate(order)}
+    nodes = []
+    for nid in order:
+        obj = G.nodes[nid]["obj"]
+        if not isinstance(obj, runnable_type):
+            raise RuntimeError(
+                f"Node {nid} is not of type {runnable_type.__name__}."
+            )
+        nodes.append(obj)
+
+    levels = {}
+    for nid in order:
+        levels.setdefault(level_of[nid], []).append(index[nid])
+    return ExecutionPlan(
+        nodes=tuple(nodes),
+        predecessor_counts=tuple(in_degree[nid] for nid in order),
+        successors=tuple(
+            tuple(sorted(index[successor] for successor in G.succ[nid]))
+            for nid in order
+        ),
+        levels=tuple(tuple(levels[level]) for level in sorted(levels)),
+    )
@@ -12,6 +12,7 @@ def show_markdown(markdown, flush=False):
     """
     if not IPYTHON_AVAILABLE:
         print(markdown, flush=flush)
+        return
     clear_output(True)
     display(Markdown(markdown))
 
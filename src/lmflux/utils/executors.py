@@ -0,0 +1,66 @@
+"""
+A process pool shared by the CPU-bound tools and tasks (``executor="process"``).
+
+Work sent to the pool is pickled: functions travel by reference (module and qualified
+name), so they must be defined at the top level of an importable module, and arguments
+and results must be picklable.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import atexit
+import functools
+import threading
+
+EXECUTORS = (None, "process")  # None runs inline, on the calling thread
+
+_pool: ProcessPoolExecutor = None
+_pool_lock = threading.Lock()
+_max_workers: int = None
+
+def check_executor(executor: str) -> str:
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+    return executor
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    The shared pool, created on first use and shut down when the interpreter exits.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_max_workers)
+        return _pool
+
+def configure_process_pool(max_workers: int = None):
+    """
+    Sets the size of the shared pool, a running pool is replaced once its work is done.
+
+    Args:
+    - max_workers (int, optional): Number of worker processes, None means one per CPU.
+    """
+    global _max_workers
+    _max_workers = max_workers
+    shutdown_process_pool()
+
+def shutdown_process_pool(wait: bool = True):
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+def run_in_process(func: callable, *args, **kwargs):
+    """
+    Runs ``func(*args, **kwargs)`` in the shared pool and waits for the result.
+    Exceptions raised in the worker are raised here.
+    """
+    return get_process_pool().submit(func, *args, **kwargs).result()
+
+async def arun_in_process(func: callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_pool(), functools.partial(func, *args, **kwargs)
+    )
+
+atexit.register(shutdown_process_pool)
@@ -0,0 +1,42 @@
+"""
+JSON encoding and decoding through the fastest backend available.
+
+`orjson` is used when installed, then `msgspec`, and the standard library `json` otherwise.
+Every backend raises `ValueError` on malformed input and `dumps` always returns a `str`.
+"""
+import json
+
+try:
+    import orjson  # type: ignore
+    BACKEND = "orjson"
+except ImportError:
+    orjson = None
+    try:
+        import msgspec  # type: ignore
+        BACKEND = "msgspec"
+    except ImportError:
+        msgspec = None
+        BACKEND = "json"
+
+def loads(data: str | bytes):
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+    return json.loads(data)
+
+def dumps(obj, sort_keys: bool = False) -> str:
+    """
+    Serializes ``obj``, values the backend does not know are converted with `str`.
+    """
+    if BACKEND == "orjson":
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+    if BACKEND == "msgspec":
+        return msgspec.json.encode(
+            obj, enc_hook=str, order="sorted" if sort_keys else None
+        ).decode("utf-8")
+    return json.dumps(obj, default=str, sort_keys=sort_keys, ensure_ascii=False)
@@ -0,0 +1,112 @@
+from collections.abc import MutableMapping
+
+_MISSING = object()
+_DELETED = object()  # tombstone hiding a key that still lives in a parent layer
+
+MAX_LAYERS = 32
+
+class LayeredDict(MutableMapping):
+    """
+    A dict with O(1) copy-on-write forks.
+
+    The data lives in a chain of layers: a private ``local`` dict that receives every
+    write, on top of a tuple of frozen parent layers shared with other forks. Forking
+    freezes the current local layer and gives both sides a fresh one, so nothing is
+    copied and each side only pays memory for the keys it writes afterwards.
+
+    Values themselves are shared between forks, replace them instead of mutating them
+    in place when a fork must not see the change.
+    """
+    __slots__ = ("_local", "_parents")
+
+    def __init__(self, data=None, _parents: tuple = ()):
+        self._local = dict(data) if data else {}
+        self._parents = _parents
+
+    @classmethod
+    def snapshot_of(cls, data) -> 'LayeredDict':
+        """
+        Builds a layered dict over a shallow snapshot of any mapping.
+        """
+        if isinstance(data, LayeredDict):
+            return data.fork()
+        return cls(_parents=(dict(data),))
+
+    def __lookup__(self, key):
+        value = self._local.get(key, _MISSING)
+        if value is _MISSING:
+            for layer in self._parents:
+                value = layer.get(key, _MISSING)
+                if value is not _MISSING:
+                    break
+        return value
+
+    def __getitem__(self, key):
+        value = self.__lookup__(key)
+        if value is _MISSING or value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+
+    def __delitem__(self, key):
+        self[key]  # raises KeyError when missing
+        if self._parents:
+            self._local[key] = _DELETED
+        else:
+            del self._local[key]
+
+    def __contains__(self, key):
+        value = self.__lookup__(key)
+        return value is not _MISSING and value is not _DELETED
+
+    def __iter__(self):
+        seen = set()
+        for layer in (self._local, *self._parents):
+            for key, value in layer.items():
+                if key in seen:
+                    continue
+                seen.add(key)
+                if value is not _DELETED:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def owns(self, key) -> bool:
+        """
+        True when ``key`` was written to this fork's private layer.
+        """
+        value = self._local.get(key, _MISSING)
+        return value is not _MISSING and value is not _DELETED
+
+    def fork(self) -> 'LayeredDict':
+        if self._local:
+            self._parents = (self._local, *self._parents)
+            self._local = {}
+        if len(self._parents) > MAX_LAYERS:
+            self._parents = (self.to_dict(),)
+        return LayeredDict(_parents=self._parents)
+
+    def changed_keys(self, base: 'LayeredDict') -> set:
+        """
+        Keys that may differ from ``base``, a fork taken earlier from the same chain.
+        Only the layers written after ``base`` was taken are scanned.
+        """
+        base_layers = {id(layer) for layer in base._parents}
+        keys = set()
+        for layer in (self._local, *self._parents):
+            if id(layer) not in base_layers:
+                keys.update(layer)
+        return keys
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self}
+
+    def __reduce__(self):
+        # Tombstones are identity based, always serialize the flattened view
+        return (LayeredDict, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"LayeredDict({self.to_dict()})"
@@ -1,4 +1,7 @@
+import json
 import unittest
+import pickle
+import threading
 from lmflux.agents.sessions import Context, Session
 
 class TestContext(unittest.TestCase):
@@ -46,6 +49,106 @@ class TestContext(unittest.TestCase):
         context.set_cumulative("key", "value")
         self.assertEqual(context.get_cumulative("key"), ["value"])
 
+    def test_clone_context_copies_cumulative(self):
+        original_context = Context()
+        original_context.set_cumulative("key", "value")
+        context = Context()
+        context.clone_context(original_context)
+        self.assertEqual(context.get_cumulative("key"), ["value"])
+
+    def test_concurrent_set_cumulative_and_compute(self):
+        context = Context()
+        def work():
+            for i in range(200):
+                context.set_cumulative("items", i)
+                context.compute("counter", lambda value: value + 1, default=0)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(context.get_cumulative("items")), 800)
+        self.assertEqual(context.get("counter"), 800)
+
+    def test_clone_holds_the_source_lock(self):
+        # Snapshotting forks the source layers, it must not race a writer of the source
+        source = Context()
+        source.set("key", "value")
+        clone = Context()
+        cloner = threading.Thread(target=clone.clone_context, args=(source,))
+        with source._lock:
+            cloner.start()
+            cloner.join(0.1)
+            self.assertTrue(cloner.is_alive())
+            source.set("late", True)
+        cloner.join(5)
+        self.assertFalse(cloner.is_alive())
+        self.assertEqual(clone.get_context().to_dict(), {"key": "value", "late": True})
+        source.set("after", True)
+        self.assertIsNone(clone.get("after"))
+
+    def test_fork_and_merge(self):
+        context = Context()
+        context.set("shared", 0)
+        context.set("to_remove", 1)
+        context.set_cumulative("log", "start")
+        left, right = context.fork(), context.fork()
+        left.set("shared", "left")
+        left.set_cumulative("log", "left")
+        right.set("shared", "right")
+        right.remove("to_remove")
+        right.set_cumulative("log", "right")
+        # The merge result only depends on the argument order
+        context.merge(left, right)
+        self.assertEqual(context.get("shared"), "right")
+        self.assertIsNone(context.get("to_remove"))
+        self.assertEqual(context.get_cumulative("log"), ["start", "left", "right"])
+
+    def test_delta_round_trip(self):
+        context = Context()
+        context.set("kept", 1)
+        context.set("to_remove", 1)
+        branch = context.fork()
+        branch.set("new", 2)
+        branch.set("kept", 1)
+        branch.remove("to_remove")
+        branch.set_cumulative("log", "branch")
+        delta = pickle.loads(pickle.dumps(branch.delta()))
+        self.assertEqual(delta.values, {"new": 2})
+        self.assertEqual(delta.removed, ["to_remove"])
+        self.assertEqual(delta.appended, {"log": ["branch"]})
+        context.apply(delta)
+        self.assertEqual(context.get("new"), 2)
+        self.assertIsNone(context.get("to_remove"))
+        self.assertEqual(context.get_cumulative("log"), ["branch"])
+
+    def test_merge_requires_fork(self):
+        with self.assertRaises(ValueError):
+            Context().merge(Context())
+
+    def test_clone_context_is_copy_on_write(self):
+        document = {"text": "large"}
+        original_context = Context()
+        original_context.set("document", document)
+        original_context.set_cumulative("log", "start")
+        context = Context()
+        context.clone_context(original_context)
+        # Values are shared, nothing was copied
+        self.assertIs(context.get("document"), document)
+        context.set("document", None)
+        context.set_cumulative("log", "clone")
+        original_context.set_cumulative("log", "original")
+        self.assertIs(original_context.get("document"), document)
+        self.assertEqual(context.get_cumulative("log"), ["start", "clone"])
+        self.assertEqual(original_context.get_cumulative("log"), ["start", "original"])
+
+    def test_pickle(self):
+        context = Context()
+        context.set("key", "value")
+        restored = pickle.loads(pickle.dumps(context))
+        restored.set("other", 1)
+        self.assertEqual(restored.get("key"), "value")
+
 class TestSession(unittest.TestCase):
     def test_init(self):
         session = Session()
@@ -57,5 +160,23 @@ class TestSession(unittest.TestCase):
         session = Session(starting_context)
         self.assertEqual(session.context_as_dict(), {"key": "value"})
 
+    def test_context_as_dict_is_a_plain_dict(self):
+        session = Session()
+        session.set("key", "value")
+        branch = session.fork()
+        branch.set("other", 1)
+        self.assertIs(type(branch.context_as_dict()), dict)
+        self.assertEqual(json.loads(json.dumps(branch.context_as_dict())), {"key": "value", "other": 1})
+        self.assertEqual(str(branch.context), "Context[{'other': 1, 'key': 'value'}]")
+
+    def test_fork_and_merge(self):
+        session = Session()
+        branch = session.fork()
+        branch.set("key", "value")
+        self.assertEqual(branch.session_id, session.session_id)
+        self.assertIsNone(session.get("key"))
+        session.merge(branch)
+        self.assertEqual(session.get("key"), "value")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
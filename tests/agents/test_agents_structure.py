@@ -1,10 +1,11 @@
 import unittest
 from unittest.mock import Mock
-from lmflux.core.components  import Tool, Message, SystemPrompt
+from lmflux.core.components  import Tool, Message, SystemPrompt, Conversation
 from lmflux.core.llms import LLMModel
 from lmflux.core.llm_impl import EchoLLM
 from lmflux.agents.structure import Agent
 from lmflux.agents.sessions import Session
+from lmflux.core.conversations import session_scope
 
 class NopAgent(Agent):
     def reset_agent_state():
@@ -51,6 +52,45 @@ class TestAgent(unittest.TestCase):
             [message],
             True
         )
+
+    def test_conversations_are_shared_by_default(self):
+        agent = NopAgent()
+        session_a, session_b = Session(), Session()
+        agent.conversate(Message('user', 'first'), session_a)
+        agent.conversate(Message('user', 'second'), session_b)
+        self.assertEqual(len(agent.llm.conversation), 5)
+        self.assertIs(agent.get_conversation(session_a), agent.llm.conversation)
+        # Nothing is kept per session unless a caller opts in
+        self.assertEqual(agent.llm.conversations.session_ids(), [None])
+        agent.reset_state()
+        self.assertEqual(len(agent.llm.conversation), 1)
+
+    def test_conversations_are_kept_per_session_in_a_scope(self):
+        agent = NopAgent()
+        session_a, session_b = Session(), Session()
+        for session, text in [(session_a, 'first'), (session_b, 'second'), (session_a, 'third')]:
+            with session_scope(session.session_id):
+                agent.conversate(Message('user', text), session)
+        self.assertEqual(len(agent.get_conversation(session_a)), 5)
+        self.assertEqual(len(agent.get_conversation(session_b)), 3)
+        self.assertEqual(len(agent.llm.conversation), 1)
+
+    def test_conversation_callback_receives_its_session(self):
+        agent = NopAgent()
+        seen = []
+        def on_update(agent: Agent, conversation: Conversation, session: Session):
+            seen.append(session)
+        agent.add_conversation_update_callback(on_update)
+        sessions = [Session(), Session()]
+        for session in sessions:
+            agent.conversate(Message('user', 'hi'), session)
+        self.assertEqual(seen, sessions)
+
+class TestAgentAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_aconversate(self):
+        agent = NopAgent()
+        message = await agent.aconversate(Message('user', 'something'), Session())
+        self.assertEqual(message.content, 'something')
         
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import tempfile
+import time
+
+from lmflux.core.cache import (
+    LRUCache, InMemoryResponseCache, SQLiteResponseCache, make_request_fingerprint
+)
+from lmflux.core.components import SystemPrompt, Message, LLMOptions
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprint_is_stable(self):
+        messages = [{"role": "user", "content": "hi"}]
+        a = make_request_fingerprint("m", messages, None, {"temperature": 0, "top_p": 1})
+        b = make_request_fingerprint("m", messages, None, {"top_p": 1, "temperature": 0})
+        c = make_request_fingerprint("m", messages, None, {"temperature": 1})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+class TestLRUCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 2})
+
+    def test_ttl(self):
+        cache = LRUCache(ttl=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+class TestSQLiteResponseCache(unittest.TestCase):
+    def test_persists_between_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite")
+            cache = SQLiteResponseCache(path)
+            cache.put("key", {"role": "assistant", "content": "hi"})
+            cache.close()
+            cache = SQLiteResponseCache(path)
+            self.assertEqual(cache.get("key"), {"role": "assistant", "content": "hi"})
+            self.assertIsNone(cache.get("other"))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+            cache.close()
+
+    def test_max_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SQLiteResponseCache(os.path.join(directory, "cache.sqlite"), max_size=1)
+            cache.put("a", {})
+            time.sleep(0.01)
+            cache.put("b", {})
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), {})
+            cache.close()
+
+class TestEndpointResponseCache(unittest.TestCase):
+    @patch('openai.OpenAI')
+    def test_repeated_request_skips_network(self, mock_openai):
+        raw_message = MagicMock()
+        raw_message.role = "assistant"
+        raw_message.content = "cached answer"
+        raw_message.reasoning_content = None
+        raw_message.tool_calls = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=raw_message)])
+        mock_openai.return_value = mock_client
+
+        cache = InMemoryResponseCache()
+        responses = []
+        for _ in range(2):
+            endpoint = OpenAICompatibleEndpoint(
+                "model-id", SystemPrompt(), options=LLMOptions(temperature=0), response_cache=cache
+            )
+            responses.append(endpoint.chat(Message("user", "hi")))
+
+        self.assertEqual(mock_client.chat.completions.create.call_count, 1)
+        self.assertEqual([r.content for r in responses], ["cached answer", "cached answer"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
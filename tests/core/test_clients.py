@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from lmflux.core.clients import ClientRegistry
+from lmflux.core.components import SystemPrompt
+from lmflux import openai_agent
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry().clear()
+        self.http_client_patch = patch.object(ClientRegistry, '__make_http_client__', return_value=MagicMock())
+        self.make_http_client = self.http_client_patch.start()
+
+    def tearDown(self):
+        self.http_client_patch.stop()
+        ClientRegistry().clear()
+
+    @patch('openai.OpenAI')
+    def test_same_endpoint_shares_client(self, mock_openai):
+        mock_openai.side_effect = lambda **kwargs: MagicMock()
+        registry = ClientRegistry()
+        a = registry.get_client("http://a", "key")
+        b = registry.get_client("http://a", "key")
+        c = registry.get_client("http://b", "key")
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(mock_openai.call_count, 2)
+        self.assertEqual(len(registry), 2)
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_sync_and_async_are_separate(self, mock_openai, mock_async_openai):
+        registry = ClientRegistry()
+        registry.get_client("http://a", "key")
+        registry.get_client("http://a", "key", asynchronous=True)
+        mock_openai.assert_called_once()
+        mock_async_openai.assert_called_once()
+        self.make_http_client.assert_any_call(True)
+
+    def test_configure(self):
+        registry = ClientRegistry()
+        registry.configure(max_connections=10, http2=True)
+        self.assertEqual(registry.max_connections, 10)
+        self.assertTrue(registry.http2)
+        registry.configure(max_connections=100, http2=False)
+
+    @patch('openai.OpenAI')
+    def test_openai_agent_uses_registry(self, mock_openai):
+        mock_openai.side_effect = lambda **kwargs: MagicMock()
+        agent_a = openai_agent("a", "model")
+        agent_b = openai_agent("b", "model")
+        self.assertIs(agent_a.llm.client, agent_b.llm.client)
+
+if __name__ == '__main__':
+    unittest.main()
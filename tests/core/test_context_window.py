@@ -0,0 +1,82 @@
+import unittest
+from lmflux.core.components import Message, Conversation, SystemPrompt
+from lmflux.core.context_window import (
+    estimate_tokens, group_turns, SlidingWindowStrategy, KeepSystemAndLastNStrategy,
+    SummarizingStrategy, SUMMARY_MESSAGE_NAME
+)
+from lmflux.core.llm_impl import EchoLLM
+
+def one_token(message):
+    return 1
+
+def make_conversation():
+    return [
+        Message("system", "sys"),
+        Message("user", "u1"),
+        Message("assistant", "", tool_calls=[{"id": "c1"}]),
+        Message("tool", "r1", call_id="c1"),
+        Message("assistant", "a1"),
+        Message("user", "u2"),
+        Message("assistant", "a2"),
+    ]
+
+class TestHelpers(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertGreater(estimate_tokens(Message("user", "a" * 400)), 100)
+
+    def test_group_turns_keeps_tool_results_together(self):
+        groups = group_turns(make_conversation()[1:])
+        self.assertEqual([len(group) for group in groups], [1, 2, 1, 1, 1])
+
+class TestSlidingWindowStrategy(unittest.TestCase):
+    def test_under_budget_is_unchanged(self):
+        messages = make_conversation()
+        strategy = SlidingWindowStrategy(max_tokens=100, estimator=one_token)
+        self.assertEqual(strategy.select(messages), messages)
+
+    def test_keeps_system_and_newest(self):
+        messages = make_conversation()
+        strategy = SlidingWindowStrategy(max_tokens=3, estimator=one_token)
+        kept = strategy.select(messages)
+        self.assertEqual([m.content for m in kept], ["sys", "u2", "a2"])
+
+    def test_never_splits_tool_results(self):
+        messages = make_conversation()[:4]
+        strategy = SlidingWindowStrategy(max_tokens=2, estimator=one_token)
+        kept = strategy.select(messages)
+        self.assertEqual([m.content for m in kept], ["sys", "", "r1"])
+
+class TestKeepSystemAndLastNStrategy(unittest.TestCase):
+    def test_last_n(self):
+        strategy = KeepSystemAndLastNStrategy(last_n=3)
+        kept = strategy.select(make_conversation())
+        self.assertEqual([m.content for m in kept], ["sys", "a1", "u2", "a2"])
+
+    def test_apply_reuses_dump_cache(self):
+        conversation = Conversation(make_conversation())
+        dumped = conversation.dump_conversation()
+        KeepSystemAndLastNStrategy(last_n=2).apply(conversation)
+        self.assertEqual(len(conversation), 3)
+        self.assertIs(conversation.dump_conversation()[0], dumped[0])
+
+class TestSummarizingStrategy(unittest.TestCase):
+    def test_summarizes_older_turns(self):
+        summarizer = EchoLLM("summarizer", SystemPrompt())
+        strategy = SummarizingStrategy(summarizer, max_tokens=4, keep_recent_tokens=2, estimator=one_token)
+        kept = strategy.select(make_conversation())
+        self.assertEqual(kept[0].content, "sys")
+        self.assertEqual(kept[1].name, SUMMARY_MESSAGE_NAME)
+        self.assertIn("u1", kept[1].content)
+        self.assertEqual([m.content for m in kept[2:]], ["u2", "a2"])
+
+    def test_model_applies_strategy(self):
+        model = EchoLLM("model_id", SystemPrompt())
+        model.set_context_window(KeepSystemAndLastNStrategy(last_n=1))
+        for text in ["a", "b", "c"]:
+            model.chat(Message("user", text))
+        self.assertEqual([m.content for m in model.conversation][-1], "c")
+        self.assertEqual(model.conversation[0].role, "system")
+        self.assertLessEqual(len(model.conversation), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import copy
+import pickle
 import unittest
 from unittest.mock import MagicMock
 from unittest.mock import patch
@@ -14,6 +16,44 @@ class TestMessage(unittest.TestCase):
         message = Message("role", "content")
         self.assertEqual(message.dump_message(), {"role": "role", "content": "content"})
 
+    def test_message_id_is_lazy_and_unique(self):
+        message = Message("role", "content")
+        self.assertIsNone(message._message_id)
+        message_id = message.message_id
+        self.assertEqual(message.message_id, message_id)
+        self.assertNotEqual(Message("role", "content").message_id, message_id)
+        self.assertEqual(Message("role", "content", message_id="fixed").message_id, "fixed")
+
+    def make_unread_message(self):
+        message = Message("assistant", "content", tool_calls=[{"id": "call"}], name="tool")
+        self.assertIsNone(message._message_id)
+        return message
+
+    def test_copy_keeps_the_message_id(self):
+        message = self.make_unread_message()
+        duplicate = copy.copy(message)
+        self.assertEqual(duplicate, message)
+        self.assertEqual(duplicate.message_id, message.message_id)
+        self.assertIs(duplicate.tool_calls, message.tool_calls)
+
+    def test_deepcopy_keeps_the_message_id(self):
+        message = self.make_unread_message()
+        duplicate = copy.deepcopy(message)
+        self.assertEqual(duplicate, message)
+        self.assertEqual(duplicate.tool_calls, message.tool_calls)
+        self.assertIsNot(duplicate.tool_calls, message.tool_calls)
+
+    def test_pickle_keeps_the_message_id(self):
+        message = self.make_unread_message()
+        restored = pickle.loads(pickle.dumps(message))
+        self.assertEqual(restored, message)
+        self.assertEqual(restored.dump_message(), message.dump_message())
+
+    def test_message_is_slotted(self):
+        message = Message("role", "content")
+        with self.assertRaises(AttributeError):
+            message.extra = 1
+
 class TestSystemPrompt(unittest.TestCase):
     def test_get_message(self):
         prompt = SystemPrompt()
@@ -51,6 +91,29 @@ class TestConversation(unittest.TestCase):
         self.assertEqual(conversation.dump_conversation(), [{"role": "role", "content": "content"}])
         conversation_str = str(conversation)
     
+    def test_dump_conversation_is_incremental(self):
+        first = Message("role", "content")
+        conversation = Conversation([first])
+        conversation.dump_conversation()
+        second = Message("role", "other")
+        conversation.add_message(second)
+        with patch.object(Message, 'dump_message', autospec=True, side_effect=lambda m: {"content": m.content}) as dump:
+            data = conversation.dump_conversation()
+        self.assertEqual(dump.call_count, 1)
+        self.assertEqual(data[-1], {"content": "other"})
+        self.assertEqual(len(data), 2)
+
+    def test_dump_conversation_invalidated_on_mutation(self):
+        conversation = Conversation([Message("role", "a"), Message("role", "b")])
+        conversation.dump_conversation()
+        conversation[1] = Message("role", "c")
+        self.assertEqual(conversation.dump_conversation()[1]["content"], "c")
+        del conversation[0]
+        self.assertEqual(conversation.dump_conversation(), [{"role": "role", "content": "c"}])
+        # Untracked in-place changes to the list are detected by the head check
+        conversation.messages = [Message("role", "d")]
+        self.assertEqual(conversation.dump_conversation(), [{"role": "role", "content": "d"}])
+
     def test_conversation_can_act_as_list(self):
         conversation = Conversation([Message("role", "content")])
         len(conversation)
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import Mock
 from lmflux.core.llms import LLMModel
 from lmflux.core.components import SystemPrompt, Message, LLMOptions, Tool, ToolParam
+from lmflux.core.conversations import session_scope
 
 class EchoLLM(LLMModel):
     def __init__(self, model_id:str, system_prompt:SystemPrompt, options:LLMOptions=None):
@@ -30,6 +31,30 @@ class TestLLMModel(unittest.TestCase):
         with unittest.mock.patch.object(model, '__chat_endpoint__', return_value=[object()]):
             model.chat(object())
 
+class TestConversationPerSession(unittest.TestCase):
+    def test_sessions_have_their_own_conversation(self):
+        model = EchoLLM("model_id", SystemPrompt())
+        with unittest.mock.patch.object(model, '__chat_endpoint__', side_effect=lambda cb: [Message("assistant", "ok")]):
+            with session_scope("a"):
+                model.chat(Message("user", "from a"))
+            with session_scope("b"):
+                model.chat(Message("user", "from b"))
+                model.reset_state()
+        self.assertEqual([m.content for m in model.conversations.get("a")][1:], ["from a", "ok"])
+        self.assertEqual(len(model.conversations.get("b")), 1)
+        # Outside of any session the model keeps its own conversation
+        self.assertEqual(len(model.conversation), 1)
+        model.conversations.drop("a")
+        self.assertEqual(sorted(model.conversations.session_ids(), key=str), [None, "b"])
+
+class TestLLMModelAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_achat_falls_back_to_sync_endpoint(self):
+        model = EchoLLM("model_id", SystemPrompt())
+        message = Message("user", "hello")
+        with unittest.mock.patch.object(model, '__chat_endpoint__', return_value=[message]):
+            response = await model.achat(message)
+        self.assertIs(response, message)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,9 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
 import json
+import threading
 
-from lmflux.core.llm_impl import OpenAICompatibleEndpoint, NamedOAICompatible
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint, NamedOAICompatible, AsyncOpenAICompatibleEndpoint
 from lmflux.core.components import SystemPrompt, ToolParam, Tool, Message, ToolRequest
 
 class DummyCallback:
@@ -123,6 +124,164 @@ class TestOpenAICompatibleEndpointChat(unittest.TestCase):
         self.assertEqual(called_tool.raw_tool_call.id, "call-1")
         self.assertEqual(called_result, "dummy_result")
 
+class TestOpenAICompatibleEndpointParallelTools(unittest.TestCase):
+    @patch('openai.OpenAI')
+    def test_parallel_tool_calls_keep_order(self, mock_openai):
+        # Both tools wait on the same barrier: it only releases if they run concurrently
+        barrier = threading.Barrier(2, timeout=5)
+        root_param = ToolParam(type="object", name="params", property=[])
+        def make_tool(name):
+            def func(**kwargs):
+                barrier.wait()
+                return f"{name}_result"
+            return Tool(name=name, description=name, root_param=root_param, func=func)
+
+        first_message = make_mock_message(
+            role="assistant",
+            content="",
+            tool_calls=[
+                make_tool_call("call-a", "tool_a", json.dumps({})),
+                make_tool_call("call-b", "tool_b", json.dumps({})),
+            ]
+        )
+        second_message = make_mock_message(role="assistant", content="done", tool_calls=None)
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = [
+            MagicMock(choices=[MagicMock(message=first_message)]),
+            MagicMock(choices=[MagicMock(message=second_message)])
+        ]
+        mock_openai.return_value = mock_client
+
+        endpoint = OpenAICompatibleEndpoint("model-id", SystemPrompt(), parallel_tool_calls=True)
+        endpoint.tools = [make_tool("tool_a"), make_tool("tool_b")]
+        callback = DummyCallback()
+        result = endpoint.__chat_endpoint__(tool_use_callback=callback)
+
+        self.assertEqual([m.call_id for m in result[1:3]], ["call-a", "call-b"])
+        self.assertEqual([m.content for m in result[1:3]], ["tool_a_result", "tool_b_result"])
+        self.assertEqual(len(callback.calls), 2)
+
+    @patch('openai.OpenAI')
+    def test_invalid_max_workers(self, mock_openai):
+        endpoint = OpenAICompatibleEndpoint("model-id", SystemPrompt())
+        with self.assertRaises(ValueError):
+            endpoint.set_parallel_tool_calls(True, max_workers=0)
+
+class TestAsyncOpenAICompatibleEndpoint(unittest.IsolatedAsyncioTestCase):
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    async def test_achat_with_async_and_sync_tools(self, mock_openai, mock_async_openai):
+        root_param = ToolParam(type="object", name="params", property=[])
+        async def async_func(**kwargs):
+            return "async_result"
+        async_tool = Tool(name="async_tool", description="async", root_param=root_param, func=async_func)
+        sync_tool = Tool(name="sync_tool", description="sync", root_param=root_param, func=lambda **kwargs: "sync_result")
+
+        first_message = make_mock_message(
+            role="assistant",
+            content="",
+            tool_calls=[
+                make_tool_call("call-a", "async_tool", json.dumps({})),
+                make_tool_call("call-b", "sync_tool", json.dumps({})),
+            ]
+        )
+        second_message = make_mock_message(role="assistant", content="done", tool_calls=None)
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=[
+            MagicMock(choices=[MagicMock(message=first_message)]),
+            MagicMock(choices=[MagicMock(message=second_message)])
+        ])
+        mock_async_openai.return_value = mock_async_client
+
+        endpoint = AsyncOpenAICompatibleEndpoint("model-id", SystemPrompt())
+        endpoint.tools = [async_tool, sync_tool]
+        callback = DummyCallback()
+        response = await endpoint.achat(Message("user", "hi"), tool_use_callback=callback)
+
+        self.assertEqual(response.content, "done")
+        self.assertEqual(
+            [m.content for m in endpoint.conversation[3:5]],
+            ["async_result", "sync_result"]
+        )
+        self.assertEqual(len(callback.calls), 2)
+        mock_openai.return_value.chat.completions.create.assert_not_called()
+
+    @patch('openai.OpenAI')
+    def test_sync_endpoint_runs_coroutine_tools(self, mock_openai):
+        root_param = ToolParam(type="object", name="params", property=[])
+        async def async_func(**kwargs):
+            return "async_result"
+        endpoint = OpenAICompatibleEndpoint("model-id", SystemPrompt())
+        endpoint.tools = [Tool(name="async_tool", description="async", root_param=root_param, func=async_func)]
+        message = endpoint.__call_function__(
+            ToolRequest(None, make_tool_call("call-a", "async_tool", json.dumps({}))),
+            tool_use_callback=None
+        )
+        self.assertEqual(message.content, "async_result")
+
+def make_chunk(content=None, reasoning_content=None, tool_calls=None, role=None):
+    """Helper to create a mock streamed chunk."""
+    delta = MagicMock()
+    delta.role = role
+    delta.content = content
+    delta.reasoning_content = reasoning_content
+    delta.tool_calls = tool_calls
+    return MagicMock(choices=[MagicMock(delta=delta)])
+
+def make_tool_call_fragment(index, id_=None, name=None, arguments=None):
+    function = MagicMock()
+    function.name = name
+    function.arguments = arguments
+    fragment = MagicMock()
+    fragment.index = index
+    fragment.id = id_
+    fragment.function = function
+    return fragment
+
+class TestOpenAICompatibleEndpointStreaming(unittest.TestCase):
+    @patch('openai.OpenAI')
+    def test_stream_reassembles_tool_calls(self, mock_openai):
+        root_param = ToolParam(type="object", name="params", property=[])
+        received_args = []
+        def func(**kwargs):
+            received_args.append(kwargs)
+            return "tool_result"
+        dummy_tool = Tool(name="dummy_tool", description="dummy", root_param=root_param, func=func)
+
+        first_stream = [
+            make_chunk(role="assistant", reasoning_content="thinking"),
+            make_chunk(content="Let me "),
+            make_chunk(content="check", tool_calls=[make_tool_call_fragment(0, "call-1", "dummy_tool", '{"a"')]),
+            make_chunk(tool_calls=[make_tool_call_fragment(0, arguments=': 1}')]),
+        ]
+        second_stream = [
+            make_chunk(role="assistant", content="Final"),
+            make_chunk(content=" answer"),
+        ]
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = [iter(first_stream), iter(second_stream)]
+        mock_openai.return_value = mock_client
+
+        endpoint = OpenAICompatibleEndpoint("model-id", SystemPrompt(), stream=True)
+        endpoint.tools = [dummy_tool]
+        deltas = []
+        endpoint.set_stream_callback(deltas.append)
+        response = endpoint.chat(Message("user", "hi"))
+
+        self.assertEqual(response.content, "Final answer")
+        assistant = endpoint.conversation[2]
+        self.assertEqual(assistant.content, "Let me check")
+        self.assertEqual(assistant.reasoning_content, "thinking")
+        self.assertEqual(assistant.tool_calls[0]["function"], {"name": "dummy_tool", "arguments": '{"a": 1}'})
+        self.assertEqual(received_args, [{"a": 1}])
+        self.assertEqual(endpoint.conversation[3].content, "tool_result")
+        self.assertEqual(
+            "".join(d.content for d in deltas if d.kind == "content"),
+            "Let me checkFinal answer"
+        )
+        self.assertEqual([d.content for d in deltas if d.kind == "reasoning"], ["thinking"])
+        self.assertTrue(mock_client.chat.completions.create.call_args.kwargs["stream"])
+
 class TestOpenAICompatibleEndpointCallFunction(unittest.TestCase):
     @patch('openai.OpenAI')
     def test_call_function_success_and_error(self, mock_openai):
@@ -0,0 +1,175 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import asyncio
+import threading
+import time
+
+from lmflux.core.policies import ExecutionPolicy, RetryPolicy, CircuitBreaker, CircuitOpenError
+from lmflux.core.components import SystemPrompt, Message
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint, AsyncOpenAICompatibleEndpoint
+
+def make_flaky(failures: int, error=ConnectionError):
+    calls = []
+    def func(value):
+        calls.append(value)
+        if len(calls) <= failures:
+            raise error("flaky")
+        return value
+    return func, calls
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_is_bounded(self):
+        retry = RetryPolicy(initial_delay=1, multiplier=2, max_delay=3, jitter=0.5)
+        for attempt, upper in [(1, 1), (2, 2), (3, 3), (10, 3)]:
+            delay = retry.delay(attempt)
+            self.assertLessEqual(delay, upper)
+            self.assertGreaterEqual(delay, upper / 2)
+
+    def test_retries_until_success(self):
+        func, calls = make_flaky(2)
+        policy = ExecutionPolicy(retry=RetryPolicy(max_attempts=3, initial_delay=0))
+        self.assertEqual(policy.execute(func, "ok"), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up(self):
+        func, calls = make_flaky(5)
+        policy = ExecutionPolicy(retry=RetryPolicy(max_attempts=2, initial_delay=0))
+        with self.assertRaises(ConnectionError):
+            policy.execute(func, "ok")
+        self.assertEqual(len(calls), 2)
+
+    def test_only_retries_listed_errors(self):
+        func, calls = make_flaky(1, error=KeyError)
+        policy = ExecutionPolicy(retry=RetryPolicy(initial_delay=0, retry_on=(ConnectionError,)))
+        with self.assertRaises(KeyError):
+            policy.execute(func, "ok")
+        self.assertEqual(len(calls), 1)
+
+class TestTimeoutAndHedging(unittest.TestCase):
+    def test_timeout(self):
+        release = threading.Event()
+        policy = ExecutionPolicy(timeout=0.05)
+        with self.assertRaises(TimeoutError):
+            policy.execute(release.wait, 5)
+        release.set()
+
+    def test_hedged_request_wins(self):
+        calls = []
+        def func():
+            calls.append(None)
+            # The first attempt is slow, the hedge answers right away
+            if len(calls) == 1:
+                time.sleep(1)
+                return "slow"
+            return "fast"
+        policy = ExecutionPolicy(hedge_after=0.02, timeout=2)
+        started = time.monotonic()
+        self.assertEqual(policy.execute(func), "fast")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(calls), 2)
+
+    def test_async_timeout_and_hedging(self):
+        calls = []
+        async def func():
+            calls.append(None)
+            await asyncio.sleep(1 if len(calls) == 1 else 0)
+            return len(calls)
+        policy = ExecutionPolicy(hedge_after=0.02, timeout=2)
+        self.assertEqual(asyncio.run(policy.aexecute(func)), 2)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(ExecutionPolicy(timeout=0.02).aexecute(asyncio.sleep, 1))
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        policy = ExecutionPolicy(circuit_breaker=breaker)
+        func, calls = make_flaky(2)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                policy.execute(func, "ok")
+        with self.assertRaises(CircuitOpenError):
+            policy.execute(func, "ok")
+        self.assertEqual(len(calls), 2)
+        time.sleep(0.06)
+        self.assertEqual(policy.execute(func, "ok"), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+class TestEndpointPolicy(unittest.TestCase):
+    @patch('openai.OpenAI')
+    def test_completion_is_retried(self, mock_openai):
+        raw_message = MagicMock()
+        raw_message.role = "assistant"
+        raw_message.content = "answer"
+        raw_message.reasoning_content = None
+        raw_message.tool_calls = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = [
+            ConnectionError("reset"), MagicMock(choices=[MagicMock(message=raw_message)])
+        ]
+        mock_openai.return_value = mock_client
+        endpoint = OpenAICompatibleEndpoint(
+            "model-id", SystemPrompt(),
+            policy=ExecutionPolicy(retry=RetryPolicy(initial_delay=0))
+        )
+        self.assertEqual(endpoint.chat(Message("user", "hi")).content, "answer")
+        self.assertEqual(mock_client.chat.completions.create.call_count, 2)
+
+    def make_streaming_endpoint(self, mock_openai, policy):
+        def stream(attempt, delay):
+            for index in range(3):
+                time.sleep(delay)
+                delta = MagicMock(role="assistant", content=f"[{attempt}:{index}]",
+                                  reasoning_content=None, tool_calls=None)
+                yield MagicMock(choices=[MagicMock(delta=delta)])
+        calls = []
+        def create(**kwargs):
+            calls.append(None)
+            # The first attempt is slow, the hedge answers right away
+            return stream(len(calls), 0.05 if len(calls) == 1 else 0)
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = create
+        mock_openai.return_value = mock_client
+        endpoint = OpenAICompatibleEndpoint("model-id", SystemPrompt(), stream=True, policy=policy)
+        deltas = []
+        endpoint.set_stream_callback(lambda delta: deltas.append(delta.content))
+        return endpoint, deltas
+
+    @patch('openai.OpenAI')
+    def test_hedged_stream_only_emits_the_winner(self, mock_openai):
+        endpoint, deltas = self.make_streaming_endpoint(
+            mock_openai, ExecutionPolicy(hedge_after=0.01, timeout=2)
+        )
+        response = endpoint.chat(Message("user", "hi"))
+        self.assertEqual(response.content, "[2:0][2:1][2:2]")
+        time.sleep(0.2)  # let the abandoned attempt finish streaming
+        self.assertEqual(deltas, ["[2:0]", "[2:1]", "[2:2]"])
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_async_hedged_stream_only_emits_the_winner(self, mock_openai, mock_async_openai):
+        async def stream(attempt, delay):
+            for index in range(3):
+                delta = MagicMock(role="assistant", content=f"[{attempt}:{index}]",
+                                  reasoning_content=None, tool_calls=None)
+                # The slow attempt starts streaming before it stalls and gets cancelled
+                yield MagicMock(choices=[MagicMock(delta=delta)])
+                await asyncio.sleep(delay)
+        calls = []
+        async def create(**kwargs):
+            calls.append(None)
+            return stream(len(calls), 0.05 if len(calls) == 1 else 0)
+        mock_async_client = MagicMock()
+        mock_async_client.chat.completions.create.side_effect = create
+        mock_async_openai.return_value = mock_async_client
+        endpoint = AsyncOpenAICompatibleEndpoint(
+            "model-id", SystemPrompt(), stream=True,
+            policy=ExecutionPolicy(hedge_after=0.01)
+        )
+        deltas = []
+        endpoint.set_stream_callback(lambda delta: deltas.append(delta.content))
+        response = asyncio.run(endpoint.achat(Message("user", "hi")))
+        self.assertEqual(response.content, "[2:0][2:1][2:2]")
+        self.assertEqual(deltas, ["[2:0]", "[2:1]", "[2:2]"])
+
+if __name__ == '__main__':
+    unittest.main()
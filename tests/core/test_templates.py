@@ -87,6 +87,41 @@ class TestTemplates(unittest.TestCase):
         context = {"name": "World"}
         result = self.template_manager.get_with_context(template_id, context)
         self.assertEqual(result, "Hello World")
+
+    def test_get_with_context_missing_keys(self):
+        self.template_manager.put_template("t", "Hi {{name}}, {{unknown}}")
+        get = self.template_manager.get_with_context
+        self.assertEqual(get("t", {"name": "Ann"}), "Hi Ann, {{unknown}}")
+        self.assertEqual(get("t", {"name": "Ann"}, on_missing="empty"), "Hi Ann, ")
+        with self.assertRaises(KeyError):
+            get("t", {"name": "Ann"}, on_missing="error")
+        with self.assertRaises(ValueError):
+            get("t", {}, on_missing="ignore")
+
+    def test_get_with_context_escaping(self):
+        self.template_manager.put_template("t", "<p>{{body}}</p>")
+        get = self.template_manager.get_with_context
+        self.assertEqual(get("t", {"body": "<b>&"}, escape="html"), "<p>&lt;b&gt;&amp;</p>")
+        self.assertEqual(get("t", {"body": 'say "hi"\n'}, escape="json"), '<p>say \\"hi\\"\\n</p>')
+
+    def test_values_are_not_substituted_again(self):
+        self.template_manager.put_template("t", "{{a}} {{b}}")
+        result = self.template_manager.get_with_context("t", {"a": "{{b}}", "b": 1, "other": 2})
+        self.assertEqual(result, "{{b}} 1")
+
+    def test_compiled_template_is_cached_until_the_source_changes(self):
+        self.template_manager.put_template("t", "Hello {{name}}")
+        compiled = self.template_manager.compile_template("t")
+        self.assertIs(self.template_manager.compile_template("t"), compiled)
+        self.assertEqual(compiled.segments, ["Hello ", "name", ""])
+        self.template_manager.put_template("t", "Bye {{name}}")
+        self.assertEqual(self.template_manager.get_with_context("t", {"name": "Ann"}), "Bye Ann")
+        # Persistent templates edited on disk are parsed again
+        self.template_manager.put_template("disk.t", "A {{x}}", persistent=True)
+        self.assertEqual(self.template_manager.get_with_context("disk.t", {"x": 1}), "A 1")
+        with open(f"{self.temp_dir}/disk/t.md", "w") as f:
+            f.write("B {{x}}")
+        self.assertEqual(self.template_manager.get_with_context("disk.t", {"x": 1}), "B 1")
     
     def test_get_after_delete_soft(self):
         self.template_manager.set_soft_external_delete()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import MagicMock
+
+from lmflux.core.components import Tool, ToolParam, SystemPrompt, Message, ToolRequest
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint
+from lmflux.core.tool_registry import ToolRegistry
+
+def make_tool(name, func=lambda: "ok", description="A tool"):
+    root_param = ToolParam(type="object", name="parameters", property=[])
+    return Tool(name=name, description=description, root_param=root_param, func=func)
+
+class TestToolRegistry(unittest.TestCase):
+    def test_lookup_by_name(self):
+        tools = [make_tool(f"tool_{i}") for i in range(500)]
+        registry = ToolRegistry(tools)
+        self.assertIs(registry.get("tool_321"), tools[321])
+        self.assertIsNone(registry.get("missing"))
+        self.assertIn("tool_0", registry)
+        self.assertEqual([tool.name for tool in registry][:2], ["tool_0", "tool_1"])
+
+    def test_replace_with_same_tools_is_a_no_op(self):
+        tools = [make_tool("a"), make_tool("b")]
+        registry = ToolRegistry()
+        self.assertTrue(registry.replace(tools))
+        compiled = registry.compile()
+        version = registry.version
+        self.assertFalse(registry.replace(list(tools)))
+        self.assertEqual(registry.version, version)
+        self.assertIs(registry.compile(), compiled)
+
+    def test_swapping_tools_recompiles(self):
+        registry = ToolRegistry([make_tool("a"), make_tool("b")])
+        first = registry.compile()
+        # Same number of tools, different schemas
+        registry.replace([make_tool("a"), make_tool("c")])
+        second = registry.compile()
+        self.assertEqual([t["function"]["name"] for t in second], ["a", "c"])
+        self.assertNotEqual(registry.fingerprint, None)
+        self.assertIsNot(first, second)
+
+    def test_equivalent_tools_reuse_the_compiled_schemas(self):
+        registry = ToolRegistry([make_tool("a")])
+        compiled = registry.compile()
+        registry.replace([make_tool("a")])
+        self.assertIs(registry.compile(), compiled)
+
+    def test_invalidate_after_in_place_change(self):
+        tool = make_tool("a")
+        registry = ToolRegistry([tool])
+        registry.compile()
+        tool.description = "Changed"
+        registry.invalidate()
+        self.assertEqual(registry.compile()[0]["function"]["description"], "Changed")
+
+    def test_empty_registry_compiles_to_none(self):
+        self.assertIsNone(ToolRegistry().compile())
+
+class TestEndpointTools(unittest.TestCase):
+    def make_endpoint(self):
+        return OpenAICompatibleEndpoint("model-id", SystemPrompt(), client=MagicMock())
+
+    def make_request(self, name):
+        tool_call = MagicMock()
+        tool_call.id = "call"
+        tool_call.function.name = name
+        tool_call.function.arguments = "{}"
+        return ToolRequest(Message("assistant", ""), raw_tool_call=tool_call)
+
+    def test_falsy_results_are_not_reported_as_missing_tools(self):
+        endpoint = self.make_endpoint()
+        endpoint.tools = [make_tool("zero", func=lambda: 0)]
+        self.assertEqual(endpoint.__call_function__(self.make_request("zero"), None).content, "0")
+        self.assertEqual(
+            endpoint.__call_function__(self.make_request("missing"), None).content,
+            "[ERROR] - Tool not found"
+        )
+
+    def test_reassigning_tools_does_not_recompile(self):
+        endpoint = self.make_endpoint()
+        tools = [make_tool("a"), make_tool("b")]
+        endpoint.tools = tools
+        endpoint.__compile_tools__()
+        compiled = endpoint.compiled_tools
+        version = endpoint.tools.version
+        endpoint.tools = list(tools)
+        endpoint.__compile_tools__()
+        self.assertEqual(endpoint.tools.version, version)
+        self.assertIs(endpoint.compiled_tools, compiled)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import unittest
+
+from lmflux.core.components import Tool, ToolParam
+from lmflux.core.tool_validation import compile_validator
+from lmflux.utils import fastjson
+
+def make_root(*params, additional_properties=False):
+    return ToolParam(
+        type="object", name="parameters", property=list(params),
+        additional_properties=additional_properties
+    )
+
+def make_tool(func, *params):
+    return Tool(name="echo", description="Echo", root_param=make_root(*params), func=func)
+
+class TestCompileValidator(unittest.TestCase):
+    def test_valid_arguments_are_coerced(self):
+        validate = compile_validator(make_root(
+            ToolParam("number", "count", is_required=True),
+            ToolParam("boolean", "flag"),
+            ToolParam("string", "label"),
+            ToolParam("array[number|string]", "items"),
+        ))
+        args, errors = validate({"count": "3", "flag": "true", "label": 7, "items": [1, "a"]})
+        self.assertEqual(errors, [])
+        self.assertEqual(args, {"count": 3, "flag": True, "label": "7", "items": [1, "a"]})
+
+    def test_errors_are_collected_with_their_path(self):
+        validate = compile_validator(make_root(
+            ToolParam("number", "count", is_required=True),
+            ToolParam("object", "inner", property=[ToolParam("boolean", "ok")]),
+            ToolParam("array[number]", "items"),
+        ))
+        _, errors = validate({"inner": {"ok": "maybe"}, "items": [1, "x"], "extra": 1})
+        self.assertEqual(
+            [error["path"] for error in errors],
+            ["$.count", "$.inner.ok", "$.items[1]", "$.extra"]
+        )
+
+    def test_booleans_are_not_numbers(self):
+        validate = compile_validator(make_root(ToolParam("number", "count")))
+        _, errors = validate({"count": True})
+        self.assertEqual(len(errors), 1)
+
+    def test_unknown_types_pass_through(self):
+        validate = compile_validator(make_root(ToolParam("str", "query", is_required="true")))
+        self.assertEqual(validate({"query": "hi"}), ({"query": "hi"}, []))
+
+    def test_additional_properties(self):
+        validate = compile_validator(make_root(additional_properties=True))
+        self.assertEqual(validate({"a": 1}), ({"a": 1}, []))
+        validate = compile_validator(make_root(), allow_extra=True)
+        self.assertEqual(validate({"a": 1}), ({"a": 1}, []))
+
+class TestToolCallResponse(unittest.TestCase):
+    def test_arguments_are_validated_before_the_call(self):
+        calls = []
+        def add(a, b):
+            calls.append((a, b))
+            return a + b
+        tool = make_tool(
+            add, ToolParam("number", "a", is_required=True), ToolParam("number", "b", is_required=True)
+        )
+        self.assertEqual(tool.get_call_response('{"a": 1, "b": "2"}'), 3)
+        error = json.loads(tool.get_call_response('{"a": 1}'))
+        self.assertEqual(error["error"], "invalid_arguments")
+        self.assertEqual(error["tool"], "echo")
+        self.assertEqual(error["details"][0]["path"], "$.b")
+        self.assertEqual(calls, [(1, 2)])
+
+    def test_malformed_json_is_reported_to_the_model(self):
+        tool = make_tool(lambda: "ok")
+        error = json.loads(tool.get_call_response('{"a": '))
+        self.assertEqual(error["error"], "invalid_json")
+        self.assertEqual(tool.get_call_response(""), "ok")
+
+    def test_async_path_validates_too(self):
+        async def echo(text):
+            return text
+        tool = make_tool(echo, ToolParam("string", "text", is_required=True))
+        self.assertEqual(asyncio.run(tool.aget_call_response('{"text": "hi"}')), "hi")
+        error = json.loads(asyncio.run(tool.aget_call_response('{}')))
+        self.assertEqual(error["error"], "invalid_arguments")
+
+    def test_validator_is_compiled_once_and_invalidated(self):
+        tool = make_tool(lambda a: a, ToolParam("number", "a", is_required=True))
+        validator = tool.build_validator()
+        tool.get_call_response('{"a": 1}')
+        self.assertIs(tool.build_validator(), validator)
+        tool.invalidate_cache()
+        self.assertIsNot(tool.build_validator(), validator)
+
+class TestFastJson(unittest.TestCase):
+    def test_round_trip(self):
+        data = {"b": [1, 2.5, "x", None, True], "a": {"nested": "é"}}
+        self.assertEqual(fastjson.loads(fastjson.dumps(data)), data)
+        self.assertTrue(fastjson.dumps(data, sort_keys=True).startswith('{"a"'))
+
+    def test_malformed_input_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            fastjson.loads("{")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
+import asyncio
 import unittest
 from unittest.mock import Mock
 from lmflux.flow.toolbox import tool, ToolBox
+from lmflux.core.cache import LRUCache
 
 from enum import Enum
 
@@ -85,7 +87,82 @@ class TestTool(unittest.TestCase):
                 "test tool"
                 pass
         self.assertIn('To use list please define the sub type example: `list[str]`', str(cm.exception))
-        
+
+class TestToolMemoization(unittest.TestCase):
+    def test_tools_are_not_memoized_by_default(self):
+        calls = []
+        @tool
+        def lookup(key: str):
+            "Looks a key up"
+            calls.append(key)
+            return key.upper()
+        definition = lookup.__tool_definition__
+        self.assertIsNone(definition.cache)
+        definition.get_call_response('{"key": "a"}')
+        definition.get_call_response('{"key": "a"}')
+        self.assertEqual(calls, ["a", "a"])
+
+    def test_memoize_by_canonical_arguments(self):
+        calls = []
+        @tool(memoize=True)
+        def convert(amount: float, currency: str):
+            "Converts an amount"
+            calls.append((amount, currency))
+            return amount * 2
+        definition = convert.__tool_definition__
+        self.assertEqual(definition.get_call_response('{"amount": 2, "currency": "EUR"}'), 4)
+        # Same arguments in another order and with whitespace hit the cache
+        self.assertEqual(definition.get_call_response('{ "currency":"EUR", "amount":2 }'), 4)
+        self.assertEqual(definition.get_call_response('{"amount": 3, "currency": "EUR"}'), 6)
+        self.assertEqual(calls, [(2, "EUR"), (3, "EUR")])
+        self.assertEqual(definition.cache.stats()["hits"], 1)
+
+    def test_memoize_ttl_and_size(self):
+        @tool(memoize=True, ttl=60, max_size=1)
+        def square(x: int):
+            "Squares x"
+            return x * x
+        cache = square.__tool_definition__.cache
+        self.assertEqual((cache.ttl, cache.max_size), (60, 1))
+        square.__tool_definition__.get_call_response('{"x": 1}')
+        square.__tool_definition__.get_call_response('{"x": 2}')
+        self.assertEqual(len(cache), 1)
+
+    def test_shared_cache_keys_include_the_tool_name(self):
+        shared = LRUCache(max_size=10)
+        @tool(cache=shared)
+        def first(x: int):
+            "First"
+            return "first"
+        @tool(cache=shared)
+        def second(x: int):
+            "Second"
+            return "second"
+        self.assertEqual(first.__tool_definition__.get_call_response('{"x": 1}'), "first")
+        self.assertEqual(second.__tool_definition__.get_call_response('{"x": 1}'), "second")
+        self.assertEqual(len(shared), 2)
+
+    def test_async_dispatch_uses_the_cache(self):
+        calls = []
+        @tool(memoize=True)
+        async def fetch(url: str):
+            "Fetches a url"
+            calls.append(url)
+            return "page"
+        definition = fetch.__tool_definition__
+        for _ in range(3):
+            self.assertEqual(asyncio.run(definition.aget_call_response('{"url": "x"}')), "page")
+        self.assertEqual(calls, ["x"])
+
+    def test_invalid_arguments_are_not_cached(self):
+        @tool(memoize=True)
+        def square(x: int):
+            "Squares x"
+            return x * x
+        definition = square.__tool_definition__
+        definition.get_call_response('{"x": "nope"}')
+        self.assertEqual(len(definition.cache), 0)
+
 
 @tool
 def some_tool(a: str, b: int, c: bool):
@@ -0,0 +1,325 @@
+import unittest
+from unittest.mock import MagicMock
+import json
+import threading
+
+from lmflux.core.components import SystemPrompt, Message
+from lmflux.core.llms import LLMModel
+from lmflux.core.llm_impl import OpenAICompatibleEndpoint
+from lmflux.flow import create_agent
+from lmflux.graphs.mesh.definitions import MeshGraph, DelegationError, SessionClosedError
+from lmflux.core.conversations import session_scope
+from lmflux.graphs.mesh.interactions import InteractionStore
+from lmflux.graphs.mesh.markdown_renderer import MarkdownRenderer
+from lmflux.graphs.mesh.mermaid_renderer import MermaidRender
+from lmflux.graphs.mesh.result_renderer import MeshResultRenderer
+
+class BarrierLLM(LLMModel):
+    """Answers with its model id, but only once every specialist is answering at the same time."""
+    def __init__(self, model_id: str, barrier: threading.Barrier):
+        super().__init__(SystemPrompt(), model_id, None)
+        self.barrier = barrier
+
+    def __chat_endpoint__(self, tool_use_callback: callable) -> list[Message]:
+        self.barrier.wait()
+        return [Message("assistant", f"{self.model_id} done")]
+
+def make_tool_call(id_, name, query):
+    tool_call = MagicMock()
+    tool_call.id = id_
+    tool_call.function.name = name
+    tool_call.function.arguments = json.dumps({"query": query})
+    return tool_call
+
+def make_completion(content, tool_calls=None):
+    message = MagicMock()
+    message.role = "assistant"
+    message.content = content
+    message.reasoning_content = None
+    message.tool_calls = tool_calls
+    return MagicMock(choices=[MagicMock(message=message)])
+
+def make_coordinator(specialists: list[str]):
+    client = MagicMock()
+    client.chat.completions.create.side_effect = [
+        make_completion("", [
+            make_tool_call(f"call_{name}", f"talk_to_{name}", f"help {name}")
+            for name in specialists
+        ]),
+        make_completion("all done"),
+    ]
+    llm = OpenAICompatibleEndpoint("coordinator", SystemPrompt(), client=client)
+    return create_agent(llm, "coordinator").build()
+
+class TestMeshDelegation(unittest.TestCase):
+    def make_mesh(self, barrier):
+        names = ["alpha", "beta", "gamma"]
+        coordinator = make_coordinator(names)
+        mesh = MeshGraph()
+        for name in names:
+            specialist = create_agent(BarrierLLM(name, barrier), name).build()
+            mesh.connect_agents(coordinator, specialist, f"Ask {name}")
+        return mesh, coordinator
+
+    def test_parallel_delegation(self):
+        barrier = threading.Barrier(3, timeout=5)
+        mesh, coordinator = self.make_mesh(barrier)
+        mesh.enable_parallel_delegation(max_workers=3)
+        response = mesh.query_agent(coordinator, "go")
+        self.assertEqual(response.content, "all done")
+
+        interactions = mesh.agent_interactions.values()
+        self.assertEqual(sorted(i["agent_b_id"] for i in interactions), ["alpha", "beta", "gamma"])
+        for interaction in interactions:
+            self.assertEqual(interaction["agent_a_id"], "coordinator")
+            self.assertIn("agent_a_metadata", interaction)
+        # Tool results keep the order of the calls
+        tool_messages = [m for m in coordinator.get_conversation(mesh.session) if m.role == "tool"]
+        self.assertEqual([m.call_id for m in tool_messages], ["call_alpha", "call_beta", "call_gamma"])
+        self.assertIn("alpha done", tool_messages[0].content)
+
+    def test_sequential_delegation_by_default(self):
+        # A single-party barrier never blocks, the delegations simply run one after another
+        mesh, coordinator = self.make_mesh(threading.Barrier(1))
+        self.assertEqual(mesh.query_agent(coordinator, "go").content, "all done")
+        self.assertEqual(len(mesh.agent_interactions), 3)
+
+    def test_same_agent_answers_one_query_at_a_time(self):
+        active, overlaps = [], []
+        class CountingLLM(LLMModel):
+            def __chat_endpoint__(self, tool_use_callback):
+                active.append(None)
+                if len(active) > 1:
+                    overlaps.append(None)
+                threading.Event().wait(0.02)
+                active.pop()
+                return [Message("assistant", "ok")]
+
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_completion("", [make_tool_call(f"call_{i}", "talk_to_solo", str(i)) for i in range(3)]),
+            make_completion("all done"),
+        ]
+        coordinator = create_agent(
+            OpenAICompatibleEndpoint("coordinator", SystemPrompt(), client=client), "coordinator"
+        ).build()
+        solo = create_agent(CountingLLM(SystemPrompt(), "solo", None), "solo").build()
+        mesh = MeshGraph()
+        mesh.connect_agents(coordinator, solo, "Ask solo")
+        mesh.enable_parallel_delegation(max_workers=3)
+        mesh.query_agent(coordinator, "go")
+        self.assertEqual(overlaps, [])
+        self.assertEqual(len(mesh.agent_interactions), 3)
+
+def make_peer(name: str, peer: str, barrier: threading.Barrier):
+    """Asks ``peer`` for help when the coordinator asks it, once both peers are busy."""
+    def create(messages, **kwargs):
+        last = messages[-1]
+        if last["role"] == "user" and last["content"].startswith("help"):
+            barrier.wait()
+            return make_completion("", [make_tool_call(f"call_{name}", f"talk_to_{peer}", f"from {name}")])
+        return make_completion(f"{name} done")
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+    return create_agent(OpenAICompatibleEndpoint(name, SystemPrompt(), client=client), name).build()
+
+class TestMeshDelegationDeadlocks(unittest.TestCase):
+    def test_cyclic_parallel_delegation_does_not_deadlock(self):
+        barrier = threading.Barrier(2, timeout=5)
+        coordinator = make_coordinator(["bee", "cee"])
+        bee, cee = make_peer("bee", "cee", barrier), make_peer("cee", "bee", barrier)
+        mesh = MeshGraph()
+        mesh.connect_agents_from([
+            (coordinator, bee, "Ask bee"), (coordinator, cee, "Ask cee"),
+            (bee, cee, "Ask cee"), (cee, bee, "Ask bee"),
+        ])
+        mesh.enable_parallel_delegation(max_workers=2)
+        responses = []
+        worker = threading.Thread(
+            target=lambda: responses.append(mesh.query_agent(coordinator, "go")), daemon=True
+        )
+        worker.start()
+        worker.join(10)
+        self.assertFalse(worker.is_alive(), "the mesh deadlocked")
+        self.assertEqual(responses[0].content, "all done")
+        # Exactly one of the crossing delegations was refused and reported to its caller
+        tool_results = [
+            m.content for agent in (bee, cee)
+            for m in agent.get_conversation(mesh.session) if m.role == "tool"
+        ]
+        self.assertEqual(len([r for r in tool_results if "deadlock" in r]), 1)
+
+    def test_delegation_timeout(self):
+        mesh = MeshGraph()
+        agent = create_agent(EchoAfterDelay(SystemPrompt(), "busy", None), "busy").build()
+        mesh.add_agent(agent)
+        mesh.delegation_timeout = 0.01
+        busy, release = threading.Event(), threading.Event()
+        def hold():
+            with mesh.__delegation__(agent):
+                busy.set()
+                release.wait(5)
+        holder = threading.Thread(target=hold)
+        holder.start()
+        busy.wait(5)
+        with self.assertRaises(DelegationError):
+            with mesh.__delegation__(agent):
+                pass
+        release.set()
+        holder.join()
+        with mesh.__delegation__(agent):
+            pass
+
+class EchoAfterDelay(LLMModel):
+    def __chat_endpoint__(self, tool_use_callback):
+        threading.Event().wait(0.01)
+        return [Message("assistant", f"echo: {self.conversation[-1].content}")]
+
+class TestMeshSessions(unittest.TestCase):
+    def make_mesh(self):
+        mesh = MeshGraph()
+        agent = create_agent(EchoAfterDelay(SystemPrompt(), "echo", None), "echo").build()
+        mesh.add_agent(agent)
+        return mesh, agent
+
+    def test_concurrent_sessions(self):
+        mesh, agent = self.make_mesh()
+        def user(name):
+            for turn in range(3):
+                mesh.query_agent(agent, f"{name}-{turn}", clear=False, session_id=name)
+        threads = [threading.Thread(target=user, args=(name,)) for name in ["ann", "bob", "cid"]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(mesh.session_ids()), ["ann", "bob", "cid"])
+        for name in ["ann", "bob", "cid"]:
+            conversation = agent.llm.conversations.get(name)
+            self.assertEqual(
+                [m.content for m in conversation if m.role == "user"],
+                [f"{name}-{turn}" for turn in range(3)]
+            )
+            mesh.show_result(session_id=name)
+
+    def test_clear_only_resets_the_queried_session(self):
+        mesh, agent = self.make_mesh()
+        mesh.query_agent(agent, "keep me", session_id="ann")
+        mesh.query_agent(agent, "first")
+        mesh.query_agent(agent, "second", clear=True)
+        self.assertEqual(len(mesh.user_interactions), 1)
+        self.assertEqual(len(agent.get_conversation(mesh.session)), 3)
+        self.assertEqual(len(agent.llm.conversations.get("ann")), 3)
+
+        mesh.close_session("ann")
+        self.assertNotIn("ann", mesh.session_ids())
+        self.assertNotIn("ann", agent.llm.conversations.session_ids())
+
+    def test_max_sessions_closes_the_least_recently_queried(self):
+        mesh, agent = self.make_mesh()
+        mesh.max_sessions = 2
+        mesh.query_agent(agent, "hi", session_id="ann")
+        mesh.query_agent(agent, "hi", session_id="bob")
+        mesh.query_agent(agent, "again", clear=False, session_id="ann")
+        mesh.query_agent(agent, "hi", session_id="cid")
+        self.assertEqual(sorted(mesh.session_ids()), ["ann", "cid"])
+        self.assertNotIn("bob", agent.llm.conversations)
+        for name in range(100):
+            mesh.query_agent(agent, "hi", session_id=str(name))
+        self.assertEqual(len(mesh.session_ids()), 2)
+        self.assertEqual(len(agent.llm.conversations), 2)
+
+    def test_closed_session_does_not_fall_back_to_the_default(self):
+        mesh, agent = self.make_mesh()
+        mesh.query_agent(agent, "hi")
+        mesh.query_agent(agent, "hi", session_id="ann")
+        mesh.close_session("ann")
+        with session_scope("ann"):
+            with self.assertRaises(SessionClosedError):
+                mesh.session
+            with self.assertRaises(SessionClosedError):
+                mesh.user_interactions
+            mesh.show_result()  # nothing left to render
+        self.assertEqual(mesh.session_ids(), [mesh.session.session_id])
+        self.assertEqual(len(mesh.user_interactions), 1)
+
+class TestInteractionStore(unittest.TestCase):
+    def test_per_agent_indices(self):
+        store = InteractionStore()
+        store.add({"interaction_id": "t1", "agent_a_id": "a", "agent_b_id": "b"})
+        store.add({"interaction_id": "t2", "agent_a_id": "a", "agent_b_id": "c"})
+        store.add({"interaction_id": "t3", "agent_a_id": "b", "agent_b_id": "c"})
+        store.attach("t1", {"agent_a_metadata": {"request_message_id": "m"}})
+        self.assertEqual([i["interaction_id"] for i in store.outgoing("a")], ["t1", "t2"])
+        self.assertEqual([i["interaction_id"] for i in store.incoming("c")], ["t2", "t3"])
+        self.assertEqual([i["interaction_id"] for i in store.incoming("c", start=1)], ["t3"])
+        self.assertEqual(store.incoming("a"), [])
+        self.assertIn("agent_a_metadata", store["t1"])
+        self.assertEqual(sorted(store), ["t1", "t2", "t3"])
+
+    def test_renderer_reuses_agent_maps(self):
+        barrier = threading.Barrier(1)
+        mesh, coordinator = TestMeshDelegation().make_mesh(barrier)
+        mesh.query_agent(coordinator, "go")
+        renderer = MarkdownRenderer(mesh)
+        first, _ = renderer.__make_interactions_map__()
+        counts = {m["actor"]: len(m["incoming_interactions_cross_agent"]) for m in first}
+        self.assertEqual(counts, {"coordinator": 0, "alpha": 1, "beta": 1, "gamma": 1})
+        self.assertEqual(len(first[0]["outgoing_interactions_cross_agent"]), 3)
+        second, _ = renderer.__make_interactions_map__()
+        # Unchanged agents keep the very same map between renders
+        self.assertIs(first[0], second[0])
+        self.assertEqual(len(second[0]["messages"]), len(coordinator.get_conversation(mesh.session)))
+        self.assertIn("coordinator (", renderer.build_markdown_log())
+
+class CountingRenderer(MeshResultRenderer):
+    def __init__(self, G):
+        super().__init__(G)
+        self.threads = []
+
+    def render(self):
+        self.threads.append(threading.current_thread())
+
+class TestRendering(unittest.TestCase):
+    def test_throttled_renderer_coalesces_off_thread(self):
+        mesh, agent = TestMeshSessions().make_mesh()
+        inner = CountingRenderer(mesh)
+        mesh.renderer = inner
+        mesh.set_throttled_render(min_interval=10)
+        throttled = mesh.renderer
+        mesh.show_result()
+        # The first request renders right away on the background thread
+        for _ in range(500):
+            if throttled.rendered:
+                break
+            threading.Event().wait(0.01)
+        # The next ones wait for the interval and are coalesced
+        for _ in range(49):
+            mesh.show_result()
+        self.assertEqual(throttled.requested, 50)
+        self.assertEqual(throttled.rendered, 1)
+        throttled.flush()
+        self.assertEqual(throttled.rendered, 2)
+        self.assertIsNot(inner.threads[0], threading.current_thread())
+        self.assertIs(inner.threads[1], threading.current_thread())
+        throttled.close()
+
+    def test_mermaid_is_built_incrementally(self):
+        mesh, coordinator = TestMeshDelegation().make_mesh(threading.Barrier(1))
+        mesh.query_agent(coordinator, "go")
+        renderer = MermaidRender(mesh)
+        chart = renderer.build_mesh_response_meramid()
+        self.assertEqual(renderer.build_mesh_response_meramid(), chart)
+        self.assertIn('subgraph subgraph_alpha["alpha"]', chart)
+        self.assertEqual(chart.count("User Query"), 1)
+        self.assertEqual(chart.count("<-.->"), 3)
+        # Outgoing interactions point at the coordinator message that made the calls
+        self.assertNotIn("None", chart)
+
+        markdown = MarkdownRenderer(mesh)
+        log = markdown.build_markdown_log()
+        self.assertIn("- coordinator (7 messages)", log)
+        self.assertIn("\t- alpha (3 messages)", log)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,348 @@
+import unittest
+import threading
+import os
+import tempfile
+import time
+from lmflux.agents.sessions import Session, Context
+from lmflux.graphs.task.definitions import TaskGraph, AgenticTask, transformer_task, agentic_task
+from lmflux.agents.structure import Agent
+from lmflux.core.components import Message, SystemPrompt
+from lmflux.core.llm_impl import EchoLLM
+from lmflux.graphs.task.checkpoints import DirectoryCheckpointStore, SQLiteCheckpointStore
+from lmflux.core.policies import ExecutionPolicy, RetryPolicy
+
+def make_fan_out_graph(barrier: threading.Barrier = None):
+    @transformer_task
+    def start(session: Session):
+        session.set("start", True)
+
+    @transformer_task
+    def left(session: Session):
+        if barrier:
+            barrier.wait()
+        session.set_cumulative("branches", "left")
+
+    @transformer_task
+    def right(session: Session):
+        if barrier:
+            barrier.wait()
+        session.set_cumulative("branches", "right")
+
+    @transformer_task
+    def join(session: Session):
+        session.set("joined", sorted(session.get_cumulative("branches")))
+
+    G = TaskGraph()
+    G.connect_tasks(start, left)
+    G.connect_tasks(start, right)
+    G.connect_tasks(left, join)
+    G.connect_tasks(right, join)
+    return G
+
+class TestTaskGraph(unittest.TestCase):
+    def test_run_sequential(self):
+        session = make_fan_out_graph().run()
+        self.assertEqual(session.get("joined"), ["left", "right"])
+
+    def test_run_with_context(self):
+        context = Context()
+        context.set("seed", 1)
+        session = make_fan_out_graph().run(with_context=context)
+        self.assertEqual(session.get("seed"), 1)
+        self.assertTrue(session.get("start"))
+
+    def test_run_parallel_branches(self):
+        # The barrier only releases when both branches run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        session = make_fan_out_graph(barrier).run(max_concurrency=2)
+        self.assertEqual(session.get("joined"), ["left", "right"])
+
+    def test_run_parallel_propagates_errors(self):
+        @transformer_task
+        def failing(session: Session):
+            raise KeyError("boom")
+
+        @transformer_task
+        def after(session: Session):
+            session.set("after", True)
+
+        G = TaskGraph()
+        G.connect_tasks(failing, after)
+        with self.assertRaises(KeyError):
+            G.run(max_concurrency=2)
+
+    def test_run_many(self):
+        G = make_fan_out_graph()
+        inputs = ({"record": i} for i in range(10))
+        sessions = list(G.run_many(inputs, max_workers=3))
+        self.assertEqual(sorted(session.get("record") for session in sessions), list(range(10)))
+        for session in sessions:
+            self.assertEqual(session.get("joined"), ["left", "right"])
+
+    def test_run_many_back_pressure(self):
+        pulled = []
+        def inputs():
+            for i in range(10):
+                pulled.append(i)
+                context = Context()
+                context.set("record", i)
+                yield context
+        results = make_fan_out_graph().run_many(inputs(), max_workers=2)
+        next(results)
+        # Only the in-flight records (plus the one refilled) have been read
+        self.assertLessEqual(len(pulled), 3)
+        results.close()
+
+    def test_compile_is_cached_until_mutation(self):
+        G = make_fan_out_graph()
+        plan = G.compile()
+        self.assertIs(G.compile(), plan)
+        self.assertEqual([node.name for node in plan.nodes][0], "start")
+        self.assertEqual([len(level) for level in plan.levels], [1, 2, 1])
+        self.assertEqual(plan.predecessor_counts, (0, 1, 1, 2))
+
+        @transformer_task
+        def extra(session: Session):
+            pass
+        G.connect_tasks(plan.nodes[-1], extra)
+        new_plan = G.compile()
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(len(new_plan), 5)
+
+    def test_compile_detects_cycles(self):
+        @transformer_task
+        def a(session: Session):
+            pass
+
+        @transformer_task
+        def b(session: Session):
+            pass
+
+        G = TaskGraph()
+        G.connect_tasks(a, b)
+        G.connect_tasks(b, a)
+        with self.assertRaises(RuntimeError):
+            G.run()
+
+    def test_connect_reuses_registered_nodes(self):
+        G = make_fan_out_graph()
+        self.assertEqual(len(G.G.nodes), 4)
+        self.assertEqual(G.__find_object_in_graph_by_name__("join").name, "join")
+        self.assertIsNone(G.__find_object_in_graph_by_name__("missing"))
+
+    def test_bulk_construction(self):
+        def make_task(i):
+            @transformer_task
+            def step(session: Session):
+                session.set_cumulative("steps", i)
+            step.name = f"step_{i}"
+            return step
+
+        tasks = [make_task(i) for i in range(2000)]
+        G = TaskGraph()
+        G.connect_tasks_from(zip(tasks, tasks[1:]))
+        self.assertEqual(len(G.G.nodes), 2000)
+        self.assertEqual(len(G.G.edges), 1999)
+        self.assertEqual(G.run().get_cumulative("steps"), list(range(2000)))
+
+        G = TaskGraph.from_adjacency({tasks[0]: [tasks[1], tasks[2]], tasks[3]: []})
+        self.assertEqual(len(G.G.nodes), 4)
+        self.assertEqual([len(level) for level in G.compile().levels], [2, 2])
+
+    def test_distinct_nodes_with_the_same_name_are_rejected(self):
+        def make_task(i):
+            @transformer_task
+            def step(session: Session):
+                session.set_cumulative("steps", i)
+            return step
+
+        tasks = [make_task(i) for i in range(4)]
+        G = TaskGraph()
+        with self.assertRaises(ValueError):
+            G.connect_tasks_from(zip(tasks, tasks[1:]))
+        G = TaskGraph()
+        G.connect_tasks(tasks[0], make_fan_out_graph().__find_object_in_graph_by_name__("join"))
+        # Connecting the same objects again is fine
+        G.connect_tasks(tasks[0], G.__find_object_in_graph_by_name__("join"))
+        self.assertEqual(len(G.G.nodes), 2)
+        with self.assertRaises(ValueError):
+            G.connect_tasks(tasks[1], tasks[0])
+
+    def test_node_policy_retries_on_clean_fork(self):
+        attempts = []
+
+        @transformer_task(policy=ExecutionPolicy(retry=RetryPolicy(initial_delay=0)))
+        def flaky(session: Session):
+            attempts.append(None)
+            session.set_cumulative("writes", len(attempts))
+            if len(attempts) < 3:
+                raise ConnectionError("upstream reset")
+
+        G = TaskGraph()
+        G.__add_node__(flaky)
+        session = G.run()
+        self.assertEqual(len(attempts), 3)
+        # Writes of the failed attempts were discarded
+        self.assertEqual(session.get_cumulative("writes"), [3])
+
+    def test_node_policy_timeout(self):
+        release = threading.Event()
+
+        @transformer_task(policy=ExecutionPolicy(timeout=0.05))
+        def slow(session: Session):
+            release.wait(5)
+
+        G = TaskGraph()
+        G.__add_node__(slow)
+        with self.assertRaises(TimeoutError):
+            G.run()
+        release.set()
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            make_fan_out_graph().run(max_concurrency=0)
+
+def make_flaky_graph(calls: list, fail_at: str):
+    def make_step(name, previous):
+        def step(session: Session):
+            if name == fail_at and not calls.count(name):
+                calls.append(name)
+                raise TimeoutError("provider timed out")
+            calls.append(name)
+            session.set(name, session.get(previous, 0) + 1)
+            session.set_cumulative("order", name)
+        step.__name__ = name
+        return transformer_task(step)
+
+    steps = [make_step("a", None), make_step("b", "a"), make_step("c", "b"), make_step("d", "c")]
+    G = TaskGraph()
+    G.connect_tasks_from(zip(steps, steps[1:]))
+    return G
+
+class EchoAgent(Agent):
+    def reset_agent_state(self):
+        self.llm.reset_state()
+    def get_tools(self) -> list:
+        return []
+    def initialize(self):
+        return EchoLLM("echo", SystemPrompt(), None), "echo"
+    def add_tool(self, tool):
+        pass
+
+class TestTaskGraphAgents(unittest.TestCase):
+    def test_records_converse_apart_and_do_not_keep_conversations(self):
+        agent = EchoAgent()
+
+        @agentic_task(agent)
+        def answer(agent: Agent, session: Session):
+            reply = agent.conversate(Message("user", session.get("q")), session)
+            time.sleep(0.001)  # keeps several records in flight together
+            seen = [message.content for message in agent.get_conversation(session)]
+            session.set("answer", reply.content)
+            session.set("seen", seen)
+
+        G = TaskGraph()
+        G.__add_node__(answer)
+        # max_concurrency > 1 runs the nodes on the threads of the parallel scheduler
+        for max_concurrency in (1, 2):
+            with self.subTest(max_concurrency=max_concurrency):
+                results = list(G.run_many(
+                    [{"q": str(i)} for i in range(50)], max_workers=4, max_concurrency=max_concurrency
+                ))
+                self.assertEqual(sorted(int(s.get("answer")) for s in results), list(range(50)))
+                for session in results:
+                    # System prompt, question and answer of this record only
+                    self.assertEqual(session.get("seen")[1:], [session.get("q")] * 2)
+                self.assertEqual(agent.llm.conversations.session_ids(), [])
+
+    def test_parallel_nodes_sharing_an_agent_take_turns(self):
+        agent = EchoAgent()
+
+        def make_node(name: str) -> AgenticTask:
+            def ask(agent: Agent, session: Session):
+                first = agent.conversate(Message("user", f"{name}-1"), session)
+                time.sleep(0.02)  # other nodes would write to the conversation meanwhile
+                second = agent.conversate(Message("user", f"{name}-2"), session)
+                turn = [message.content for message in agent.llm.conversation[-4:]]
+                session.set(name, (first.content, second.content, turn))
+            return AgenticTask(name, agent, ask)
+
+        G = TaskGraph()
+        for name in "abcd":
+            G.__add_node__(make_node(name))
+        session = G.run(max_concurrency=4)
+        for name in "abcd":
+            first, second, turn = session.get(name)
+            self.assertEqual((first, second), (f"{name}-1", f"{name}-2"))
+            self.assertEqual(turn, [f"{name}-1", f"{name}-1", f"{name}-2", f"{name}-2"])
+
+class TestTaskGraphCheckpoints(unittest.TestCase):
+    def check_resume(self, store, max_concurrency):
+        calls = []
+        G = make_flaky_graph(calls, fail_at="c")
+        context = Context()
+        context.set("seed", True)
+        run_id = f"flaky-run-{max_concurrency}"
+        with self.assertRaises(TimeoutError):
+            G.run(
+                with_context=context, checkpoint_store=store,
+                max_concurrency=max_concurrency, run_id=run_id
+            )
+        self.assertEqual(calls, ["a", "b", "c"])
+        self.assertEqual([name for name, _ in store.load(run_id)], ["a", "b"])
+
+        session = G.run(
+            with_context=context, checkpoint_store=store,
+            resume_from=run_id, max_concurrency=max_concurrency
+        )
+        # a and b are restored from the checkpoints instead of running again
+        self.assertEqual(calls, ["a", "b", "c", "c", "d"])
+        self.assertEqual(session.session_id, run_id)
+        self.assertEqual(session.get("d"), 4)
+        self.assertTrue(session.get("seed"))
+        self.assertEqual(session.get_cumulative("order"), ["a", "b", "c", "d"])
+        self.assertEqual(len(store.load(run_id)), 4)
+        store.delete(run_id)
+        self.assertEqual(store.load(run_id), [])
+
+    def test_directory_store_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_resume(DirectoryCheckpointStore(directory), max_concurrency=1)
+
+    def test_sqlite_store_resume_parallel(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteCheckpointStore(os.path.join(directory, "checkpoints.sqlite"))
+            self.check_resume(store, max_concurrency=2)
+            store.close()
+
+    def test_fresh_run_discards_checkpoints_of_the_same_id(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = DirectoryCheckpointStore(directory)
+            calls = []
+            G = make_flaky_graph(calls, fail_at="c")
+            # Plain retry loop: the first two attempts fail at c, then the run is resumed
+            for _ in range(2):
+                calls.clear()  # c fails again on this attempt
+                with self.assertRaises(TimeoutError):
+                    G.run(checkpoint_store=store, run_id="retried")
+            self.assertEqual([name for name, _ in store.load("retried")], ["a", "b"])
+            session = G.run(checkpoint_store=store, resume_from="retried")
+            self.assertEqual(session.get_cumulative("order"), ["a", "b", "c", "d"])
+
+    def test_resume_requires_store(self):
+        with self.assertRaises(ValueError):
+            make_fan_out_graph().run(resume_from="run-id")
+
+    def test_run_id_must_match_resume_from(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                make_fan_out_graph().run(
+                    checkpoint_store=DirectoryCheckpointStore(directory),
+                    resume_from="run-id", run_id="other"
+                )
+
+    def test_run_id_names_the_session(self):
+        self.assertEqual(make_fan_out_graph().run(run_id="my-run").session_id, "my-run")
+
+if __name__ == '__main__':
+    unittest.main()
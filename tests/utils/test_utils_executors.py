@@ -0,0 +1,97 @@
+import asyncio
+import copy
+import json
+import os
+import pickle
+import unittest
+
+from lmflux.agents.sessions import Session
+from lmflux.flow.toolbox import tool
+from lmflux.graphs.task.definitions import (
+    TaskGraph, TransformerTask, transformer_task, _load_transformer_task
+)
+from lmflux.core.policies import ExecutionPolicy
+from lmflux.utils import executors
+
+@tool(executor="process")
+def count_words(text: str):
+    """
+    Counts the words of a text
+    """
+    return {"words": len(text.split()), "pid": os.getpid()}
+
+@transformer_task(executor="process")
+def score(session: Session):
+    session.set("score", sum(range(session.get("n"))))
+    session.set("pid", os.getpid())
+    session.set_cumulative("log", "scored")
+
+def double(session: Session):
+    session.set("doubled", session.get("score") * 2)
+
+class TestProcessExecutor(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        executors.shutdown_process_pool()
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            executors.check_executor("gpu")
+
+    def test_tool_runs_in_a_worker_process(self):
+        definition = count_words.__tool_definition__
+        result = definition.get_call_response('{"text": "one two three"}')
+        self.assertEqual(result["words"], 3)
+        self.assertNotEqual(result["pid"], os.getpid())
+        result = asyncio.run(definition.aget_call_response('{"text": "one"}'))
+        self.assertEqual(result["words"], 1)
+        # Validation still happens in the parent
+        self.assertEqual(
+            json.loads(definition.get_call_response('{}'))["error"], "invalid_arguments"
+        )
+        # The decorated function keeps working as a plain function
+        self.assertEqual(count_words("a b")["words"], 2)
+
+    def test_local_functions_are_rejected(self):
+        with self.assertRaises(AttributeError):
+            @tool(executor="process")
+            def local_tool(a: str):
+                "Local"
+                return a
+        def local_task(session: Session):
+            pass
+        with self.assertRaises(ValueError):
+            TransformerTask("local", local_task, executor="process")
+
+    def test_tasks_keep_normal_pickling(self):
+        policy = ExecutionPolicy(timeout=1)
+        task = TransformerTask("double", double, policy=policy)
+        restored = pickle.loads(pickle.dumps(task))
+        self.assertIs(restored.run_callback, double)
+        self.assertEqual(restored.policy.timeout, 1)
+        self.assertEqual(restored.id, task.id)
+        # Tasks built from closures can still be copied
+        def local_task(session: Session):
+            session.set("local", True)
+        copied = copy.deepcopy(TransformerTask("local", local_task, policy=policy))
+        self.assertIs(copied.run_callback, local_task)
+        self.assertEqual(copied.policy.timeout, 1)
+
+    def test_process_path_loads_the_task_by_reference(self):
+        self.assertIs(_load_transformer_task("score", __name__, "score"), score)
+        self.assertIs(_load_transformer_task("double", __name__, "double").run_callback, double)
+
+    def test_task_changes_flow_back_into_the_session(self):
+        graph = TaskGraph()
+        graph.connect_tasks(score, TransformerTask("double", double))
+        session = Session()
+        session.set("n", 10)
+        session.set_cumulative("log", "start")
+        result = graph.run(session.context)
+        self.assertEqual(result.get("score"), 45)
+        self.assertEqual(result.get("doubled"), 90)
+        self.assertNotEqual(result.get("pid"), os.getpid())
+        self.assertEqual(result.get_cumulative("log"), ["start", "scored"])
+
+if __name__ == '__main__':
+    unittest.main()
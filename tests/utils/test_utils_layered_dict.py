@@ -0,0 +1,65 @@
+import unittest
+import copy
+import pickle
+from lmflux.utils.layered_dict import LayeredDict, MAX_LAYERS
+
+class TestLayeredDict(unittest.TestCase):
+    def test_dict_behaviour(self):
+        data = LayeredDict({"a": 1})
+        data["b"] = 2
+        del data["a"]
+        self.assertEqual(data, {"b": 2})
+        self.assertNotIn("a", data)
+        self.assertEqual(len(data), 1)
+        with self.assertRaises(KeyError):
+            del data["a"]
+
+    def test_fork_is_isolated(self):
+        parent = LayeredDict({"a": 1, "b": 2})
+        child = parent.fork()
+        child["a"] = 10
+        del child["b"]
+        parent["c"] = 3
+        self.assertEqual(parent, {"a": 1, "b": 2, "c": 3})
+        self.assertEqual(child, {"a": 10})
+        self.assertTrue(child.owns("a"))
+        self.assertFalse(child.owns("b"))
+
+    def test_fork_shares_values(self):
+        document = ["large"]
+        parent = LayeredDict({"doc": document})
+        self.assertIs(parent.fork()["doc"], document)
+
+    def test_changed_keys(self):
+        parent = LayeredDict({"a": 1, "b": 2})
+        child = parent.fork()
+        base = parent.fork()
+        child["a"] = 3
+        child.fork()
+        child["c"] = 4
+        self.assertEqual(child.changed_keys(base), {"a", "c"})
+
+    def test_compaction(self):
+        data = LayeredDict()
+        for i in range(MAX_LAYERS + 5):
+            data[i] = i
+            data.fork()
+        self.assertLessEqual(len(data._parents), MAX_LAYERS)
+        self.assertEqual(len(data), MAX_LAYERS + 5)
+
+    def test_pickle_and_deepcopy(self):
+        parent = LayeredDict({"a": 1, "b": 2})
+        child = parent.fork()
+        del child["a"]
+        self.assertEqual(pickle.loads(pickle.dumps(child)), {"b": 2})
+        self.assertEqual(copy.deepcopy(child), {"b": 2})
+
+    def test_snapshot_of_plain_dict(self):
+        source = {"a": [1]}
+        snapshot = LayeredDict.snapshot_of(source)
+        source["b"] = 2
+        self.assertEqual(snapshot, {"a": [1]})
+        self.assertFalse(snapshot.owns("a"))
+
+if __name__ == '__main__':
+    unittest.main()